@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the on-disk layout of an Augment space.
+
+Mirrors what VersionControl and MetadataManager do in the app:
+
+    <space>/.augment/file_metadata/<path hash>/<version id>.json
+    <space>/.augment/file_versions/<path hash>/<version id>.data
+
+A space whose .augment/layout.json says {"sharded": true} puts new per-file
+directories under a two-level fan-out instead (file_metadata/ab/cd/abcd...).
+Lookups always check both layouts, so a space can be migrated online with
+store_reshard.py.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import unquote, urlparse
+
+from path_hash import calculate_file_path_hash, find_hash_dir, iter_hash_dirs, lookup_hash_dir, shard_path
+
+AUGMENT_DIR = ".augment"
+SUBDIRS = ["versions", "file_versions", "file_metadata", "metadata", "snapshots"]
+CHUNK_SIZE = 1024 * 1024
+LAYOUT_FILENAME = "layout.json"
+
+_layout_cache = {}
+
+
+def augment_path(space_path, *parts):
+    """Return a path inside the space's .augment directory."""
+    return os.path.join(space_path, AUGMENT_DIR, *parts)
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """Return the SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_fs_path(value):
+    """Turn a stored filePath/storagePath (plain path or file:// URL) into a path."""
+    if value and value.startswith("file://"):
+        return unquote(urlparse(value).path)
+    return value
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp as written by the app or the test scripts into epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return 0.0
+    text = value[:-1] if value.endswith("Z") else value
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_timestamp(epoch):
+    """Format epoch seconds as the ISO-8601 string stored in version metadata."""
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+    return moment.isoformat() + "Z"
+
+
+def read_layout(space_path):
+    """Return the space's layout settings ({"sharded": False} unless layout.json says otherwise)."""
+    path = augment_path(space_path, LAYOUT_FILENAME)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {"sharded": False}
+    cached = _layout_cache.get(path)
+    if cached is None or cached[0] != mtime_ns:
+        with open(path, "r") as f:
+            cached = (mtime_ns, {"sharded": False, **json.load(f)})
+        _layout_cache[path] = cached
+    return cached[1]
+
+
+def is_sharded(space_path):
+    """Return True if new per-file directories go under the two-level fan-out."""
+    return bool(read_layout(space_path).get("sharded"))
+
+
+def set_layout(space_path, sharded):
+    """Record which layout new per-file directories use; existing ones are not moved."""
+    layout = {**read_layout(space_path), "sharded": bool(sharded)}
+    write_json_atomic(augment_path(space_path, LAYOUT_FILENAME), layout)
+    return layout
+
+
+def hash_dir(space_path, kind, file_hash, create=False):
+    """Return the per-file directory for file_hash under kind (file_metadata or file_versions).
+
+    An existing directory is returned wherever it is; otherwise the location the
+    space's layout puts new directories in, created when create=True.
+    """
+    root = augment_path(space_path, kind)
+    path = find_hash_dir(root, file_hash)
+    if path is None:
+        path = shard_path(root, file_hash) if is_sharded(space_path) else os.path.join(root, file_hash)
+        if create:
+            os.makedirs(path, exist_ok=True)
+    return path
+
+
+def create_space(space_path):
+    """Create the .augment directory structure for a space."""
+    for subdir in SUBDIRS:
+        os.makedirs(augment_path(space_path, subdir), exist_ok=True)
+    return augment_path(space_path)
+
+
+def add_version(space_path, file_path, content, timestamp=None, comment=None):
+    """Store a new version of file_path the way createFileVersion does and return its metadata."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    file_hash = calculate_file_path_hash(file_path)
+    version_id = str(uuid.uuid4()).upper()
+
+    version_storage_dir = hash_dir(space_path, "file_versions", file_hash, create=True)
+    storage_path = os.path.join(version_storage_dir, f"{version_id}.data")
+    with open(storage_path, "wb") as f:
+        f.write(content)
+
+    version_metadata = {
+        "id": version_id,
+        "filePath": file_path,
+        "timestamp": format_timestamp(timestamp if timestamp is not None else datetime.now().timestamp()),
+        "size": len(content),
+        "comment": comment,
+        "contentHash": hashlib.sha256(content).hexdigest(),
+        "storagePath": storage_path,
+    }
+
+    file_metadata_subdir = hash_dir(space_path, "file_metadata", file_hash, create=True)
+    with open(os.path.join(file_metadata_subdir, f"{version_id}.json"), "w") as f:
+        json.dump(version_metadata, f, indent=2)
+
+    return version_metadata
+
+
+def load_version_metadata(metadata_path):
+    """Read one <version id>.json record."""
+    with open(metadata_path, "r") as f:
+        return json.load(f)
+
+
+def write_json_atomic(path, data):
+    """Write a JSON record through a temp file and rename so readers never see a partial file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def iter_metadata_dirs(space_path):
+    """Yield (path hash, directory entry) for every per-file directory under file_metadata/."""
+    return iter_hash_dirs(augment_path(space_path, "file_metadata"))
+
+
+def iter_metadata_files(space_path):
+    """Yield (path hash, version id, metadata path) for every version record in the space."""
+    for file_hash, dir_entry in iter_metadata_dirs(space_path):
+        with os.scandir(dir_entry.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    yield file_hash, entry.name[:-5], entry.path
+
+
+def load_file_versions(space_path, file_path):
+    """Load every version of file_path by parsing its JSON records, newest first."""
+    file_metadata_subdir = lookup_hash_dir(augment_path(space_path, "file_metadata"), file_path)
+    if file_metadata_subdir is None:
+        return []
+
+    versions = []
+    for name in os.listdir(file_metadata_subdir):
+        if name.endswith(".json"):
+            versions.append(load_version_metadata(os.path.join(file_metadata_subdir, name)))
+
+    versions.sort(key=lambda x: parse_timestamp(x.get("timestamp")), reverse=True)
+    return versions
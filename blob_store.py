@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Content-addressed blob store for file versions.
+
+Blobs live at .augment/objects/<first 2 hex>/<contentHash> and are shared by every
+version (of any file) with the same content. Reference counts are not stored; they
+are derived from the storagePath of the metadata records, so a blob may only be
+deleted once no record points at it.
+
+`compact` converts an existing file_versions/<path hash>/<id>.data store in place.
+It streams over the metadata one record at a time and is safe to interrupt and
+rerun: a record that already points into objects/ is skipped, and every step
+(link object, rewrite metadata, unlink old blob) leaves a consistent store.
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+
+from augment_store import (
+    augment_path,
+    hash_file,
+    iter_metadata_files,
+    load_version_metadata,
+    to_fs_path,
+    write_json_atomic,
+)
+from path_hash import is_shard_name
+from version_index import INDEX_FILENAME, VersionIndex
+
+OBJECTS_DIR = "objects"
+
+
+def object_path(space_path, content_hash):
+    """Return where the blob with this content hash lives."""
+    return augment_path(space_path, OBJECTS_DIR, content_hash[:2], content_hash)
+
+
+def is_object_path(space_path, path):
+    """Return True if path points into the space's objects/ directory."""
+    objects_root = augment_path(space_path, OBJECTS_DIR) + os.sep
+    return bool(path) and os.path.abspath(path).startswith(objects_root)
+
+
+def _link_or_copy(source, target):
+    """Put source's content at target, leaving source in place for the caller to remove."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Across devices; the source must outlive the record that still points at it. copy2 keeps
+        # the mtime, which is how a rerun recognises a copy it made itself (see _copied_from).
+        temp_path = f"{target}.tmp"
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+    return True
+
+
+def _copied_from(target, source):
+    """Return True if target is source itself or the copy _link_or_copy made of it."""
+    if os.path.samefile(target, source):
+        return True
+    target_stat, source_stat = os.stat(target), os.stat(source)
+    return (target_stat.st_mtime_ns, target_stat.st_size) == (source_stat.st_mtime_ns, source_stat.st_size)
+
+
+def put_bytes(space_path, content):
+    """Store content and return (object path, content hash, newly written)."""
+    content_hash = hashlib.sha256(content).hexdigest()
+    target = object_path(space_path, content_hash)
+    if os.path.exists(target):
+        return target, content_hash, False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, target)
+    return target, content_hash, True
+
+
+def put_file(space_path, source_path, content_hash=None):
+    """Store a file's content without copying it through memory and return (object path, content hash)."""
+    content_hash = content_hash or hash_file(source_path)
+    target = object_path(space_path, content_hash)
+    if not os.path.exists(target):
+        _link_or_copy(source_path, target)
+    return target, content_hash
+
+
+def reference_counts(space_path):
+    """Count how many metadata records point at each object, keyed by content hash."""
+    counts = {}
+    for _, _, metadata_path in iter_metadata_files(space_path):
+        try:
+            version = load_version_metadata(metadata_path)
+        except (OSError, ValueError):
+            continue
+        storage_path = to_fs_path(version.get("storagePath"))
+        if is_object_path(space_path, storage_path):
+            content_hash = os.path.basename(storage_path)
+            counts[content_hash] = counts.get(content_hash, 0) + 1
+    return counts
+
+
+def iter_objects(space_path):
+    """Yield (content hash, directory entry) for every stored object."""
+    try:
+        with os.scandir(augment_path(space_path, OBJECTS_DIR)) as fanout:
+            for bucket in fanout:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(bucket.path) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith(".tmp"):
+                            yield entry.name, entry
+    except FileNotFoundError:
+        return
+
+
+def unreferenced_objects(space_path, counts=None):
+    """Yield (content hash, size) of objects that no metadata record refers to."""
+    counts = reference_counts(space_path) if counts is None else counts
+    for content_hash, entry in iter_objects(space_path):
+        if counts.get(content_hash, 0) == 0:
+            yield content_hash, entry.stat().st_size
+
+
+def _compact_version(space_path, metadata_path, stats):
+    try:
+        version = load_version_metadata(metadata_path)
+    except (OSError, ValueError):
+        stats["skipped"] += 1
+        return
+
+    storage_path = to_fs_path(version.get("storagePath"))
+    if is_object_path(space_path, storage_path):
+        stats["already_compacted"] += 1
+        return
+    if version.get("deltaBase"):
+        # Delta records are small and chain-specific; only their keyframes are shared.
+        stats["skipped"] += 1
+        return
+    if not storage_path or not os.path.exists(storage_path):
+        stats["missing"] += 1
+        return
+
+    content_hash = hash_file(storage_path)
+    if version.get("contentHash") and content_hash != version["contentHash"]:
+        # Never fold a corrupted blob into a shared object; leave it for `store_verify`.
+        stats["hash_mismatch"] += 1
+        return
+
+    size = os.path.getsize(storage_path)
+    target = object_path(space_path, content_hash)
+    if not os.path.exists(target):
+        _link_or_copy(storage_path, target)
+        stats["objects_created"] += 1
+    elif _copied_from(target, storage_path):
+        # Resuming after a crash between linking (or copying) the object and rewriting the metadata.
+        stats["objects_created"] += 1
+    else:
+        stats["deduplicated"] += 1
+        stats["bytes_reclaimed"] += size
+
+    version["storagePath"] = target
+    write_json_atomic(metadata_path, version)
+    if os.path.exists(storage_path):
+        os.remove(storage_path)
+    stats["migrated"] += 1
+    return True
+
+
+def _remove_empty_dirs(root):
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if is_shard_name(entry.name):
+                        _remove_empty_dirs(entry.path)
+                    try:
+                        os.rmdir(entry.path)
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        return
+
+
+def compact(space_path):
+    """Move every file_versions/ blob into objects/, deduplicating by content, and return counters."""
+    stats = {
+        "migrated": 0,
+        "already_compacted": 0,
+        "objects_created": 0,
+        "deduplicated": 0,
+        "bytes_reclaimed": 0,
+        "missing": 0,
+        "hash_mismatch": 0,
+        "skipped": 0,
+    }
+    touched = set()
+    for file_hash, _, metadata_path in iter_metadata_files(space_path):
+        if _compact_version(space_path, metadata_path, stats):
+            touched.add(file_hash)
+    _remove_empty_dirs(augment_path(space_path, "file_versions"))
+    if touched and os.path.exists(augment_path(space_path, INDEX_FILENAME)):
+        # Every migrated record has a new storagePath; make the index re-read them.
+        with VersionIndex(space_path) as index:
+            for file_hash in touched:
+                index.forget(file_hash)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed blob store tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="migrate file_versions/ into objects/")
+    compact_parser.add_argument("space", help="path to the Augment space")
+    refs_parser = subparsers.add_parser("unreferenced", help="list objects nothing refers to")
+    refs_parser.add_argument("space", help="path to the Augment space")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        stats = compact(args.space)
+        print(f"🗜️  Compacted {args.space}")
+        for key, value in stats.items():
+            print(f"   {key}: {value}")
+        print(f"✅ Reclaimed {stats['bytes_reclaimed'] / (1024 * 1024):.2f} MB")
+    else:
+        total = 0
+        for content_hash, size in unreferenced_objects(args.space):
+            total += size
+            print(f"{content_hash}  {size}")
+        print(f"📊 {total} unreferenced bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Concurrent bulk loader for version metadata.
+
+Reads every <version id>.json for a set of files on a thread pool (the work is
+almost all I/O wait on network home directories and cold caches, which threads
+overlap fine), then returns each file's versions newest first, exactly like
+load_file_versions. `load_versions_async` exposes the same thing to asyncio code.
+
+`benchmark` compares the serial loader with the bulk loader on warm and cold page
+cache. Cold runs evict the metadata files with posix_fadvise(DONTNEED) where the
+platform supports it; pass --drop-caches to drop the whole page cache instead
+(needs root).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from augment_store import (
+    add_version,
+    augment_path,
+    create_space,
+    iter_metadata_files,
+    load_file_versions,
+    load_version_metadata,
+    parse_timestamp,
+)
+from path_hash import lookup_hash_dir
+
+DEFAULT_CONCURRENCY = 32
+
+
+def _list_metadata(metadata_root, file_path):
+    directory = lookup_hash_dir(metadata_root, file_path)
+    if directory is None:
+        return file_path, []
+    return file_path, [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+
+
+def _read(file_path, metadata_path):
+    try:
+        return file_path, load_version_metadata(metadata_path)
+    except (OSError, ValueError):
+        return file_path, None
+
+
+def load_versions_bulk(space_path, file_paths, concurrency=DEFAULT_CONCURRENCY, executor=None):
+    """Load the versions of many files concurrently; returns {file path: [versions newest first]}."""
+    metadata_root = augment_path(space_path, "file_metadata")
+    file_paths = list(dict.fromkeys(file_paths))
+    results = {path: [] for path in file_paths}
+
+    owns_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        listings = executor.map(lambda path: _list_metadata(metadata_root, path), file_paths)
+        reads = [executor.submit(_read, path, metadata_path) for path, names in listings for metadata_path in names]
+        for future in reads:
+            path, version = future.result()
+            if version is not None:
+                results[path].append(version)
+    finally:
+        if owns_executor:
+            executor.shutdown()
+
+    for versions in results.values():
+        versions.sort(key=lambda x: parse_timestamp(x.get("timestamp")), reverse=True)
+    return results
+
+
+async def load_versions_async(space_path, file_paths, concurrency=DEFAULT_CONCURRENCY):
+    """asyncio wrapper around load_versions_bulk that keeps the event loop free."""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return await loop.run_in_executor(
+            None, lambda: load_versions_bulk(space_path, file_paths, concurrency, executor)
+        )
+
+
+def _evict(space_path, drop_caches):
+    """Push the space's metadata out of the page cache before a cold run."""
+    if drop_caches:
+        subprocess.run(["sync"], check=False)
+        if sys.platform == "darwin":
+            subprocess.run(["purge"], check=False)
+        else:
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+        return True
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for root, _, files in os.walk(augment_path(space_path, "file_metadata")):
+        for name in files:
+            fd = os.open(os.path.join(root, name), os.O_RDONLY)
+            try:
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def _time(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def benchmark(space_path=None, files=200, versions=20, concurrency=DEFAULT_CONCURRENCY, drop_caches=False):
+    """Time the serial and bulk loaders on warm and cold cache; returns a result dict."""
+    temp_dir = None
+    if space_path is None:
+        temp_dir = tempfile.mkdtemp(prefix="augment_bulk_bench_")
+        space_path = os.path.join(temp_dir, "BenchSpace")
+        create_space(space_path)
+        file_paths = [os.path.join(space_path, f"file{i}.txt") for i in range(files)]
+        for path in file_paths:
+            for n in range(versions):
+                add_version(space_path, path, f"{path} version {n}", timestamp=1_700_000_000 + n)
+    else:
+        file_paths = sorted({v["filePath"] for v in _iter_all_versions(space_path)})
+
+    try:
+        serial = lambda: [load_file_versions(space_path, path) for path in file_paths]
+        bulk = lambda: load_versions_bulk(space_path, file_paths, concurrency)
+        results = {"space": space_path, "files": len(file_paths), "concurrency": concurrency}
+
+        serial(), bulk()
+        results["warm"] = {"serial_s": _time(serial), "bulk_s": _time(bulk)}
+
+        cold = {}
+        if _evict(space_path, drop_caches):
+            cold["serial_s"] = _time(serial)
+            _evict(space_path, drop_caches)
+            cold["bulk_s"] = _time(bulk)
+            results["cold"] = cold
+        else:
+            results["cold"] = "unsupported on this platform without --drop-caches"
+
+        for key in ("warm", "cold"):
+            if isinstance(results[key], dict):
+                results[key]["speedup"] = results[key]["serial_s"] / max(results[key]["bulk_s"], 1e-9)
+        return results
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+def _iter_all_versions(space_path):
+    for _, _, metadata_path in iter_metadata_files(space_path):
+        try:
+            yield load_version_metadata(metadata_path)
+        except (OSError, ValueError):
+            continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk version metadata loader.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    load = subparsers.add_parser("load", help="load the history of many files")
+    load.add_argument("space", help="path to the Augment space")
+    load.add_argument("files", nargs="+", help="absolute file paths")
+    load.add_argument("-j", "--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    bench = subparsers.add_parser("benchmark", help="compare serial and bulk loading")
+    bench.add_argument("--space", help="existing space to benchmark (default: a synthetic one)")
+    bench.add_argument("--files", type=int, default=200)
+    bench.add_argument("--versions", type=int, default=20)
+    bench.add_argument("-j", "--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    bench.add_argument("--drop-caches", action="store_true", help="drop the whole page cache for cold runs (root)")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        print(json.dumps(benchmark(args.space, args.files, args.versions, args.concurrency, args.drop_caches), indent=2))
+        return
+
+    for path, versions in load_versions_bulk(args.space, args.files, args.concurrency).items():
+        print(f"📊 {os.path.basename(path)}: {len(versions)} versions")
+        for version in versions:
+            print(f"   {version['timestamp']}  {version['id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Delta-compressed version chains.
+
+An optional storage mode for text histories: each path hash keeps periodic full
+keyframes, and the versions in between are stored as line deltas against the
+previous version in file_versions/<path hash>/<version id>.delta. Binary versions
+(a NUL byte near the start) always stay full copies. A delta record
+carries two extra metadata keys, `deltaBase` (the id of the version it applies to)
+and `chainDepth` (deltas between it and its keyframe). Chains never exceed
+`max_chain`, so reconstructing any version reads one keyframe plus at most
+`max_chain` deltas.
+
+The app reads storagePath as full content, so it will refuse delta records on its
+integrity check; run `unpack` before handing a space back to a build without
+delta support.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from difflib import SequenceMatcher
+
+from augment_store import (
+    add_version,
+    augment_path,
+    calculate_file_path_hash,
+    create_space,
+    format_timestamp,
+    hash_dir,
+    iter_metadata_dirs,
+    load_version_metadata,
+    parse_timestamp,
+    to_fs_path,
+    write_json_atomic,
+)
+from blob_store import is_object_path, reference_counts
+from path_hash import find_hash_dir, lookup_hash_dir
+
+DEFAULT_MAX_CHAIN = 16
+DELTA_MAGIC = b"ADL1"
+BINARY_SNIFF_BYTES = 8192
+
+
+def varint(value):
+    """Encode a non-negative integer as a LEB128 varint."""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def read_varint(data, pos):
+    """Decode the varint at data[pos]; returns (value, position after it)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_delta(base, target):
+    """Encode target as line copies from base plus inserted lines, zlib-compressed."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+
+    out = bytearray()
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            out += b"C" + varint(i1) + varint(i2 - i1)
+        elif j2 > j1:
+            inserted = b"".join(target_lines[j1:j2])
+            out += b"I" + varint(len(inserted)) + inserted
+    return DELTA_MAGIC + zlib.compress(bytes(out))
+
+
+def apply_delta(base, delta):
+    """Rebuild the target bytes from base and a delta produced by encode_delta."""
+    if not delta.startswith(DELTA_MAGIC):
+        raise ValueError("not a delta")
+    ops = zlib.decompress(delta[len(DELTA_MAGIC):])
+    base_lines = base.splitlines(keepends=True)
+    out = []
+    pos = 0
+    while pos < len(ops):
+        op = ops[pos:pos + 1]
+        pos += 1
+        if op == b"C":
+            start, pos = read_varint(ops, pos)
+            count, pos = read_varint(ops, pos)
+            out.extend(base_lines[start:start + count])
+        elif op == b"I":
+            length, pos = read_varint(ops, pos)
+            out.append(ops[pos:pos + length])
+            pos += length
+        else:
+            raise ValueError(f"bad delta op {op!r}")
+    return b"".join(out)
+
+
+def is_text(content):
+    """Return True if content looks like text, i.e. has no NUL byte near the start."""
+    return b"\0" not in content[:BINARY_SNIFF_BYTES]
+
+
+def is_delta(version):
+    """Return True if a metadata record is stored as a delta."""
+    return bool(version.get("deltaBase"))
+
+
+def _read_blob(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _metadata_path(space_path, file_hash, version_id):
+    return os.path.join(hash_dir(space_path, "file_metadata", file_hash), f"{version_id}.json")
+
+
+def read_version(space_path, version, cache=None):
+    """Return the full content of a version record, following its delta chain."""
+    metadata_dir = lookup_hash_dir(augment_path(space_path, "file_metadata"), to_fs_path(version["filePath"]))
+    chain = []
+    current = version
+    while is_delta(current):
+        cached = cache.get(current["id"]) if cache is not None else None
+        if cached is not None:
+            break
+        chain.append(current)
+        current = load_version_metadata(os.path.join(metadata_dir, f"{current['deltaBase']}.json"))
+    else:
+        cached = None
+
+    content = cached if cached is not None else _read_blob(to_fs_path(current["storagePath"]))
+    for record in reversed(chain):
+        content = apply_delta(content, _read_blob(to_fs_path(record["storagePath"])))
+        if cache is not None:
+            cache[record["id"]] = content
+    return content
+
+
+def _load_history(space_path, file_hash):
+    metadata_dir = hash_dir(space_path, "file_metadata", file_hash)
+    versions = []
+    for name in os.listdir(metadata_dir):
+        if name.endswith(".json"):
+            versions.append(load_version_metadata(os.path.join(metadata_dir, name)))
+    versions.sort(key=lambda v: parse_timestamp(v.get("timestamp")))
+    return versions
+
+
+def _remove_old_blob(space_path, path):
+    if path and not is_object_path(space_path, path) and os.path.exists(path):
+        os.remove(path)
+
+
+def _release_object(path, counts):
+    content_hash = os.path.basename(path)
+    counts[content_hash] = counts.get(content_hash, 1) - 1
+    if counts[content_hash] > 0:
+        return False
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def pack_file(space_path, file_hash, max_chain=DEFAULT_MAX_CHAIN, counts=None):
+    """Convert one path hash's full copies of text into a keyframe/delta chain, oldest first.
+
+    A version whose blob cannot be read is skipped and counted as missing. A shared
+    object that no record refers to once its version is a delta is removed; pass the
+    `reference_counts` of the space when packing many files so it is only scanned once.
+    """
+    stats = {
+        "versions": 0,
+        "deltas": 0,
+        "keyframes": 0,
+        "binary": 0,
+        "missing": 0,
+        "objects_released": 0,
+        "logical_bytes": 0,
+        "stored_bytes": 0,
+    }
+    previous = None
+    depth = 0
+    cache = {}
+    for version in _load_history(space_path, file_hash):
+        stats["versions"] += 1
+        old_path = to_fs_path(version["storagePath"])
+        try:
+            content = read_version(space_path, version, cache)
+            old_size = os.path.getsize(old_path)
+        except (OSError, ValueError, zlib.error):
+            # Leave it for store_verify; the next version starts a new keyframe.
+            stats["missing"] += 1
+            previous, cache = None, {}
+            continue
+        cache = {version["id"]: content}
+        stats["logical_bytes"] += len(content)
+
+        if is_delta(version):
+            # Already packed by an earlier, interrupted run.
+            previous, depth = version, version.get("chainDepth", 1)
+            previous_content = content
+            stats["deltas"] += 1
+            stats["stored_bytes"] += old_size
+            continue
+
+        text = is_text(content)
+        if not text:
+            stats["binary"] += 1
+        delta = None
+        if text and previous is not None and depth < max_chain:
+            delta = encode_delta(previous_content, content)
+            if len(delta) >= len(content):
+                delta = None
+
+        if delta is None:
+            depth = 0
+            stats["keyframes"] += 1
+            stats["stored_bytes"] += old_size
+        else:
+            depth += 1
+            delta_path = os.path.join(hash_dir(space_path, "file_versions", file_hash, create=True), f"{version['id']}.delta")
+            with open(delta_path, "wb") as f:
+                f.write(delta)
+            shared = is_object_path(space_path, old_path)
+            if shared and counts is None:
+                # Counted before the rewrite, so this record still holds its reference.
+                counts = reference_counts(space_path)
+            version.update(storagePath=delta_path, deltaBase=previous["id"], chainDepth=depth)
+            write_json_atomic(_metadata_path(space_path, file_hash, version["id"]), version)
+            if shared:
+                stats["objects_released"] += _release_object(old_path, counts)
+            else:
+                _remove_old_blob(space_path, old_path)
+            stats["deltas"] += 1
+            stats["stored_bytes"] += len(delta)
+
+        # A binary version is never a delta base either.
+        previous, previous_content = (version, content) if text else (None, None)
+    return stats
+
+
+def unpack_file(space_path, file_hash):
+    """Rewrite every delta record of a path hash back to a full .data copy."""
+    cache = {}
+    restored = 0
+    for version in _load_history(space_path, file_hash):
+        content = read_version(space_path, version, cache)
+        cache = {version["id"]: content}
+        if not is_delta(version):
+            continue
+        delta_path = to_fs_path(version["storagePath"])
+        data_path = os.path.join(hash_dir(space_path, "file_versions", file_hash), f"{version['id']}.data")
+        with open(data_path, "wb") as f:
+            f.write(content)
+        version["storagePath"] = data_path
+        version.pop("deltaBase", None)
+        version.pop("chainDepth", None)
+        write_json_atomic(_metadata_path(space_path, file_hash, version["id"]), version)
+        os.remove(delta_path)
+        restored += 1
+    return restored
+
+
+def add_delta_version(space_path, file_path, content, timestamp=None, comment=None, max_chain=DEFAULT_MAX_CHAIN):
+    """Add a version in delta mode: a delta against the newest version, or a keyframe."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    file_hash = calculate_file_path_hash(file_path)
+    history = []
+    if find_hash_dir(augment_path(space_path, "file_metadata"), file_hash):
+        history = _load_history(space_path, file_hash)
+
+    version = add_version(space_path, file_path, content, timestamp, comment)
+    if not history or history[-1].get("chainDepth", 0) >= max_chain or not is_text(content):
+        return version
+
+    previous = history[-1]
+    delta = encode_delta(read_version(space_path, previous), content)
+    if len(delta) >= len(content):
+        return version
+
+    delta_path = os.path.join(os.path.dirname(version["storagePath"]), f"{version['id']}.delta")
+    with open(delta_path, "wb") as f:
+        f.write(delta)
+    full_path = version["storagePath"]
+    version.update(storagePath=delta_path, deltaBase=previous["id"], chainDepth=previous.get("chainDepth", 0) + 1)
+    write_json_atomic(_metadata_path(space_path, file_hash, version["id"]), version)
+    os.remove(full_path)
+    return version
+
+
+def _disk_usage(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _synthetic_history(versions, lines):
+    text = [f"Line {i}: the quick brown fox jumps over the lazy dog\n" for i in range(lines)]
+    for n in range(versions):
+        text[(n * 7) % lines] = f"Line {(n * 7) % lines}: edited in version {n}\n"
+        if n % 5 == 0:
+            text.insert(n % lines, f"Inserted paragraph {n}\n")
+        yield "".join(text)
+
+
+def benchmark(versions=200, lines=500, max_chain=DEFAULT_MAX_CHAIN):
+    """Compare bytes on disk and restore latency of full copies vs delta chains."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_delta_bench_")
+    try:
+        results = {"versions": versions, "lines": lines, "max_chain": max_chain}
+        for mode in ("full", "delta"):
+            space = os.path.join(temp_dir, mode)
+            create_space(space)
+            file_path = os.path.join(space, "notes.md")
+            for n, content in enumerate(_synthetic_history(versions, lines)):
+                if mode == "full":
+                    add_version(space, file_path, content, timestamp=1_700_000_000 + n)
+                else:
+                    add_delta_version(space, file_path, content, timestamp=1_700_000_000 + n, max_chain=max_chain)
+
+            history = _load_history(space, calculate_file_path_hash(file_path))
+            latencies = []
+            for version in history:
+                started = time.perf_counter()
+                read_version(space, version)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            results[mode] = {
+                "bytes_on_disk": _disk_usage(augment_path(space, "file_versions")),
+                "restore_mean_ms": 1000 * sum(latencies) / len(latencies),
+                "restore_p99_ms": 1000 * latencies[int(len(latencies) * 0.99) - 1],
+                "restore_max_ms": 1000 * latencies[-1],
+            }
+        results["compression_ratio"] = results["full"]["bytes_on_disk"] / max(1, results["delta"]["bytes_on_disk"])
+        return results
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta-compressed version chains.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("pack", "convert full copies to delta chains"), ("unpack", "convert delta chains back to full copies")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("space", help="path to the Augment space")
+        sub.add_argument("--max-chain", type=int, default=DEFAULT_MAX_CHAIN, help="maximum deltas per keyframe")
+    bench = subparsers.add_parser("benchmark", help="compare full-copy and delta layouts")
+    bench.add_argument("--versions", type=int, default=200)
+    bench.add_argument("--lines", type=int, default=500)
+    bench.add_argument("--max-chain", type=int, default=DEFAULT_MAX_CHAIN)
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        print(json.dumps(benchmark(args.versions, args.lines, args.max_chain), indent=2))
+        return
+
+    totals = {}
+    counts = reference_counts(args.space) if args.command == "pack" else None
+    for file_hash in sorted(name for name, _ in iter_metadata_dirs(args.space)):
+        if args.command == "pack":
+            for key, value in pack_file(args.space, file_hash, args.max_chain, counts).items():
+                totals[key] = totals.get(key, 0) + value
+        else:
+            totals["restored"] = totals.get("restored", 0) + unpack_file(args.space, file_hash)
+    print(f"✅ {args.command} finished at {format_timestamp(time.time())}: {totals}")
+
+
+if __name__ == "__main__":
+    main()
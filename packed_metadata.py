@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Compact binary metadata segments.
+
+An alternative to one pretty-printed JSON file per version: all versions of a path
+hash are packed into .augment/packed_metadata/<path hash>.seg, sorted oldest first.
+
+    header   magic "AUGSEG01", record count, string count, string offsets position
+    records  fixed 88-byte records (see RECORD)
+    offsets  one u64 per string, pointing into the string data
+    strings  u32 length + UTF-8 bytes, each distinct value stored once
+
+A record holds the raw 16-byte UUID, the timestamp as epoch microseconds, the size,
+the raw 32-byte SHA-256 content hash, and string-table indexes for filePath,
+comment and storagePath (split into directory and name so the directory is shared).
+Segments are read through mmap with struct.unpack_from, so loading the newest N
+versions touches N records and the strings they use, nothing else.
+
+Anything that does not fit the packed fields exactly (non-UUID ids, timestamps in
+another format, non-SHA-256 hashes, extra keys such as deltaBase) is kept verbatim
+in a per-record JSON "extra" string, so JSON -> segment -> JSON is lossless.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import uuid
+from datetime import datetime, timedelta
+
+from augment_store import augment_path, hash_dir, iter_metadata_dirs, load_version_metadata, write_json_atomic
+
+PACKED_DIR = "packed_metadata"
+MAGIC = b"AUGSEG01"
+HEADER = struct.Struct("<8sIIQ")
+RECORD = struct.Struct("<16sqQ32siiiiiI")
+OFFSET = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+
+FLAG_LOWERCASE_ID = 1
+NO_STRING = -1
+
+FIELDS = ("id", "filePath", "timestamp", "size", "comment", "contentHash", "storagePath")
+EPOCH = datetime(1970, 1, 1)
+
+
+def segment_path(space_path, file_hash):
+    """Return the segment file for a path hash."""
+    return augment_path(space_path, PACKED_DIR, f"{file_hash}.seg")
+
+
+def _timestamp_to_micros(text):
+    moment = datetime.fromisoformat(text[:-1] if text.endswith("Z") else text)
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def _micros_to_timestamp(micros):
+    return (EPOCH + timedelta(microseconds=micros)).isoformat() + "Z"
+
+
+def _sort_key(version):
+    try:
+        return _timestamp_to_micros(version.get("timestamp"))
+    except (ValueError, TypeError, AttributeError):
+        return 0
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, value):
+        if value is None:
+            return NO_STRING
+        if value not in self.index:
+            self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return self.index[value]
+
+
+def _pack_id(raw_id, extra):
+    try:
+        parsed = uuid.UUID(raw_id)
+    except (ValueError, TypeError, AttributeError):
+        extra["id"] = raw_id
+        return bytes(16), 0
+    if str(parsed).upper() == raw_id:
+        return parsed.bytes, 0
+    if str(parsed) == raw_id:
+        return parsed.bytes, FLAG_LOWERCASE_ID
+    extra["id"] = raw_id
+    return parsed.bytes, 0
+
+
+def _pack_timestamp(raw_timestamp, extra):
+    try:
+        micros = _timestamp_to_micros(raw_timestamp)
+    except (ValueError, TypeError, AttributeError):
+        extra["timestamp"] = raw_timestamp
+        return 0
+    if _micros_to_timestamp(micros) != raw_timestamp:
+        extra["timestamp"] = raw_timestamp
+    return micros
+
+
+def _pack_hash(raw_hash, extra):
+    try:
+        packed = bytes.fromhex(raw_hash)
+    except (ValueError, TypeError):
+        packed = b""
+    if len(packed) == 32 and packed.hex() == raw_hash:
+        return packed
+    extra["contentHash"] = raw_hash
+    return bytes(32)
+
+
+def _pack_string(version, key, extra):
+    value = version.get(key)
+    if value is None or isinstance(value, str):
+        return value
+    extra[key] = value
+    return None
+
+
+def _encode_record(version, strings):
+    extra = {key: value for key, value in version.items() if key not in FIELDS}
+    missing = [key for key in FIELDS if key not in version]
+    if missing:
+        extra["__missing__"] = missing
+
+    packed_id, flags = _pack_id(version.get("id"), extra)
+    micros = _pack_timestamp(version.get("timestamp"), extra)
+    packed_hash = _pack_hash(version.get("contentHash"), extra)
+
+    size = version.get("size")
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+        extra["size"] = size
+        size = 0
+
+    storage_path = _pack_string(version, "storagePath", extra)
+    if storage_path is None:
+        storage_dir = storage_name = NO_STRING
+    else:
+        head, sep, tail = storage_path.rpartition("/")
+        storage_dir = strings.add(head + sep)
+        storage_name = strings.add(tail)
+
+    return RECORD.pack(
+        packed_id,
+        micros,
+        size,
+        packed_hash,
+        strings.add(_pack_string(version, "filePath", extra)),
+        strings.add(_pack_string(version, "comment", extra)),
+        storage_dir,
+        storage_name,
+        strings.add(json.dumps(extra, sort_keys=True)) if extra else NO_STRING,
+        flags,
+    )
+
+
+def encode_segment(versions):
+    """Pack version records (in any order) into segment bytes, oldest first."""
+    strings = _StringTable()
+    records = [_encode_record(version, strings) for version in sorted(versions, key=_sort_key)]
+
+    offsets_at = HEADER.size + RECORD.size * len(records)
+    data_at = offsets_at + OFFSET.size * len(strings.strings)
+    offsets = bytearray()
+    data = bytearray()
+    for value in strings.strings:
+        encoded = value.encode("utf-8")
+        offsets += OFFSET.pack(data_at + len(data))
+        data += LENGTH.pack(len(encoded)) + encoded
+
+    header = HEADER.pack(MAGIC, len(records), len(strings.strings), offsets_at)
+    return header + b"".join(records) + bytes(offsets) + bytes(data)
+
+
+class Segment:
+    """Read-only, memory-mapped view of one segment file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.string_count, self.offsets_at = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a metadata segment")
+        self._strings = {}
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def string(self, index):
+        if index == NO_STRING:
+            return None
+        value = self._strings.get(index)
+        if value is None:
+            (position,) = OFFSET.unpack_from(self.buffer, self.offsets_at + OFFSET.size * index)
+            (length,) = LENGTH.unpack_from(self.buffer, position)
+            start = position + LENGTH.size
+            value = str(self.buffer[start:start + length], "utf-8")
+            self._strings[index] = value
+        return value
+
+    def timestamp_micros(self, position):
+        """Epoch microseconds of the record at position, without decoding anything else."""
+        return struct.unpack_from("<q", self.buffer, HEADER.size + RECORD.size * position + 16)[0]
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        (packed_id, micros, size, packed_hash, file_path, comment,
+         storage_dir, storage_name, extra_index, flags) = RECORD.unpack_from(
+            self.buffer, HEADER.size + RECORD.size * position)
+
+        version_id = str(uuid.UUID(bytes=packed_id))
+        storage_path = None
+        if storage_name != NO_STRING:
+            storage_path = self.string(storage_dir) + self.string(storage_name)
+        version = {
+            "id": version_id if flags & FLAG_LOWERCASE_ID else version_id.upper(),
+            "filePath": self.string(file_path),
+            "timestamp": _micros_to_timestamp(micros),
+            "size": size,
+            "comment": self.string(comment),
+            "contentHash": packed_hash.hex(),
+            "storagePath": storage_path,
+        }
+        if extra_index != NO_STRING:
+            extra = json.loads(self.string(extra_index))
+            missing = extra.pop("__missing__", [])
+            version.update(extra)
+            for key in missing:
+                version.pop(key, None)
+        return version
+
+    def newest(self, limit=None):
+        """Yield records newest first, decoding only as many as are consumed."""
+        stop = -1 if limit is None else max(self.count - limit, 0) - 1
+        for position in range(self.count - 1, stop, -1):
+            yield self[position]
+
+
+def write_segment(path, versions):
+    """Write a segment file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(encode_segment(versions))
+    os.replace(temp_path, path)
+
+
+def read_segment(path):
+    """Return every record of a segment, oldest first."""
+    with Segment(path) as segment:
+        return [segment[i] for i in range(len(segment))]
+
+
+def pack_space(space_path):
+    """Pack every file_metadata/<hash>/ directory into its segment; returns counters.
+
+    The JSON records are authoritative: a segment is rewritten to hold exactly the
+    versions that still have a record, so versions deleted by gc or by hand do not
+    come back. Only a record that exists but cannot be parsed keeps its copy from
+    the existing segment. Segments of directories with no records left are removed.
+    The JSON records are left in place: the verifier, gc, restore and stats tools
+    only read JSON, so removing them would hide those versions from every tool.
+    """
+    stats = {"segments": 0, "records": 0, "json_bytes": 0, "segment_bytes": 0, "unreadable": 0, "dropped": 0}
+    packed = set()
+    for file_hash, entry in iter_metadata_dirs(space_path):
+        json_paths = [os.path.join(entry.path, name) for name in os.listdir(entry.path) if name.endswith(".json")]
+        if not json_paths:
+            continue
+        target = segment_path(space_path, file_hash)
+        previous = {}
+        if os.path.exists(target):
+            previous = {version["id"]: version for version in read_segment(target)}
+        versions = {}
+        for path in json_paths:
+            version_id = os.path.basename(path)[:-5]
+            try:
+                version = load_version_metadata(path)
+            except (OSError, ValueError):
+                stats["unreadable"] += 1
+                if version_id in previous:
+                    versions[version_id] = previous[version_id]
+                continue
+            versions[version.get("id", version_id)] = version
+            stats["json_bytes"] += os.path.getsize(path)
+        stats["dropped"] += len(previous.keys() - versions.keys())
+        write_segment(target, list(versions.values()))
+        packed.add(os.path.basename(target))
+
+        stats["segments"] += 1
+        stats["records"] += len(versions)
+        stats["segment_bytes"] += os.path.getsize(target)
+
+    packed_root = augment_path(space_path, PACKED_DIR)
+    if os.path.isdir(packed_root):
+        for name in os.listdir(packed_root):
+            if name.endswith(".seg") and name not in packed:
+                stats["dropped"] += len(read_segment(os.path.join(packed_root, name)))
+                os.remove(os.path.join(packed_root, name))
+    return stats
+
+
+def unpack_space(space_path, remove_segments=False):
+    """Write every segment back out as file_metadata/<hash>/<id>.json; returns the record count."""
+    packed_root = augment_path(space_path, PACKED_DIR)
+    if not os.path.isdir(packed_root):
+        return 0
+    written = 0
+    for name in os.listdir(packed_root):
+        if not name.endswith(".seg"):
+            continue
+        metadata_dir = hash_dir(space_path, "file_metadata", name[:-4], create=True)
+        for version in read_segment(os.path.join(packed_root, name)):
+            write_json_atomic(os.path.join(metadata_dir, f"{version['id']}.json"), version)
+            written += 1
+        if remove_segments:
+            os.remove(os.path.join(packed_root, name))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between JSON metadata and packed segments.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack = subparsers.add_parser("pack", help="JSON -> segments")
+    pack.add_argument("space", help="path to the Augment space")
+    unpack = subparsers.add_parser("unpack", help="segments -> JSON")
+    unpack.add_argument("space", help="path to the Augment space")
+    unpack.add_argument("--remove-segments", action="store_true", help="delete the segments afterwards")
+    dump = subparsers.add_parser("dump", help="print a segment as JSON lines, newest first")
+    dump.add_argument("segment", help="path to a .seg file")
+    dump.add_argument("-n", "--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        stats = pack_space(args.space)
+        print(f"📦 Packed {stats['records']} records into {stats['segments']} segments")
+        if stats["unreadable"]:
+            print(f"⚠️  Skipped {stats['unreadable']} unreadable records")
+        print(f"   JSON: {stats['json_bytes']} bytes -> segments: {stats['segment_bytes']} bytes")
+    elif args.command == "unpack":
+        print(f"📂 Wrote {unpack_space(args.space, args.remove_segments)} JSON records")
+    else:
+        with Segment(args.segment) as segment:
+            for version in segment.newest(args.limit):
+                print(json.dumps(version))
+
+
+if __name__ == "__main__":
+    main()
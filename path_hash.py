@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+The one definition of the per-file directory name used under file_metadata/ and
+file_versions/.
+
+The app names these directories with the full 64-character SHA-256 hex digest of
+the file path (VersionControl.calculateFilePathHash). Older test scripts truncated
+it to 16 characters, so stores created by them use the short name; the resolvers
+here accept both.
+
+Very large spaces can use a two-level fan-out instead of one flat directory:
+<root>/ab/cd/abcd...; see shard_path. Every resolver looks in both layouts.
+
+Lookups for real reads go through lookup_hash_dir, which answers from one cached
+listing per root and only lists the root again when it (or the name's shard
+directory) has changed.
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from functools import lru_cache
+
+PATH_HASH_LENGTH = 64
+LEGACY_PATH_HASH_LENGTH = 16
+CACHE_SIZE = 65536
+SHARD_WIDTH = 2
+SHARD_LEVELS = 2
+# A directory modified this close to its listing may have changed within the same mtime tick.
+RACY_WINDOW_NS = 2_000_000_000
+_HEX = set("0123456789abcdef")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def calculate_file_path_hash(file_path):
+    """Hash a file path the way VersionControl.calculateFilePathHash does."""
+    return hashlib.sha256(file_path.encode("utf-8")).hexdigest()
+
+
+def legacy_path_hash(file_path):
+    """The truncated hash older tooling used as the directory name."""
+    return calculate_file_path_hash(file_path)[:LEGACY_PATH_HASH_LENGTH]
+
+
+def candidate_names(file_path):
+    """Directory names a file's history may live under, canonical name first."""
+    full = calculate_file_path_hash(file_path)
+    return full, full[:LEGACY_PATH_HASH_LENGTH]
+
+
+def path_hashes(paths):
+    """Hash many paths at once, hashing each distinct path only once."""
+    return {path: calculate_file_path_hash(path) for path in dict.fromkeys(paths)}
+
+
+def shard_path(root, name):
+    """Return the sharded location of a per-file directory: <root>/ab/cd/<name>."""
+    parts = [name[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return os.path.join(root, *parts, name)
+
+
+def is_shard_name(name):
+    """Return True for a fan-out directory name (as opposed to a path hash)."""
+    return len(name) == SHARD_WIDTH and set(name) <= _HEX
+
+
+def find_hash_dir(root, name):
+    """Return the existing directory for a path hash under root, flat or sharded, or None."""
+    for candidate in (os.path.join(root, name), shard_path(root, name)):
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+def iter_hash_dirs(root):
+    """Yield (name, DirEntry) for every per-file directory under root, in either layout."""
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if not is_shard_name(entry.name):
+                    yield entry.name, entry
+                    continue
+                yield from _iter_shard(entry.path, SHARD_LEVELS - 1)
+    except FileNotFoundError:
+        return
+
+
+def _iter_shard(path, levels):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if levels:
+                yield from _iter_shard(entry.path, levels - 1)
+            else:
+                yield entry.name, entry
+
+
+def resolve_hash_dir(root, file_path):
+    """Return the existing per-file directory under root for file_path, or None."""
+    for name in candidate_names(file_path):
+        candidate = find_hash_dir(root, name)
+        if candidate:
+            return candidate
+    return None
+
+
+class PathHashDirectory:
+    """The per-file directory names under one root, listed with a single scandir pass.
+
+    Lookups are set membership tests instead of one failed stat per candidate name.
+    Call refresh() (or use stale()) after directories are added or removed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.refresh()
+
+    def refresh(self):
+        # Built aside and swapped in, so concurrent lookups never see a half-filled listing.
+        names = {}
+        shard_mtimes = {}
+        listed_ns = time.time_ns()
+        try:
+            mtime_ns = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        else:
+            for name, entry in iter_hash_dirs(self.root):
+                names[name] = entry.path
+                parent = os.path.dirname(entry.path)
+                if parent != self.root and parent not in shard_mtimes:
+                    shard_mtimes[parent] = os.stat(parent).st_mtime_ns
+        self.names, self.shard_mtimes, self.mtime_ns, self.listed_ns = names, shard_mtimes, mtime_ns, listed_ns
+
+    def stale(self):
+        """Return True if the root (or a shard directory) changed since it was listed."""
+        try:
+            if os.stat(self.root).st_mtime_ns != self.mtime_ns:
+                return True
+        except FileNotFoundError:
+            return self.mtime_ns is not None
+        for path, mtime_ns in self.shard_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def resolve_name(self, file_path):
+        """Return the directory name holding file_path's history, or None."""
+        for name in candidate_names(file_path):
+            if name in self.names:
+                return name
+        return None
+
+    def resolve(self, file_path):
+        """Return the full directory path holding file_path's history, or None."""
+        name = self.resolve_name(file_path)
+        return self.names[name] if name else None
+
+    def resolve_many(self, paths):
+        """Map each path to its directory (or None)."""
+        return {path: self.resolve(path) for path in dict.fromkeys(paths)}
+
+    def lookup(self, file_path):
+        """Like resolve(), but lists the root again if the answer may be out of date.
+
+        A hit costs one isdir of the cached path and a miss one stat of the root and one
+        of the name's shard directory, instead of a failed isdir per candidate name.
+        """
+        path = self.resolve(file_path)
+        if path is not None:
+            if os.path.isdir(path):
+                return path
+        else:
+            state = self._check(file_path)
+            if state is None:
+                return None
+            if state == "racy":
+                return resolve_hash_dir(self.root, file_path)
+        self.refresh()
+        return self.resolve(file_path)
+
+    def _check(self, file_path):
+        """Return None if a miss for file_path is still current, else "changed" or "racy"."""
+        try:
+            root_mtime_ns = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            return "changed" if self.mtime_ns is not None else None
+        if root_mtime_ns != self.mtime_ns:
+            return "changed"
+        # The legacy name starts with the full one, so both shard into the same directory.
+        shard = os.path.dirname(shard_path(self.root, candidate_names(file_path)[0]))
+        try:
+            shard_mtime_ns = os.stat(shard).st_mtime_ns
+        except FileNotFoundError:
+            shard_mtime_ns = None
+        if shard_mtime_ns != self.shard_mtimes.get(shard):
+            return "changed"
+        if self.listed_ns - max(root_mtime_ns, shard_mtime_ns or 0) < RACY_WINDOW_NS:
+            return "racy"
+        return None
+
+
+_directories = {}
+
+
+def lookup_hash_dir(root, file_path):
+    """Return the existing per-file directory under root for file_path, or None, from a cached listing."""
+    directory = _directories.get(root)
+    if directory is None:
+        directory = _directories.setdefault(root, PathHashDirectory(root))
+    return directory.lookup(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the path hash for files.")
+    parser.add_argument("paths", nargs="+", help="absolute file paths")
+    parser.add_argument("--root", help="file_metadata/ directory to resolve against")
+    args = parser.parse_args()
+
+    directory = PathHashDirectory(args.root) if args.root else None
+    for path, file_hash in path_hashes(args.paths).items():
+        line = f"{file_hash}  {path}"
+        if directory:
+            line += f"  -> {directory.resolve_name(path) or 'not found'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
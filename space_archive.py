@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming export/import of a space's history as a single archive.
+
+    "AUGARC01"
+    chunk data      zlib-compressed (or raw, if that is smaller) chunks, each stored once
+    footer          zlib-compressed JSON index: chunks, files, directories, path hashes
+    trailer         footer offset (u64), footer length (u64), "AUGARCIX"
+
+Every file under .augment (file_metadata, file_versions, objects, metadata, versions,
+snapshots, packed_metadata) is split into fixed-size chunks that are hashed and
+compressed on a thread pool; identical chunks, and so identical files, are written
+once. Only a bounded number of chunks is in flight, so multi-GB histories stream
+through in constant memory. Derived files (the version and text indexes, scan
+state, unfinished GC plans) are left out; they rebuild themselves.
+
+Import reads the footer from the end of the archive and writes files in parallel
+with positional reads into a staging directory that is renamed to .augment at the
+end. If the space lives somewhere else than it did when exported, absolute paths in
+the JSON records and packed segments are rewritten and the per-file directories are
+renamed to the path hashes of the new location.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from augment_store import AUGMENT_DIR, augment_path, iter_metadata_dirs, load_version_metadata, to_fs_path
+from packed_metadata import PACKED_DIR, read_segment, write_segment
+from path_hash import SHARD_LEVELS, calculate_file_path_hash, is_shard_name, shard_path
+from store_verify import bounded_map
+
+MAGIC = b"AUGARC01"
+TRAILER = struct.Struct("<QQ8s")
+TRAILER_MAGIC = b"AUGARCIX"
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+COMPRESS_LEVEL = 6
+
+EXCLUDED_NAMES = {
+    "version_index.db", "version_index.db-journal",
+    "text_index.db", "text_index.db-journal",
+    "scan_state.json", "scan_journal.jsonl",
+    "verify_state.json", "verify_journal.jsonl",
+    "gc_plan.jsonl", "gc_plan.progress",
+}
+HASHED_DIRS = ("file_metadata", "file_versions")
+RECORD_DIRS = ("metadata", "file_metadata", "snapshots")
+
+
+def _excluded(name):
+    return name in EXCLUDED_NAMES or name.endswith(".tmp")
+
+
+def _walk(root):
+    """Yield (relative path, is_dir, stat) for everything under root, parents first."""
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        relative_dir = os.path.relpath(directory, root)
+        if relative_dir != ".":
+            yield relative_dir, True, os.stat(directory)
+        for name in sorted(filenames):
+            if not _excluded(name):
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, root), False, os.stat(path)
+
+
+def _read_chunk(root, item):
+    file_index, relative_path, chunk_index, offset, length = item
+    with open(os.path.join(root, relative_path), "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    digest = hashlib.sha256(data).hexdigest()
+    compressed = zlib.compress(data, COMPRESS_LEVEL)
+    if len(compressed) < len(data):
+        return file_index, chunk_index, digest, len(data), True, compressed
+    return file_index, chunk_index, digest, len(data), False, data
+
+
+def _path_hashes(space_path):
+    """Map each file_metadata/<hash> directory to its file's path relative to the space."""
+    hashes = {}
+    for file_hash, entry in iter_metadata_dirs(space_path):
+        with os.scandir(entry.path) as records:
+            for record in records:
+                if not record.name.endswith(".json"):
+                    continue
+                try:
+                    file_path = to_fs_path(load_version_metadata(record.path).get("filePath"))
+                except (OSError, ValueError):
+                    continue
+                if file_path and file_path.startswith(space_path.rstrip(os.sep) + os.sep):
+                    hashes[file_hash] = os.path.relpath(file_path, space_path)
+                break
+    return hashes
+
+
+def export_space(space_path, archive_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=None):
+    """Write the history of a space to archive_path; returns counters."""
+    space_path = os.path.abspath(space_path)
+    root = augment_path(space_path)
+    workers = workers or os.cpu_count() or 4
+    max_in_flight = max_in_flight or workers * 2
+
+    files = []
+    dirs = []
+    for relative_path, is_dir, st in _walk(root):
+        if is_dir:
+            dirs.append(relative_path)
+        else:
+            files.append({"path": relative_path, "size": st.st_size, "mode": st.st_mode & 0o7777,
+                          "mtime_ns": st.st_mtime_ns, "chunks": [None] * -(-st.st_size // chunk_size)})
+
+    def work():
+        for file_index, entry in enumerate(files):
+            for chunk_index in range(len(entry["chunks"])):
+                offset = chunk_index * chunk_size
+                yield file_index, entry["path"], chunk_index, offset, min(chunk_size, entry["size"] - offset)
+
+    stats = {"files": len(files), "dirs": len(dirs), "chunks": 0, "unique_chunks": 0,
+             "bytes_in": 0, "deduplicated_bytes": 0, "archive_bytes": 0}
+    chunks = []
+    chunk_ids = {}
+    temp_path = f"{archive_path}.tmp"
+    with open(temp_path, "wb") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        out.write(MAGIC)
+        position = len(MAGIC)
+        results = bounded_map(executor, lambda item: _read_chunk(root, item), work(), max_in_flight)
+        for file_index, chunk_index, digest, raw_length, compressed, data in results:
+            stats["chunks"] += 1
+            stats["bytes_in"] += raw_length
+            if digest in chunk_ids:
+                stats["deduplicated_bytes"] += raw_length
+            else:
+                chunk_ids[digest] = len(chunks)
+                chunks.append([position, len(data), raw_length, int(compressed), digest])
+                out.write(data)
+                position += len(data)
+            files[file_index]["chunks"][chunk_index] = chunk_ids[digest]
+
+        footer = zlib.compress(json.dumps({
+            "format": FORMAT_VERSION,
+            "source": space_path,
+            "created": time.time(),
+            "chunkSize": chunk_size,
+            "chunks": chunks,
+            "dirs": dirs,
+            "files": files,
+            "pathHashes": _path_hashes(space_path),
+        }, separators=(",", ":")).encode("utf-8"))
+        out.write(footer)
+        out.write(TRAILER.pack(position, len(footer), TRAILER_MAGIC))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temp_path, archive_path)
+
+    stats["unique_chunks"] = len(chunks)
+    stats["archive_bytes"] = os.path.getsize(archive_path)
+    return stats
+
+
+def read_index(archive_path):
+    """Return the footer index of an archive without reading any chunk data."""
+    with open(archive_path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{archive_path} is not a space archive")
+        f.seek(-TRAILER.size, os.SEEK_END)
+        footer_at, footer_length, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != TRAILER_MAGIC:
+            raise ValueError(f"{archive_path} has no index footer (truncated?)")
+        f.seek(footer_at)
+        index = json.loads(zlib.decompress(f.read(footer_length)))
+    if index.get("format") != FORMAT_VERSION:
+        raise ValueError(f"unsupported archive format {index.get('format')}")
+    return index
+
+
+class _Relocator:
+    """Rewrites paths from the exported space location to the imported one."""
+
+    def __init__(self, source, target, path_hashes):
+        self.source = source.rstrip(os.sep)
+        self.target = target.rstrip(os.sep)
+        self.hash_map = {
+            old: calculate_file_path_hash(os.path.join(self.target, relative))
+            for old, relative in path_hashes.items()
+        }
+
+    def relative(self, relative_path):
+        """Rename the <hash> component of a relative path under .augment."""
+        parts = relative_path.split(os.sep)
+        if len(parts) >= 2 and parts[0] in HASHED_DIRS and parts[1] in self.hash_map:
+            parts[1] = self.hash_map[parts[1]]
+        elif (len(parts) >= 2 + SHARD_LEVELS and parts[0] in HASHED_DIRS and is_shard_name(parts[1])
+              and parts[1 + SHARD_LEVELS] in self.hash_map):
+            # Sharded layout: the fan-out prefix has to follow the new hash.
+            new_hash = self.hash_map[parts[1 + SHARD_LEVELS]]
+            parts[1:2 + SHARD_LEVELS] = shard_path("", new_hash).split(os.sep)
+        elif len(parts) == 2 and parts[0] == PACKED_DIR and parts[1][:-4] in self.hash_map:
+            parts[1] = self.hash_map[parts[1][:-4]] + ".seg"
+        return os.sep.join(parts)
+
+    def value(self, value):
+        if isinstance(value, dict):
+            return {key: self.value(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if not isinstance(value, str):
+            return value
+        fs_path = to_fs_path(value)
+        if fs_path != self.source and not (fs_path or "").startswith(self.source + os.sep):
+            return value
+        relative = os.path.relpath(fs_path, self.source)
+        augment_prefix = AUGMENT_DIR + os.sep
+        if relative.startswith(augment_prefix):
+            relative = augment_prefix + self.relative(relative[len(augment_prefix):])
+        moved = os.path.normpath(os.path.join(self.target, relative))
+        return Path(moved).as_uri() if value.startswith("file://") else moved
+
+
+def _write_file(archive_fd, staging, entry, chunks, relocator):
+    relative_path = relocator.relative(entry["path"]) if relocator else entry["path"]
+    target = os.path.join(staging, relative_path)
+
+    def chunk_data(chunk_id):
+        offset, stored_length, raw_length, compressed, digest = chunks[chunk_id]
+        data = os.pread(archive_fd, stored_length, offset)
+        if compressed:
+            data = zlib.decompress(data)
+        if len(data) != raw_length or hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"corrupt chunk {chunk_id} in {entry['path']}")
+        return data
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Only store records carry paths; folder copies under versions/ are user data and stay byte for byte.
+    top = entry["path"].split(os.sep, 1)[0]
+    rewrite = relocator and (
+        (top in RECORD_DIRS and entry["path"].endswith(".json"))
+        or (top == PACKED_DIR and entry["path"].endswith(".seg"))
+    )
+    if rewrite and entry["path"].endswith(".json"):
+        raw = b"".join(chunk_data(chunk_id) for chunk_id in entry["chunks"])
+        try:
+            with open(target, "w") as f:
+                json.dump(relocator.value(json.loads(raw)), f, indent=2)
+        except ValueError:
+            with open(target, "wb") as f:
+                f.write(raw)
+    else:
+        with open(target, "wb") as f:
+            for chunk_id in entry["chunks"]:
+                f.write(chunk_data(chunk_id))
+        if rewrite:
+            write_segment(target, [relocator.value(version) for version in read_segment(target)])
+    os.chmod(target, entry["mode"])
+    os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    return entry["size"]
+
+
+def import_space(archive_path, space_path, workers=None, max_in_flight=None, force=False):
+    """Recreate the space history stored in archive_path under space_path; returns counters."""
+    space_path = os.path.abspath(space_path)
+    index = read_index(archive_path)
+    target = augment_path(space_path)
+    if os.path.exists(target) and not force:
+        raise FileExistsError(f"{target} already exists (use force=True to replace it)")
+
+    workers = workers or os.cpu_count() or 4
+    max_in_flight = max_in_flight or workers * 4
+    relocator = None
+    if index["source"].rstrip(os.sep) != space_path.rstrip(os.sep):
+        relocator = _Relocator(index["source"], space_path, index["pathHashes"])
+
+    staging = os.path.join(space_path, f"{AUGMENT_DIR}.importing")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for relative_dir in index["dirs"]:
+        os.makedirs(os.path.join(staging, relocator.relative(relative_dir) if relocator else relative_dir),
+                    exist_ok=True)
+
+    stats = {"files": 0, "bytes": 0, "relocated": relocator is not None}
+    fd = os.open(archive_path, os.O_RDONLY)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            write = lambda entry: _write_file(fd, staging, entry, index["chunks"], relocator)
+            for size in bounded_map(executor, write, index["files"], max_in_flight):
+                stats["files"] += 1
+                stats["bytes"] += size
+    finally:
+        os.close(fd)
+
+    if os.path.exists(target):
+        previous = f"{target}.replaced"
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(target, previous)
+        os.replace(staging, target)
+        shutil.rmtree(previous)
+    else:
+        os.replace(staging, target)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a space's history between machines.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="write a space's history to an archive")
+    export.add_argument("space", help="path to the Augment space")
+    export.add_argument("archive", help="archive file to write")
+    export.add_argument("-j", "--workers", type=int, default=None)
+    export.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    restore = subparsers.add_parser("import", help="recreate a space's history from an archive")
+    restore.add_argument("archive", help="archive file to read")
+    restore.add_argument("space", help="where the space lives on this machine")
+    restore.add_argument("-j", "--workers", type=int, default=None)
+    restore.add_argument("--force", action="store_true", help="replace an existing .augment directory")
+    listing = subparsers.add_parser("list", help="summarize an archive from its index")
+    listing.add_argument("archive", help="archive file to read")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "export":
+        stats = export_space(args.space, args.archive, args.workers, args.chunk_size)
+        print(f"📦 Exported {stats['files']} files ({stats['bytes_in'] / (1024 * 1024):.2f} MB) "
+              f"into {stats['archive_bytes'] / (1024 * 1024):.2f} MB, "
+              f"{stats['deduplicated_bytes'] / (1024 * 1024):.2f} MB deduplicated")
+    elif args.command == "import":
+        stats = import_space(args.archive, args.space, args.workers, force=args.force)
+        print(f"📂 Imported {stats['files']} files ({stats['bytes'] / (1024 * 1024):.2f} MB)"
+              f"{' and relocated paths' if stats['relocated'] else ''}")
+    else:
+        index = read_index(args.archive)
+        total = sum(entry["size"] for entry in index["files"])
+        print(f"📋 {args.archive}: exported from {index['source']} at "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(index['created']))}")
+        print(f"   {len(index['files'])} files, {len(index['chunks'])} unique chunks, {total / (1024 * 1024):.2f} MB")
+        return
+    print(f"⏱️  {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
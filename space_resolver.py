@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Cached space-root resolution.
+
+Same answer as VersionControl.findSpacePath (walk up from the file's directory to
+the first ancestor containing .augment, never checking "/" itself), but every
+directory visited on the way up is cached with the result, including "no space".
+Siblings and descendants of an already-resolved directory therefore cost no stat
+calls at all, and a bulk job over 100k files touches each directory once.
+"""
+
+import argparse
+import os
+import time
+
+from augment_store import AUGMENT_DIR
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+
+class SpaceResolver:
+    """Resolves files to their space root with a directory -> root cache."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.cache = {}
+        self.stat_calls = 0
+
+    def resolve_dir(self, directory):
+        """Return the space root containing directory, or None."""
+        chain = []
+        current = directory
+        result = None
+        while current != "/" and current != os.path.dirname(current):
+            if current in self.cache:
+                result = self.cache[current]
+                break
+            chain.append(current)
+            self.stat_calls += 1
+            if os.path.exists(os.path.join(current, AUGMENT_DIR)):
+                result = current
+                break
+            current = os.path.dirname(current)
+
+        if len(self.cache) + len(chain) > self.max_entries:
+            self.cache.clear()
+        for visited in chain:
+            self.cache[visited] = result
+        return result
+
+    def resolve(self, file_path):
+        """Return the space root for a file, or None."""
+        return self.resolve_dir(os.path.dirname(file_path))
+
+    def resolve_many(self, paths):
+        """Map each file path to its space root (or None)."""
+        return {path: self.resolve(path) for path in paths}
+
+    def invalidate(self, directory):
+        """Forget cached answers for directory and everything below it.
+
+        Call this with the parent directory whenever a .augment directory is
+        created or removed there.
+        """
+        directory = directory.rstrip(os.sep) or os.sep
+        prefix = directory + os.sep
+        for cached in [d for d in self.cache if d == directory or d.startswith(prefix)]:
+            del self.cache[cached]
+
+    def augment_dir_changed(self, augment_dir):
+        """Invalidate after a .augment directory at augment_dir was created or removed."""
+        self.invalidate(os.path.dirname(augment_dir.rstrip(os.sep)))
+
+    def clear(self):
+        self.cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve the space root for files.")
+    parser.add_argument("root", help="directory tree whose files to resolve")
+    args = parser.parse_args()
+
+    resolver = SpaceResolver()
+    paths = []
+    for directory, dirnames, filenames in os.walk(args.root):
+        dirnames[:] = [d for d in dirnames if d != AUGMENT_DIR]
+        paths.extend(os.path.join(directory, name) for name in filenames)
+
+    started = time.perf_counter()
+    results = resolver.resolve_many(paths)
+    elapsed = time.perf_counter() - started
+
+    spaces = {}
+    for root in results.values():
+        spaces[root] = spaces.get(root, 0) + 1
+    for root, count in sorted(spaces.items(), key=lambda item: str(item[0])):
+        print(f"{'✅' if root else '❌'} {root or 'no space'}: {count} files")
+    print(f"📊 {len(paths)} files resolved in {elapsed:.3f}s with {resolver.stat_calls} stat calls")
+
+
+if __name__ == "__main__":
+    main()
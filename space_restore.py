@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Point-in-time restore of a whole space.
+
+Resolves the newest version at or before T for every file in one pass (a single
+grouped query against the version index, or one stream over file_metadata/ with
+--scan), then materializes those versions into a staging directory next to the
+target on a thread pool and renames it into place. Replacing an existing target
+takes two renames (target to <target>.previous, then staging to target); a crash
+between them leaves the old tree at <target>.previous, and the next run puts it
+back before doing anything else.
+
+Index rows whose blob is gone (the record was rewritten since, e.g. by compact
+or gc) are re-read from their JSON record before the version is given up on.
+
+Blobs are copied without going through Python buffers: a reflink (FICLONE) where
+the filesystem supports it, otherwise copy_file_range, otherwise sendfile, with a
+plain copy as the last resort. Delta-encoded versions are rebuilt and written
+normally. Each restored file gets its version's timestamp as mtime.
+"""
+
+import argparse
+import fcntl
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from augment_store import augment_path, iter_metadata_dirs, load_version_metadata, parse_timestamp, to_fs_path
+from delta_store import is_delta, read_version
+from path_hash import lookup_hash_dir
+from store_verify import bounded_map
+from version_index import COLUMNS, VersionIndex, _row_to_version
+
+FICLONE = 0x40049409
+
+
+def _copy_range(src_fd, dst_fd, size, copy):
+    copied = 0
+    while copied < size:
+        step = copy(src_fd, dst_fd, copied, size - copied)
+        if step == 0:
+            break
+        copied += step
+    return copied
+
+
+def fast_copy(source, target):
+    """Copy source to target with the cheapest mechanism available; returns its name.
+
+    Any error from the kernel copy paths just means falling back to the next one
+    (macOS sendfile, for one, only writes to sockets); a real I/O problem shows up
+    again in the plain copy.
+    """
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                copy = lambda s, d, offset, count: os.copy_file_range(s, d, count, offset, offset)
+                if _copy_range(src.fileno(), dst.fileno(), size, copy) == size:
+                    return "copy_file_range"
+            except OSError:
+                pass
+            dst.truncate(0)
+        if hasattr(os, "sendfile"):
+            try:
+                copy = lambda s, d, offset, count: os.sendfile(d, s, offset, count)
+                dst.seek(0)
+                if _copy_range(src.fileno(), dst.fileno(), size, copy) == size:
+                    return "sendfile"
+            except OSError:
+                pass
+            dst.seek(0)
+            dst.truncate(0)
+        src.seek(0)
+        shutil.copyfileobj(src, dst)
+        return "copy"
+
+
+def versions_as_of_index(space_path, when):
+    """Return the newest version at or before `when` (epoch seconds) of every file, via the index."""
+    with VersionIndex(space_path) as index:
+        index.refresh()
+        # SQLite returns the bare columns of the row that holds MAX(epoch).
+        rows = index.db.execute(
+            f"SELECT MAX(epoch), {COLUMNS} FROM versions WHERE epoch <= ? GROUP BY path_hash", (when,)
+        ).fetchall()
+    return [_row_to_version(row[1:]) for row in rows]
+
+
+def versions_as_of_scan(space_path, when):
+    """Same as versions_as_of_index, streaming file_metadata/ instead."""
+    for _, dir_entry in iter_metadata_dirs(space_path):
+        best, best_epoch = None, None
+        with os.scandir(dir_entry.path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    version = load_version_metadata(entry.path)
+                except (OSError, ValueError):
+                    continue
+                epoch = parse_timestamp(version.get("timestamp"))
+                if epoch <= when and (best is None or epoch > best_epoch):
+                    best, best_epoch = version, epoch
+        if best is not None:
+            yield best
+
+
+def _restore_one(space_path, staging, version):
+    relative = os.path.relpath(to_fs_path(version["filePath"]), space_path)
+    if relative.startswith(os.pardir):
+        return "outside", 0
+    target = os.path.join(staging, relative)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write under a temp name so a failed read never leaves an empty file in the restored tree.
+    temp = f"{target}.restoring"
+    try:
+        storage_path = to_fs_path(version.get("storagePath")) or ""
+        if not is_delta(version) and (storage_path.endswith(".delta") or not os.path.exists(storage_path)):
+            # The index keeps no deltaBase, and its row may predate a rewrite of the record: re-read it.
+            metadata_dir = lookup_hash_dir(augment_path(space_path, "file_metadata"), to_fs_path(version["filePath"]))
+            version = load_version_metadata(os.path.join(metadata_dir, f"{version['id']}.json"))
+        if is_delta(version):
+            content = read_version(space_path, version)
+            with open(temp, "wb") as f:
+                f.write(content)
+            method = "delta"
+        else:
+            method = fast_copy(to_fs_path(version["storagePath"]), temp)
+        os.replace(temp, target)
+    except (OSError, ValueError, KeyError):
+        try:
+            os.remove(temp)
+        except FileNotFoundError:
+            pass
+        return "missing", 0
+    mtime = parse_timestamp(version.get("timestamp"))
+    os.utime(target, (mtime, mtime))
+    return method, os.path.getsize(target)
+
+
+def _recover_swap(target):
+    """Finish or undo a target swap that a crash interrupted."""
+    previous = f"{target}.previous"
+    if not os.path.exists(previous):
+        return
+    if os.path.exists(target):
+        shutil.rmtree(previous)  # The new tree made it into place.
+    else:
+        os.replace(previous, target)
+
+
+def restore_space(space_path, when, target, workers=None, use_index=True, replace=False):
+    """Restore every file of space_path as of `when` into target; returns counters.
+
+    `when` is epoch seconds or an ISO-8601 timestamp. Files with no version at or
+    before `when` are left out. An existing target is only swapped out with replace=True.
+    """
+    space_path = os.path.abspath(space_path)
+    target = os.path.abspath(target)
+    when = parse_timestamp(when)
+    _recover_swap(target)
+    if os.path.exists(target) and not replace:
+        raise FileExistsError(f"{target} already exists (use replace=True to swap it)")
+    workers = workers or (os.cpu_count() or 4) * 2
+
+    started = time.perf_counter()
+    versions = versions_as_of_index(space_path, when) if use_index else versions_as_of_scan(space_path, when)
+
+    staging = f"{target}.restoring-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    stats = {"files": 0, "bytes": 0, "methods": {}, "missing": 0, "outside": 0}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            restore = lambda version: _restore_one(space_path, staging, version)
+            for method, size in bounded_map(executor, restore, versions, workers * 4):
+                if method in ("missing", "outside"):
+                    stats[method] += 1
+                    continue
+                stats["files"] += 1
+                stats["bytes"] += size
+                stats["methods"][method] = stats["methods"].get(method, 0) + 1
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if os.path.exists(target):
+        previous = f"{target}.previous"
+        os.replace(target, previous)
+        os.replace(staging, target)
+        shutil.rmtree(previous)
+    else:
+        os.replace(staging, target)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore a whole space as it was at a point in time.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("target", help="directory to restore into")
+    parser.add_argument("--at", required=True, help="ISO-8601 timestamp (UTC unless it has an offset) or epoch seconds")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--scan", action="store_true", help="stream file_metadata/ instead of using the version index")
+    parser.add_argument("--replace", action="store_true", help="swap out an existing target")
+    args = parser.parse_args()
+
+    try:
+        when = float(args.at)
+    except ValueError:
+        when = args.at
+    stats = restore_space(args.space, when, args.target, args.workers, not args.scan, args.replace)
+    print(f"⏪ Restored {stats['files']} files ({stats['bytes'] / (1024 * 1024):.2f} MB) "
+          f"in {stats['seconds']:.3f}s {stats['methods']}")
+    if stats["missing"]:
+        print(f"⚠️  {stats['missing']} versions had no readable blob")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the store tools.
+
+Generates a synthetic space at each requested scale and times the operations that
+grow with the store: history loading (serial, bulk, and through the SQLite index),
+space-root resolution, full verification, and GC planning and execution. Results
+are emitted as one JSON document so runs can be diffed and tracked over time.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from augment_store import load_file_versions
+from bulk_loader import load_versions_bulk
+from space_resolver import SpaceResolver
+from store_gc import execute_plan, plan_gc, write_plan
+from store_verify import verify_space
+from synthetic_store import generate_space
+from version_index import VersionIndex
+
+SCALES = {
+    "tiny": {"files": 20, "versions_mean": 3.0},
+    "small": {"files": 200, "versions_mean": 5.0},
+    "medium": {"files": 2000, "versions_mean": 8.0},
+    "large": {"files": 20000, "versions_mean": 10.0},
+}
+
+
+def _timed(results, name, fn):
+    started = time.perf_counter()
+    value = fn()
+    results[name] = time.perf_counter() - started
+    return value
+
+
+def _load_via_index(space_path, files):
+    with VersionIndex(space_path) as index:
+        return [index.latest_versions(path) for path in files]
+
+
+def _gc(space_path):
+    stats = {}
+    write_plan(space_path, plan_gc(space_path, max_versions=3, stats=stats))
+    execute_plan(space_path)
+    return stats
+
+
+def bench_scale(name, params, work_dir):
+    """Generate one scale in work_dir and time every operation; returns a result dict."""
+    space_path = os.path.join(work_dir, name)
+    timings = {}
+    manifest = _timed(timings, "generate_s", lambda: generate_space(space_path, **params))
+    files = manifest.pop("files")
+
+    _timed(timings, "history_serial_s", lambda: [load_file_versions(space_path, path) for path in files])
+    _timed(timings, "history_bulk_s", lambda: load_versions_bulk(space_path, files))
+    _timed(timings, "history_index_cold_s", lambda: _load_via_index(space_path, files))
+    _timed(timings, "history_index_warm_s", lambda: _load_via_index(space_path, files))
+
+    resolver = SpaceResolver()
+    _timed(timings, "resolve_s", lambda: resolver.resolve_many(files))
+
+    reports = _timed(timings, "verify_s", lambda: list(verify_space(space_path)))
+    gc_plan_stats = {}
+    _timed(timings, "gc_plan_s", lambda: sum(1 for _ in plan_gc(space_path, max_versions=3, stats=gc_plan_stats)))
+    gc_stats = _timed(timings, "gc_plan_and_execute_s", lambda: _gc(space_path))
+
+    manifest.pop("space")
+    return {
+        "scale": name,
+        "store": {**manifest, "files": len(files)},
+        "timings": timings,
+        "counts": {
+            "resolve_stat_calls": resolver.stat_calls,
+            "verified": len(reports),
+            "verify_problems": sum(1 for r in reports if r["status"] != "ok"),
+            "gc_deleted": gc_stats["deleted"],
+            "gc_bytes_freed": gc_stats["bytes_freed"],
+        },
+    }
+
+
+def run(scales, overrides=None, work_dir=None, keep=False):
+    """Benchmark each named scale; returns the full JSON-serializable report."""
+    owns_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="augment_store_bench_")
+    report = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": [],
+    }
+    try:
+        for name in scales:
+            params = {**SCALES[name], **(overrides or {})}
+            report["results"].append(bench_scale(name, params, work_dir))
+    finally:
+        if owns_dir and not keep:
+            shutil.rmtree(work_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the store tools on synthetic spaces.")
+    parser.add_argument("--scales", default="tiny,small", help=f"comma-separated, from: {', '.join(SCALES)}")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a generator parameter for every scale (e.g. duplicate_ratio=0.3)")
+    parser.add_argument("--work-dir", help="where to build the spaces (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated spaces")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = json.loads(value)
+    report = run(args.scales.split(","), overrides, args.work_dir, args.keep)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Offline retention / garbage collection for a space's file versions.
+
+Applies the same policies as StorageManager (max age in days, max versions per
+file, max total size) to file_metadata/ and the blobs it points at:
+
+1. Planning streams the metadata one file directory at a time. Age is a simple
+   cutoff and the per-file count uses a bounded heap of the newest N versions, so
+   without max_size memory stays bounded by the largest history. The size budget
+   needs every surviving version in a min-heap (memory grows with the store) so
+   the oldest ones across all files can be dropped at the end without sorting.
+   Versions whose blob is a shared object are charged its full size. The newest
+   version of every file is kept unless keep_latest=False. Every deletion is
+   decided before any is planned (per file, or for the whole store when max_size
+   is set) and planned newest first, a delta before its base, so a delta is only
+   turned into a full copy when its base goes and it does not.
+2. The plan is written to .augment/gc_plan.jsonl and executed in batches. Every
+   operation is idempotent and .augment/gc_plan.progress is replaced atomically
+   after each batch, so an interrupted run resumes where it stopped.
+
+Shared content-addressed objects are removed only when every record that refers
+to them is deleted. A kept delta whose base is deleted is rewritten as a full copy
+first, so chains never dangle. A file's packed metadata segment is removed when
+any of its records is, so deleted versions never come back through it; run
+`packed_metadata pack` again afterwards.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import time
+
+from augment_store import (
+    augment_path,
+    iter_metadata_dirs,
+    load_version_metadata,
+    parse_timestamp,
+    to_fs_path,
+    write_json_atomic,
+)
+from blob_store import is_object_path
+from delta_store import read_version
+from packed_metadata import segment_path
+
+PLAN_FILENAME = "gc_plan.jsonl"
+PROGRESS_FILENAME = "gc_plan.progress"
+DEFAULT_BATCH_SIZE = 500
+DAY = 24 * 3600
+
+
+def _record_bytes(version, storage_path, shared):
+    if shared:
+        return 0
+    if version.get("deltaBase"):
+        try:
+            return os.path.getsize(storage_path)
+        except OSError:
+            return 0
+    return version.get("size") or 0
+
+
+def _load_dir(space_path, file_hash, dir_path):
+    records = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                version = load_version_metadata(entry.path)
+            except (OSError, ValueError):
+                continue
+            storage_path = to_fs_path(version.get("storagePath")) or ""
+            shared = is_object_path(space_path, storage_path)
+            stored = _record_bytes(version, storage_path, shared)
+            records.append({
+                "pathHash": file_hash,
+                "id": version.get("id", entry.name[:-5]),
+                "epoch": parse_timestamp(version.get("timestamp")),
+                "metadata": entry.path,
+                "blob": storage_path,
+                "shared": shared,
+                "bytes": stored,
+                # What the record costs against max_size: a shared object is charged in
+                # full to every record that refers to it.
+                "charged": (version.get("size") or 0) if shared else stored,
+                "logical": version.get("size") or 0,
+                "deltaBase": version.get("deltaBase"),
+                "chainDepth": version.get("chainDepth") or 0,
+                "dependents": [],
+            })
+    return records
+
+
+def _doom(record, reason):
+    record["reason"] = reason
+    return record
+
+
+def _delete_entry(record, reason, freed):
+    return {
+        "op": "delete",
+        "reason": reason,
+        "pathHash": record["pathHash"],
+        "id": record["id"],
+        "metadata": record["metadata"],
+        "blob": record["blob"],
+        "shared": record["shared"],
+        "bytes": freed,
+        "dependents": [dependent["id"] for dependent in record["dependents"] if not dependent.get("planned")],
+    }
+
+
+def plan_gc(space_path, max_age_days=None, max_versions=None, max_size=None, keep_latest=True, now=None, stats=None):
+    """Yield plan entries for the given policies; fills `stats` with totals as it goes."""
+    now = time.time() if now is None else now
+    cutoff = now - max_age_days * DAY if max_age_days is not None else None
+    stats = stats if stats is not None else {}
+    stats.update(files=0, versions=0, deleted=0, bytes_freed=0, by_reason={})
+
+    size_heap = []
+    deferred = []
+    kept_bytes = 0
+    object_refs = {}
+    object_deleted = {}
+    sequence = 0
+
+    def planned(record, reason):
+        nonlocal kept_bytes
+        record["planned"] = True
+        freed = record["bytes"]
+        # Kept dependents of a deleted base are rewritten as full copies when the plan runs.
+        for dependent in record["dependents"]:
+            if dependent.get("planned") or not dependent["deltaBase"]:
+                continue
+            grown = dependent["logical"] - dependent["bytes"]
+            freed -= grown
+            dependent.update(bytes=dependent["logical"], charged=dependent["logical"], deltaBase=None)
+            if dependent.get("survivor"):
+                kept_bytes += grown
+        stats["deleted"] += 1
+        stats["bytes_freed"] += freed
+        stats["by_reason"][reason] = stats["by_reason"].get(reason, 0) + 1
+        if record["shared"]:
+            object_deleted[record["blob"]] = object_deleted.get(record["blob"], 0) + 1
+        return _delete_entry(record, reason, freed)
+
+    for file_hash, dir_entry in iter_metadata_dirs(space_path):
+        records = _load_dir(space_path, file_hash, dir_entry.path)
+        if not records:
+            continue
+        stats["files"] += 1
+        stats["versions"] += len(records)
+        by_id = {record["id"]: record for record in records}
+        for record in records:
+            base = by_id.get(record["deltaBase"])
+            if base is not None:
+                base["dependents"].append(record)
+            if record["shared"]:
+                object_refs[record["blob"]] = object_refs.get(record["blob"], 0) + 1
+
+        # Newest first, and a delta before its base on equal timestamps: every dependent of a
+        # record is decided before the record itself, and nothing pushed on `newest` is evicted later.
+        records.sort(key=lambda r: (r["epoch"], r["chainDepth"]), reverse=True)
+        latest = records[0] if keep_latest else None
+        limit = None if max_versions is None else max(max_versions - (1 if latest else 0), 0)
+        newest = []
+        doomed = []
+        for record in records:
+            if record is latest:
+                continue
+            if cutoff is not None and record["epoch"] < cutoff:
+                doomed.append(_doom(record, "age"))
+                continue
+            # Keep a bounded heap of the newest versions; whatever falls out is excess.
+            heapq.heappush(newest, (record["epoch"], -sequence, record))
+            sequence += 1
+            if limit is not None and len(newest) > limit:
+                doomed.append(_doom(heapq.heappop(newest)[2], "count"))
+        for record in doomed:
+            # Kept deltas of a doomed base are charged as the full copies they will become.
+            for dependent in record["dependents"]:
+                if dependent["deltaBase"] and not dependent.get("reason"):
+                    dependent["charged"] = dependent["logical"]
+
+        survivors = [item[2] for item in newest]
+        if latest:
+            latest["survivor"] = True
+            kept_bytes += latest["charged"]
+        for record in survivors:
+            record["survivor"] = True
+            kept_bytes += record["charged"]
+            if max_size is not None:
+                heapq.heappush(size_heap, (record["epoch"], sequence, record))
+                sequence += 1
+
+        if max_size is None:
+            for record in doomed:
+                yield planned(record, record["reason"])
+        else:
+            # A survivor may still be dropped by the size budget; hold the plan until it is settled.
+            deferred.extend(doomed)
+
+    if max_size is not None:
+        while kept_bytes > max_size and size_heap:
+            record = heapq.heappop(size_heap)[2]
+            kept_bytes -= record["charged"]
+            record["survivor"] = False
+            # Kept deltas of this record grow to full copies, unless they are dropped too.
+            for dependent in record["dependents"]:
+                if dependent.get("survivor") and dependent["deltaBase"] and dependent["charged"] < dependent["logical"]:
+                    kept_bytes += dependent["logical"] - dependent["charged"]
+                    dependent["charged"] = dependent["logical"]
+            deferred.append(_doom(record, "size"))
+        deferred.sort(key=lambda r: (r["epoch"], r["chainDepth"]), reverse=True)
+        for record in deferred:
+            yield planned(record, record["reason"])
+
+    for blob, deleted in object_deleted.items():
+        if deleted == object_refs.get(blob):
+            try:
+                size = os.path.getsize(blob)
+            except OSError:
+                continue
+            stats["bytes_freed"] += size
+            yield {"op": "delete_object", "blob": blob, "bytes": size}
+
+
+def write_plan(space_path, entries, plan_path=None):
+    """Stream plan entries to the plan file and reset progress; returns the entry count."""
+    plan_path = plan_path or augment_path(space_path, PLAN_FILENAME)
+    count = 0
+    temp_path = f"{plan_path}.tmp"
+    with open(temp_path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    _save_progress(space_path, 0)
+    os.replace(temp_path, plan_path)
+    return count
+
+
+def _progress_path(space_path):
+    return augment_path(space_path, PROGRESS_FILENAME)
+
+
+def _load_progress(space_path):
+    try:
+        with open(_progress_path(space_path)) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _save_progress(space_path, done):
+    path = _progress_path(space_path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(str(done))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _materialize(space_path, dir_path, version_id, base_id):
+    """Rewrite a delta record whose base is about to go as a full copy."""
+    metadata_path = os.path.join(dir_path, f"{version_id}.json")
+    try:
+        version = load_version_metadata(metadata_path)
+    except (OSError, ValueError):
+        return
+    if version.get("deltaBase") != base_id:
+        return
+    # The base is only deleted after its dependents, so the chain still resolves here.
+    content = read_version(space_path, version)
+    delta_path = to_fs_path(version["storagePath"])
+    data_path = os.path.splitext(delta_path)[0] + ".data"
+    with open(data_path, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    version["storagePath"] = data_path
+    version.pop("deltaBase", None)
+    version.pop("chainDepth", None)
+    write_json_atomic(metadata_path, version)
+    _remove(delta_path)
+
+
+def _apply(space_path, entry):
+    if entry["op"] == "delete_object":
+        return _remove(entry["blob"])
+    dir_path = os.path.dirname(entry["metadata"])
+    for dependent in entry["dependents"]:
+        _materialize(space_path, dir_path, dependent, entry["id"])
+
+    # The record may have been materialized since planning, so trust the file over the plan.
+    blob = entry["blob"]
+    try:
+        blob = to_fs_path(load_version_metadata(entry["metadata"]).get("storagePath")) or blob
+    except (OSError, ValueError):
+        pass
+    removed = _remove(entry["metadata"])
+    if blob and not is_object_path(space_path, blob):
+        _remove(blob)
+    # The segment still lists the deleted version; the JSON records are what it is rebuilt from.
+    _remove(segment_path(space_path, entry["pathHash"]))
+    return removed
+
+
+def execute_plan(space_path, plan_path=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Apply a written plan in batches, resuming after the last completed batch; returns counters."""
+    plan_path = plan_path or augment_path(space_path, PLAN_FILENAME)
+    done = _load_progress(space_path)
+    stats = {"resumed_at": done, "applied": 0, "bytes_freed": 0}
+    position = 0
+    with open(plan_path) as f:
+        for line in f:
+            position += 1
+            if position <= done:
+                continue
+            entry = json.loads(line)
+            _apply(space_path, entry)
+            stats["applied"] += 1
+            stats["bytes_freed"] += entry["bytes"]
+            if position % batch_size == 0:
+                _save_progress(space_path, position)
+    _save_progress(space_path, position)
+    os.remove(plan_path)
+    os.remove(_progress_path(space_path))
+    return stats
+
+
+def pending_plan(space_path):
+    """Return the path of an unfinished plan, if any."""
+    plan_path = augment_path(space_path, PLAN_FILENAME)
+    return plan_path if os.path.exists(plan_path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Garbage-collect old file versions.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("--max-age-days", type=float, help="delete versions older than this")
+    parser.add_argument("--max-versions", type=int, help="keep at most this many versions per file")
+    parser.add_argument("--max-size", type=int, help="keep total version bytes under this")
+    parser.add_argument("--no-keep-latest", action="store_true", help="allow deleting the newest version of a file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    args = parser.parse_args()
+
+    if not args.dry_run and pending_plan(args.space):
+        stats = execute_plan(args.space, batch_size=args.batch_size)
+        print(f"♻️  Finished interrupted plan: {stats}")
+
+    stats = {}
+    entries = plan_gc(args.space, args.max_age_days, args.max_versions, args.max_size,
+                      keep_latest=not args.no_keep_latest, stats=stats)
+    if args.dry_run:
+        for _ in entries:
+            pass
+        print(f"🔍 Dry run: would delete {stats['deleted']} of {stats['versions']} versions "
+              f"({stats['bytes_freed'] / (1024 * 1024):.2f} MB) {stats['by_reason']}")
+        return
+
+    write_plan(args.space, entries)
+    result = execute_plan(args.space, batch_size=args.batch_size)
+    print(f"🧹 Deleted {stats['deleted']} of {stats['versions']} versions, "
+          f"freed {result['bytes_freed'] / (1024 * 1024):.2f} MB {stats['by_reason']}")
+
+
+if __name__ == "__main__":
+    main()
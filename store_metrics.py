@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Instrumentation for the store hot paths.
+
+Nothing in the store modules calls into this file. `instrument()` wraps the
+functions listed in TARGETS (path hashing, space-root lookup, metadata listing,
+JSON parsing, blob reads/writes/copies, verification) wherever they are bound,
+including names imported with `from x import y`. `uninstrument()` puts the
+originals back. While it is off, the instrumentation costs nothing at all.
+
+Each operation records calls, errors, bytes moved and a latency histogram.
+Generators are timed only while they run, not while the consumer holds them.
+Results export as JSON or Prometheus text. SamplingProfiler is an opt-in thread
+that samples every thread's stack and writes folded stacks for flamegraph.pl or
+speedscope.
+
+    python store_metrics.py --prometheus --profile run.folded -- bulk_loader.py benchmark
+"""
+
+import argparse
+import functools
+import importlib
+import inspect
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf.
+BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+
+def _arg_size(index):
+    def size(args, kwargs, result):
+        try:
+            return os.path.getsize(args[index])
+        except (OSError, IndexError, TypeError):
+            return 0
+    return size
+
+
+def _result_len(args, kwargs, result):
+    return len(result) if result is not None else 0
+
+
+# (module, attribute, operation, bytes function or None)
+TARGETS = [
+    ("path_hash", "calculate_file_path_hash", "path_hash", None),
+    ("path_hash", "lookup_hash_dir", "hash_dir_lookup", None),
+    ("space_resolver", "SpaceResolver.resolve_dir", "space_root", None),
+    ("augment_store", "iter_metadata_dirs", "metadata_list_dirs", None),
+    ("augment_store", "iter_metadata_files", "metadata_list_files", None),
+    ("augment_store", "load_file_versions", "history_load", None),
+    ("augment_store", "load_version_metadata", "json_parse", _arg_size(0)),
+    ("augment_store", "hash_file", "blob_hash", _arg_size(0)),
+    ("augment_store", "add_version", "blob_write", lambda args, kwargs, result: result["size"]),
+    ("delta_store", "read_version", "blob_read", _result_len),
+    ("blob_store", "put_bytes", "object_write", lambda args, kwargs, result: len(args[1])),
+    ("blob_store", "put_file", "object_write", _arg_size(1)),
+    ("space_restore", "fast_copy", "blob_copy", _arg_size(1)),
+    ("store_verify", "verify_space", "verify", None),
+    ("store_verify", "check_file_version", "verify_file_version", None),
+]
+
+
+class OperationStats:
+    """Counters and a latency histogram for one operation."""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, elapsed, size=0, error=False):
+        with self.lock:
+            self.calls += 1
+            self.errors += error
+            self.bytes += size
+            self.seconds += elapsed
+            self.buckets[bisect_left(BUCKETS, elapsed)] += 1
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            "mean_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "buckets": {str(bound): count for bound, count in zip(BUCKETS + ("+Inf",), self.buckets)},
+        }
+
+
+class Registry:
+    """All operation stats, plus the bookkeeping needed to undo instrumentation."""
+
+    def __init__(self):
+        self.operations = {}
+        self.patches = []
+        self.wrappers = {}
+        self.lock = threading.Lock()
+
+    def stats(self, name):
+        with self.lock:
+            if name not in self.operations:
+                self.operations[name] = OperationStats(name)
+            return self.operations[name]
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+
+    def to_json(self):
+        return {name: stats.to_dict() for name, stats in sorted(self.operations.items())}
+
+    def to_prometheus(self, prefix="augment_store"):
+        lines = []
+        for metric, kind, help_text in (
+            ("op_calls_total", "counter", "Calls per store operation."),
+            ("op_errors_total", "counter", "Calls that raised, per store operation."),
+            ("op_bytes_total", "counter", "Bytes read, written or copied per store operation."),
+            ("op_duration_seconds", "histogram", "Latency per store operation."),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name, stats in sorted(self.operations.items()):
+                label = f'op="{name}"'
+                if metric == "op_calls_total":
+                    lines.append(f"{prefix}_{metric}{{{label}}} {stats.calls}")
+                elif metric == "op_errors_total":
+                    lines.append(f"{prefix}_{metric}{{{label}}} {stats.errors}")
+                elif metric == "op_bytes_total":
+                    lines.append(f"{prefix}_{metric}{{{label}}} {stats.bytes}")
+                else:
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ("+Inf",), stats.buckets):
+                        cumulative += count
+                        lines.append(f'{prefix}_{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f"{prefix}_{metric}_sum{{{label}}} {stats.seconds}")
+                    lines.append(f"{prefix}_{metric}_count{{{label}}} {stats.calls}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _wrap(fn, stats, size_fn):
+    clock = time.perf_counter
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            elapsed = 0.0
+            started = clock()
+            generator = fn(*args, **kwargs)
+            try:
+                while True:
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        break
+                    elapsed += clock() - started
+                    yield item
+                    started = clock()
+            except GeneratorExit:
+                generator.close()
+                stats.record(elapsed)
+                raise
+            except BaseException:
+                stats.record(elapsed + clock() - started, error=True)
+                raise
+            stats.record(elapsed + clock() - started)
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = clock()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            stats.record(clock() - started, error=True)
+            raise
+        elapsed = clock() - started
+        stats.record(elapsed, size_fn(args, kwargs, result) if size_fn else 0)
+        return result
+    return wrapper
+
+
+def _replace_everywhere(original, replacement, registry):
+    """Rebind every module-level name bound to original; returns how many were replaced."""
+    replaced = 0
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not namespace:
+            continue
+        for name, value in list(namespace.items()):
+            if value is original:
+                setattr(module, name, replacement)
+                registry.patches.append((module, name, original))
+                replaced += 1
+    return replaced
+
+
+def instrument(targets=None, registry=REGISTRY):
+    """Wrap the target functions; returns the operation names that were instrumented."""
+    if registry.patches:
+        return sorted({name for _, _, name, _ in targets or TARGETS})
+    instrumented = set()
+    for module_name, attribute, operation, size_fn in targets or TARGETS:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        owner = module
+        *path, name = attribute.split(".")
+        for part in path:
+            owner = getattr(owner, part)
+        original = getattr(owner, name)
+        wrapper = _wrap(original, registry.stats(operation), size_fn)
+        registry.wrappers[id(wrapper)] = (wrapper, original)
+        if path:
+            setattr(owner, name, wrapper)
+            registry.patches.append((owner, name, original))
+        else:
+            _replace_everywhere(original, wrapper, registry)
+        instrumented.add(operation)
+    return sorted(instrumented)
+
+
+def uninstrument(registry=REGISTRY):
+    """Put every original function back, including in modules imported while instrumented."""
+    for owner, name, original in reversed(registry.patches):
+        setattr(owner, name, original)
+    registry.patches = []
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not namespace:
+            continue
+        for name, value in list(namespace.items()):
+            patched = registry.wrappers.get(id(value))
+            if patched is not None and patched[0] is value:
+                setattr(module, name, patched[1])
+    registry.wrappers = {}
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads every `interval` seconds into folded-stack counts."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="augment-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def folded(self):
+        """Return the samples in folded-stack format ("frame;frame;frame count" per line)."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def write(self, path):
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a store script with instrumentation and report metrics.")
+    parser.add_argument("--prometheus", action="store_true", help="print Prometheus text instead of JSON")
+    parser.add_argument("-o", "--output", help="write the metrics here instead of stderr")
+    parser.add_argument("--profile", metavar="FOLDED", help="also sample stacks into this folded-stack file")
+    parser.add_argument("--interval", type=float, default=0.005, help="profiler sampling interval in seconds")
+    parser.add_argument("script", help="python script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments for the script")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    instrument()
+    profiler = SamplingProfiler(args.interval).start() if args.profile else None
+    sys.argv = [args.script] + [arg for arg in args.args if arg != "--"]
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        if profiler:
+            profiler.stop()
+            profiler.write(args.profile)
+        uninstrument()
+        text = REGISTRY.to_prometheus() if args.prometheus else json.dumps(REGISTRY.to_json(), indent=2) + "\n"
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        else:
+            sys.stderr.write(text)
+
+
+if __name__ == "__main__":
+    main()
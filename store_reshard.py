@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Online migration between the flat and the sharded per-file directory layouts.
+
+    flat:     file_metadata/<hash>/       file_versions/<hash>/
+    sharded:  file_metadata/ab/cd/<hash>/ file_versions/ab/cd/<hash>/
+
+The space's layout.json is switched first, so directories created from then on
+already use the new layout. Existing ones move one path hash at a time; the
+tools in this repo keep working throughout because every lookup checks both
+places:
+
+1. Blobs are hard-linked into the new file_versions directory (the old names stay).
+2. Every record's storagePath is rewritten to the new blob directory, atomically.
+3. The metadata directory is renamed into its new place in one step.
+4. Records written in the meantime are fixed up and the old blob names removed.
+
+A crash at any point leaves every record pointing at a blob that exists, and
+rerunning the tool finishes the job. `--limit` and `--sleep` spread the work out.
+
+The sharded layout is for tooling only. The app's MetadataManager looks for
+file_metadata/<hash> and nothing else, so it sees no history for a file that has
+moved; run `--flat` before handing a space back to the app.
+"""
+
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+
+from augment_store import augment_path, iter_metadata_dirs, load_version_metadata, set_layout, to_fs_path, write_json_atomic
+from packed_metadata import read_segment, segment_path, write_segment
+from path_hash import iter_hash_dirs, shard_path
+from version_index import INDEX_FILENAME, VersionIndex
+
+LATE_WRITE_PASSES = 3
+
+
+def _locations(root, file_hash, sharded):
+    """Return (old location, new location) of a per-file directory for the target layout."""
+    flat, sharded_path = os.path.join(root, file_hash), shard_path(root, file_hash)
+    return (flat, sharded_path) if sharded else (sharded_path, flat)
+
+
+def _relink(source_dir, target_dir):
+    """Give every blob in source_dir a second name in target_dir; returns how many were added."""
+    linked = 0
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".tmp") or not entry.is_file(follow_symlinks=False):
+                continue
+            target = os.path.join(target_dir, entry.name)
+            if os.path.exists(target):
+                continue
+            try:
+                os.link(entry.path, target)
+            except OSError:
+                shutil.copy2(entry.path, target)
+            linked += 1
+    return linked
+
+
+def _retarget(version, source_dir, target_dir):
+    """Point a record stored in source_dir at target_dir instead; returns True if it changed."""
+    value = version.get("storagePath") or ""
+    storage_path = to_fs_path(value)
+    if not storage_path or os.path.dirname(storage_path) != source_dir:
+        return False
+    moved = os.path.join(target_dir, os.path.basename(storage_path))
+    version["storagePath"] = Path(moved).as_uri() if value.startswith("file://") else moved
+    return True
+
+
+def _rewrite_records(metadata_dir, source_dir, target_dir):
+    rewritten = 0
+    with os.scandir(metadata_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                version = load_version_metadata(entry.path)
+            except (OSError, ValueError):
+                continue
+            if _retarget(version, source_dir, target_dir):
+                write_json_atomic(entry.path, version)
+                rewritten += 1
+    return rewritten
+
+
+def _rewrite_segment(space_path, file_hash, source_dir, target_dir):
+    path = segment_path(space_path, file_hash)
+    if not os.path.exists(path):
+        return 0
+    versions = read_segment(path)
+    changed = sum(_retarget(version, source_dir, target_dir) for version in versions)
+    if changed:
+        write_segment(path, versions)
+    return changed
+
+
+def _move_dir(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.rename(source, target)
+    except OSError:
+        # The target already exists (a writer created it after the layout switch): merge.
+        with os.scandir(source) as entries:
+            for entry in entries:
+                os.replace(entry.path, os.path.join(target, entry.name))
+        os.rmdir(source)
+
+
+def _prune(path, root):
+    """Remove empty fan-out directories between path and root."""
+    path = os.path.dirname(path)
+    while path != root:
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def reshard_hash(space_path, file_hash, sharded=True, index=None):
+    """Move one path hash's directories to the target layout; returns counters, or None if already there."""
+    metadata_root = augment_path(space_path, "file_metadata")
+    blob_root = augment_path(space_path, "file_versions")
+    old_metadata, new_metadata = _locations(metadata_root, file_hash, sharded)
+    old_blobs, new_blobs = _locations(blob_root, file_hash, sharded)
+    has_metadata, has_blobs = os.path.isdir(old_metadata), os.path.isdir(old_blobs)
+    if not has_metadata and not has_blobs:
+        return None
+
+    stats = {"linked": 0, "rewritten": 0}
+    if has_blobs:
+        os.makedirs(new_blobs, exist_ok=True)
+        stats["linked"] += _relink(old_blobs, new_blobs)
+    if has_metadata:
+        stats["rewritten"] += _rewrite_records(old_metadata, old_blobs, new_blobs)
+    stats["rewritten"] += _rewrite_segment(space_path, file_hash, old_blobs, new_blobs)
+    if has_metadata:
+        _move_dir(old_metadata, new_metadata)
+        _prune(old_metadata, metadata_root)
+
+    # Writers that resolved the old directories before the move may have added
+    # records and blobs there since; keep fixing up until the old blob dir is gone.
+    for _ in range(LATE_WRITE_PASSES if has_blobs else 0):
+        stats["linked"] += _relink(old_blobs, new_blobs)
+        if os.path.isdir(new_metadata):
+            stats["rewritten"] += _rewrite_records(new_metadata, old_blobs, new_blobs)
+        with os.scandir(old_blobs) as entries:
+            for entry in entries:
+                if os.path.exists(os.path.join(new_blobs, entry.name)):
+                    os.remove(entry.path)
+        try:
+            os.rmdir(old_blobs)
+        except OSError:
+            continue
+        _prune(old_blobs, blob_root)
+        break
+    if index is not None:
+        index.forget(file_hash)
+    return stats
+
+
+def _needs_move(space_path, file_hash, sharded):
+    return any(
+        os.path.isdir(_locations(augment_path(space_path, kind), file_hash, sharded)[0])
+        for kind in ("file_metadata", "file_versions")
+    )
+
+
+def reshard_space(space_path, sharded=True, limit=None, sleep=0.0):
+    """Switch the space to the given layout and move up to `limit` path hashes into it; returns counters."""
+    set_layout(space_path, sharded)
+    names = dict.fromkeys(name for name, _ in iter_metadata_dirs(space_path))
+    names.update(dict.fromkeys(name for name, _ in iter_hash_dirs(augment_path(space_path, "file_versions"))))
+
+    stats = {"moved": 0, "linked": 0, "rewritten": 0, "remaining": 0}
+    index = VersionIndex(space_path) if os.path.exists(augment_path(space_path, INDEX_FILENAME)) else None
+    try:
+        for file_hash in names:
+            if limit is not None and stats["moved"] >= limit:
+                if _needs_move(space_path, file_hash, sharded):
+                    stats["remaining"] += 1
+                continue
+            moved = reshard_hash(space_path, file_hash, sharded, index)
+            if moved is None:
+                continue
+            stats["moved"] += 1
+            stats["linked"] += moved["linked"]
+            stats["rewritten"] += moved["rewritten"]
+            if sleep:
+                time.sleep(sleep)
+    finally:
+        if index is not None:
+            index.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a space's per-file directories between the flat and sharded layouts.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("--flat", action="store_true", help="migrate back to the flat layout")
+    parser.add_argument("--limit", type=int, default=None, help="move at most N path hashes this run")
+    parser.add_argument("--sleep", type=float, default=0.0, help="seconds to pause after each path hash")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stats = reshard_space(args.space, sharded=not args.flat, limit=args.limit, sleep=args.sleep)
+    layout = "flat" if args.flat else "sharded"
+    print(f"🗂️  Moved {stats['moved']} path hashes to the {layout} layout in {time.perf_counter() - started:.3f}s "
+          f"({stats['linked']} blobs linked, {stats['rewritten']} records rewritten)")
+    if stats["remaining"]:
+        print(f"⏭️  {stats['remaining']} path hashes left for the next run")
+    if not args.flat:
+        print("⚠️  The app only reads the flat layout; run with --flat before opening this space in it")
+
+
+if __name__ == "__main__":
+    main()
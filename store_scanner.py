@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Incremental store scanner.
+
+Remembers the mtime and entry count of every file_metadata/<hash> directory in
+.augment/scan_state.json. The next scan skips directories whose mtime has not
+changed and, inside a changed directory, only re-reads JSON records modified since
+the previous scan, so a nightly audit costs one stat per directory plus work
+proportional to churn. Each committed scan appends a summary line to
+.augment/scan_journal.jsonl.
+
+Directories modified within RACY_WINDOW_NS of the previous scan are always
+re-examined, since a change in the same mtime tick would otherwise be missed.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from augment_store import augment_path, iter_metadata_dirs, load_version_metadata
+
+STATE_FILENAME = "scan_state.json"
+JOURNAL_FILENAME = "scan_journal.jsonl"
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class IncrementalScanner:
+    """Yields the version records that changed since the last committed scan."""
+
+    def __init__(self, space_path, state_path=None, journal_path=None):
+        self.space_path = space_path
+        self.state_path = state_path or augment_path(space_path, STATE_FILENAME)
+        self.journal_path = journal_path or augment_path(space_path, JOURNAL_FILENAME)
+        self.state = self._load_state()
+        self.new_dirs = {}
+        self.stats = {}
+        self.started_ns = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("last_scan_ns", 0)
+        state.setdefault("dirs", {})
+        return state
+
+    def reset(self):
+        """Forget everything so the next scan reads the whole store."""
+        self.state = {"last_scan_ns": 0, "dirs": {}}
+
+    def changes(self):
+        """Yield change events for the store since the last committed scan.
+
+        Events are dicts with an "event" key: "upserted" (a new or modified record,
+        with "record"), "removed" (net records that disappeared from a directory,
+        with "count"), or "dir_removed".
+        """
+        self.started_ns = time.time_ns()
+        self.new_dirs = {}
+        self.stats = {"dirs": 0, "skipped_dirs": 0, "read": 0, "upserted": 0, "removed": 0, "invalid": 0}
+        previous_dirs = self.state["dirs"]
+        since_ns = self.state["last_scan_ns"] - RACY_WINDOW_NS
+
+        for file_hash, dir_entry in iter_metadata_dirs(self.space_path):
+            self.stats["dirs"] += 1
+            mtime_ns = dir_entry.stat().st_mtime_ns
+            known = previous_dirs.get(file_hash)
+            if known and known["mtime_ns"] == mtime_ns and mtime_ns < since_ns:
+                self.new_dirs[file_hash] = known
+                self.stats["skipped_dirs"] += 1
+                continue
+
+            entries = 0
+            upserted = 0
+            with os.scandir(dir_entry.path) as scan:
+                for entry in scan:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    entries += 1
+                    if known and entry.stat().st_mtime_ns < since_ns:
+                        continue
+                    self.stats["read"] += 1
+                    try:
+                        record = load_version_metadata(entry.path)
+                    except (OSError, ValueError):
+                        self.stats["invalid"] += 1
+                        continue
+                    upserted += 1
+                    yield {"event": "upserted", "pathHash": file_hash, "path": entry.path, "record": record}
+
+            self.stats["upserted"] += upserted
+            if known and known["entries"] > entries:
+                # Names are not kept in the state, so this is the net number of records that went away.
+                removed = known["entries"] - entries
+                self.stats["removed"] += removed
+                yield {"event": "removed", "pathHash": file_hash, "count": removed}
+            self.new_dirs[file_hash] = {"mtime_ns": mtime_ns, "entries": entries}
+
+        for file_hash, known in previous_dirs.items():
+            if file_hash not in self.new_dirs:
+                self.stats["removed"] += known["entries"]
+                yield {"event": "dir_removed", "pathHash": file_hash, "count": known["entries"]}
+
+    def commit(self):
+        """Persist the state of the finished scan and append it to the journal."""
+        self.state = {"last_scan_ns": self.started_ns, "dirs": self.new_dirs}
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        os.replace(temp_path, self.state_path)
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps({"scan_ns": self.started_ns, **self.stats}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report what changed in a space since the last scan.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("--full", action="store_true", help="ignore the saved state and rescan everything")
+    parser.add_argument("--dry-run", action="store_true", help="do not save the new state")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every change")
+    args = parser.parse_args()
+
+    scanner = IncrementalScanner(args.space)
+    if args.full:
+        scanner.reset()
+    started = time.perf_counter()
+    for change in scanner.changes():
+        if args.verbose:
+            target = change.get("record", {}).get("id") or change.get("count")
+            print(f"   {change['event']}: {change['pathHash']} {target}")
+    elapsed = time.perf_counter() - started
+    if not args.dry_run:
+        scanner.commit()
+    print(f"🔍 Scanned in {elapsed:.3f}s: {scanner.stats}")
+
+
+if __name__ == "__main__":
+    main()
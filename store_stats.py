@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Single-pass statistics and disk-usage report for a space.
+
+One depth-first os.scandir walk over .augment gathers everything the app's
+StorageManager computes in separate walks (directory size, version counts, date
+range) and more:
+
+- bytes and allocated blocks per area (file_versions, objects, file_metadata, ...)
+- versions, logical bytes, delta records and the oldest/newest timestamp
+- deduplicable bytes: versions whose content already appeared earlier in the walk
+- how many files have 1, 2-3, 4-7, ... versions, and an age histogram
+- the N largest histories and the N histories with the most versions
+- an estimate of the number of distinct contents
+
+Memory does not grow with the store: the walk holds one open directory per level,
+each history is folded in as soon as its directory is done, the top-N lists are
+bounded heaps, distinct contents are counted with a HyperLogLog sketch and
+duplicates are detected with a fixed-size Bloom filter (a false positive, about 1%
+at 3 million distinct contents with the default size, counts a version as
+deduplicable). Several spaces can be scanned in parallel worker processes.
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from augment_store import AUGMENT_DIR, format_timestamp, load_version_metadata, parse_timestamp
+
+DAY = 24 * 3600
+AGE_BUCKETS = (("1d", 1), ("7d", 7), ("30d", 30), ("90d", 90), ("365d", 365), ("older", None))
+DEFAULT_TOP = 10
+DEFAULT_PRECISION = 14
+DEFAULT_BLOOM_BITS = 1 << 25
+BLOOM_HASHES = 7
+
+
+def _hash128(text):
+    """Return two 64-bit integers derived from text (directly, if it is already a SHA-256 hex digest)."""
+    if len(text) == 64:
+        try:
+            return int(text[:16], 16), int(text[16:32], 16)
+        except ValueError:
+            pass
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big")
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2**precision bytes (about 0.8% standard error at precision 14)."""
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, text):
+        value = _hash128(text)[0]
+        bits = 64 - self.precision
+        index = value >> bits
+        rank = bits - (value & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class BloomFilter:
+    """Fixed-size set membership with false positives but no false negatives."""
+
+    def __init__(self, bits=DEFAULT_BLOOM_BITS, hashes=BLOOM_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+
+    def add(self, text):
+        """Add text; returns True if it was (probably) there already."""
+        h1, h2 = _hash128(text)
+        seen = True
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self.array[byte] & mask:
+                seen = False
+                self.array[byte] |= mask
+        return seen
+
+
+class TopN:
+    """The n items with the largest keys seen so far."""
+
+    def __init__(self, n):
+        self.n = n
+        self.heap = []
+        self.sequence = 0
+
+    def push(self, key, item):
+        self.sequence += 1
+        entry = (key, self.sequence, item)
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, entry)
+        elif key > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        for key, _, item in other.heap:
+            self.push(key, item)
+
+    def items(self):
+        return [item for _, _, item in sorted(self.heap, key=lambda entry: (-entry[0], entry[1]))]
+
+
+def _count_bucket(count):
+    low = 1 << (count.bit_length() - 1)
+    high = 2 * low - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+class SpaceStats:
+    """Accumulates the statistics of one or more spaces; see collect()."""
+
+    def __init__(self, top=DEFAULT_TOP, now=None, precision=DEFAULT_PRECISION):
+        self.now = time.time() if now is None else now
+        self.spaces = []
+        self.files = 0
+        self.versions = 0
+        self.logical_bytes = 0
+        self.duplicate_versions = 0
+        self.duplicate_bytes = 0
+        self.delta_versions = 0
+        self.invalid_records = 0
+        self.oldest = None
+        self.newest = None
+        self.disk = {}
+        self.age = {name: {"versions": 0, "bytes": 0} for name, _ in AGE_BUCKETS}
+        self.versions_per_file = {}
+        self.largest = TopN(top)
+        self.most_versions = TopN(top)
+        self.contents = HyperLogLog(precision)
+        self.seen = None
+        self.seconds = 0.0
+
+    def add_file(self, area, stat):
+        usage = self.disk.setdefault(area, {"files": 0, "bytes": 0, "allocated": 0})
+        usage["files"] += 1
+        usage["bytes"] += stat.st_size
+        usage["allocated"] += getattr(stat, "st_blocks", 0) * 512
+
+    def add_version(self, version, history):
+        size = version.get("size") or 0
+        epoch = parse_timestamp(version.get("timestamp"))
+        self.versions += 1
+        self.logical_bytes += size
+        if version.get("deltaBase"):
+            self.delta_versions += 1
+        content_hash = version.get("contentHash")
+        if content_hash:
+            self.contents.add(content_hash)
+            if self.seen is not None and self.seen.add(content_hash):
+                self.duplicate_versions += 1
+                self.duplicate_bytes += size
+        self.oldest = epoch if self.oldest is None else min(self.oldest, epoch)
+        self.newest = epoch if self.newest is None else max(self.newest, epoch)
+        age_days = (self.now - epoch) / DAY
+        for name, limit in AGE_BUCKETS:
+            if limit is None or age_days <= limit:
+                self.age[name]["versions"] += 1
+                self.age[name]["bytes"] += size
+                break
+
+        history["versions"] += 1
+        history["bytes"] += size
+        if history["filePath"] is None:
+            history["filePath"] = version.get("filePath")
+
+    def add_history(self, history):
+        self.files += 1
+        bucket = _count_bucket(history["versions"])
+        self.versions_per_file[bucket] = self.versions_per_file.get(bucket, 0) + 1
+        self.largest.push(history["bytes"], history)
+        self.most_versions.push(history["versions"], history)
+
+    def merge(self, other):
+        """Fold another SpaceStats in. Content seen in two spaces is not counted as deduplicable."""
+        self.spaces.extend(other.spaces)
+        for name in ("files", "versions", "logical_bytes", "duplicate_versions", "duplicate_bytes",
+                     "delta_versions", "invalid_records"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        if other.oldest is not None:
+            self.oldest = other.oldest if self.oldest is None else min(self.oldest, other.oldest)
+            self.newest = other.newest if self.newest is None else max(self.newest, other.newest)
+        for area, usage in other.disk.items():
+            mine = self.disk.setdefault(area, {"files": 0, "bytes": 0, "allocated": 0})
+            for key, value in usage.items():
+                mine[key] += value
+        for name, bucket in other.age.items():
+            self.age[name]["versions"] += bucket["versions"]
+            self.age[name]["bytes"] += bucket["bytes"]
+        for bucket, count in other.versions_per_file.items():
+            self.versions_per_file[bucket] = self.versions_per_file.get(bucket, 0) + count
+        self.largest.merge(other.largest)
+        self.most_versions.merge(other.most_versions)
+        self.contents.merge(other.contents)
+        self.seconds = max(self.seconds, other.seconds)
+        return self
+
+    def to_dict(self):
+        return {
+            "spaces": self.spaces,
+            "files": self.files,
+            "versions": self.versions,
+            "logical_bytes": self.logical_bytes,
+            "duplicate_versions": self.duplicate_versions,
+            "duplicate_bytes": self.duplicate_bytes,
+            "distinct_contents_estimate": self.contents.estimate(),
+            "delta_versions": self.delta_versions,
+            "invalid_records": self.invalid_records,
+            "oldest": format_timestamp(self.oldest) if self.oldest is not None else None,
+            "newest": format_timestamp(self.newest) if self.newest is not None else None,
+            "disk": dict(sorted(self.disk.items())),
+            "age": self.age,
+            "versions_per_file": dict(sorted(self.versions_per_file.items(), key=lambda item: int(item[0].split("-")[0]))),
+            "largest_histories": self.largest.items(),
+            "most_versions": self.most_versions.items(),
+            "seconds": self.seconds,
+        }
+
+
+def _walk(stats, path, area, metadata_depth):
+    """Visit one directory; JSON records directly inside a file_metadata/ leaf make up one history."""
+    history = None
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _walk(stats, entry.path, area or entry.name, metadata_depth + 1 if area == "file_metadata" else 0)
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            stats.add_file(area or entry.name, stat)
+            if area != "file_metadata" or not metadata_depth or not entry.name.endswith(".json"):
+                continue
+            try:
+                version = load_version_metadata(entry.path)
+            except (OSError, ValueError):
+                stats.invalid_records += 1
+                continue
+            if history is None:
+                history = {"pathHash": os.path.basename(path), "filePath": None, "versions": 0, "bytes": 0}
+            stats.add_version(version, history)
+    if history is not None:
+        stats.add_history(history)
+
+
+def collect(space_path, top=DEFAULT_TOP, now=None, precision=DEFAULT_PRECISION, bloom_bits=DEFAULT_BLOOM_BITS):
+    """Scan one space in a single pass and return its SpaceStats."""
+    started = time.perf_counter()
+    stats = SpaceStats(top, now, precision)
+    stats.spaces.append(space_path)
+    stats.seen = BloomFilter(bloom_bits)
+    try:
+        _walk(stats, os.path.join(space_path, AUGMENT_DIR), None, 0)
+    except FileNotFoundError:
+        pass
+    stats.seconds = time.perf_counter() - started
+    stats.seen = None  # Only needed during the walk; keeps results small to pass between processes.
+    return stats
+
+
+def collect_many(spaces, workers=None, **options):
+    """Scan several spaces, in parallel worker processes when workers > 1; returns (per space, combined)."""
+    started = time.perf_counter()
+    if workers == 1 or len(spaces) < 2:
+        results = [collect(space, **options) for space in spaces]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_collect_star, [(space, options) for space in spaces]))
+    combined = SpaceStats(options.get("top", DEFAULT_TOP), options.get("now"), options.get("precision", DEFAULT_PRECISION))
+    for result in results:
+        combined.merge(result)
+    combined.seconds = time.perf_counter() - started
+    return results, combined
+
+
+def _collect_star(args):
+    space, options = args
+    return collect(space, **options)
+
+
+def _human(size):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def _print_report(report):
+    print(f"📊 {', '.join(report['spaces'])}")
+    print(f"   📁 {report['files']} files, {report['versions']} versions, "
+          f"{_human(report['logical_bytes'])} logical ({report['delta_versions']} deltas)")
+    print(f"   ♻️  {_human(report['duplicate_bytes'])} deduplicable in {report['duplicate_versions']} versions, "
+          f"~{report['distinct_contents_estimate']} distinct contents")
+    print(f"   🕰️  {report['oldest']} → {report['newest']}")
+    for area, usage in report["disk"].items():
+        print(f"   💾 {area}: {usage['files']} files, {_human(usage['bytes'])} ({_human(usage['allocated'])} allocated)")
+    print("   ⏳ age: " + ", ".join(f"≤{name} {bucket['versions']}" if name != "older" else f"older {bucket['versions']}"
+                                    for name, bucket in report["age"].items()))
+    print("   🔢 versions per file: " + ", ".join(f"{k}: {v}" for k, v in report["versions_per_file"].items()))
+    for history in report["largest_histories"]:
+        print(f"   🐘 {_human(history['bytes'])} in {history['versions']} versions: {history['filePath']}")
+    if report["invalid_records"]:
+        print(f"   ⚠️  {report['invalid_records']} unreadable records")
+    print(f"   ⏱️  {report['seconds']:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pass statistics and disk usage for Augment spaces.")
+    parser.add_argument("spaces", nargs="+", help="paths to Augment spaces")
+    parser.add_argument("-n", "--top", type=int, default=DEFAULT_TOP, help="length of the top-N lists")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes for several spaces")
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    results, combined = collect_many(args.spaces, args.workers, top=args.top)
+    reports = [result.to_dict() for result in results]
+    if len(reports) > 1:
+        reports.append(combined.to_dict())
+    if args.json:
+        json.dump(reports if len(reports) > 1 else reports[0], sys.stdout, indent=2)
+        print()
+        return
+    for report in reports:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
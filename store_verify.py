@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Whole-store integrity verifier.
+
+Streams over file_metadata/, file_versions/, objects/, metadata/ and snapshots/ of a space
+with a bounded thread pool, recomputes the SHA-256 contentHash of every .data blob
+in chunked reads, reports orphans in both directions and writes one JSON line per
+result. Only a bounded number of work items is in flight at any time. The one
+thing kept for the whole run is the set of object hashes the records refer to:
+the records are checked first, then every objects/ entry nobody refers to is
+reported as an orphan_blob.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from augment_store import augment_path, hash_dir, hash_file, iter_metadata_dirs, to_fs_path
+from blob_store import is_object_path, iter_objects
+from delta_store import is_delta, read_version
+from path_hash import iter_hash_dirs
+from store_scanner import IncrementalScanner
+
+# The scanner CLI keeps its own state; sharing it would make each tool skip what the other saw.
+STATE_FILENAME = "verify_state.json"
+JOURNAL_FILENAME = "verify_journal.jsonl"
+
+PROBLEM_STATUSES = {
+    "invalid_json",
+    "missing_blob",
+    "hash_mismatch",
+    "orphan_blob",
+    "missing_folder_version",
+    "orphan_folder_version",
+}
+
+
+def bounded_map(executor, fn, items, max_in_flight):
+    """Like executor.map, but never holds more than max_in_flight pending items. Unordered."""
+    pending = set()
+    for item in items:
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(executor.submit(fn, item))
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def _load_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def check_file_version(space_path, file_hash, metadata_path, version=None):
+    """Check one file version record and its .data blob; pass version if the record is already parsed."""
+    result = {"kind": "file_version", "pathHash": file_hash, "metadata": metadata_path}
+    if version is None:
+        try:
+            version = _load_json(metadata_path)
+        except (OSError, ValueError) as e:
+            result.update(status="invalid_json", error=str(e))
+            return [result]
+
+    version_id = os.path.basename(metadata_path)[:-5]
+    storage_path = to_fs_path(version.get("storagePath")) or ""
+    if not os.path.exists(storage_path):
+        # Stores copied between machines keep stale absolute paths; fall back to the layout.
+        storage_path = os.path.join(hash_dir(space_path, "file_versions", file_hash), f"{version_id}.data")
+    result["blob"] = storage_path
+
+    if is_object_path(space_path, storage_path):
+        # Shared objects are rehashed once by check_object; here the name is the hash.
+        if not os.path.exists(storage_path):
+            result["status"] = "missing_blob"
+        elif version.get("contentHash") not in (None, os.path.basename(storage_path)):
+            result.update(status="hash_mismatch", expected=version["contentHash"],
+                          actual=os.path.basename(storage_path))
+        else:
+            result["status"] = "ok"
+        return [result]
+
+    try:
+        if is_delta(version):
+            actual = hashlib.sha256(read_version(space_path, version)).hexdigest()
+        else:
+            actual = hash_file(storage_path)
+    except FileNotFoundError:
+        result["status"] = "missing_blob"
+        return [result]
+
+    expected = version.get("contentHash")
+    if expected and actual != expected:
+        result.update(status="hash_mismatch", expected=expected, actual=actual)
+    else:
+        result["status"] = "ok"
+    return [result]
+
+
+def check_blob_dir(space_path, file_hash, blob_dir):
+    """Report .data/.delta blobs in file_versions/<hash> that no metadata record refers to."""
+    metadata_dir = hash_dir(space_path, "file_metadata", file_hash)
+    results = []
+    for entry in _scan(blob_dir, suffix=""):
+        version_id, ext = os.path.splitext(entry.name)
+        if ext not in (".data", ".delta"):
+            continue
+        metadata_path = os.path.join(metadata_dir, version_id + ".json")
+        if os.path.exists(metadata_path):
+            continue
+        try:
+            size = entry.stat().st_size
+        except FileNotFoundError:
+            continue  # Removed since the directory was listed (gc, compact, reshard).
+        results.append({
+            "kind": "file_version",
+            "pathHash": file_hash,
+            "blob": entry.path,
+            "status": "orphan_blob",
+            "bytes": size,
+        })
+    return results
+
+
+def check_object(space_path, content_hash, object_path, referenced=None):
+    """Rehash a content-addressed object and compare it with its name.
+
+    With referenced (the set of content hashes records point at), an object outside
+    it is reported as an orphan_blob instead of being rehashed.
+    """
+    result = {"kind": "object", "blob": object_path}
+    try:
+        if referenced is not None and content_hash not in referenced:
+            result.update(status="orphan_blob", bytes=os.path.getsize(object_path))
+            return [result]
+        actual = hash_file(object_path)
+    except FileNotFoundError:
+        return []  # Removed since objects/ was listed.
+    if actual != content_hash:
+        result.update(status="hash_mismatch", expected=content_hash, actual=actual)
+    else:
+        result["status"] = "ok"
+    return [result]
+
+
+def check_folder_version(space_path, metadata_path):
+    """Check a folder version record in metadata/ and its copy under versions/."""
+    result = {"kind": "folder_version", "metadata": metadata_path}
+    try:
+        version = _load_json(metadata_path)
+    except (OSError, ValueError) as e:
+        result.update(status="invalid_json", error=str(e))
+        return [result]
+
+    storage_path = to_fs_path(version.get("storagePath")) or ""
+    if not os.path.isdir(storage_path):
+        storage_path = augment_path(space_path, "versions", os.path.basename(metadata_path)[:-5])
+    result["storage"] = storage_path
+    result["status"] = "ok" if os.path.isdir(storage_path) else "missing_folder_version"
+    return [result]
+
+
+def check_folder_copy(space_path, version_dir):
+    """Report a versions/<id> copy that has no metadata record."""
+    metadata_path = augment_path(space_path, "metadata", os.path.basename(version_dir) + ".json")
+    if os.path.exists(metadata_path):
+        return []
+    return [{"kind": "folder_version", "storage": version_dir, "status": "orphan_folder_version"}]
+
+
+def check_snapshot(space_path, snapshot_path):
+    """Check that a snapshot record parses."""
+    result = {"kind": "snapshot", "metadata": snapshot_path}
+    try:
+        snapshot = _load_json(snapshot_path)
+        result.update(status="ok", files=len(snapshot.get("files", [])))
+    except (OSError, ValueError) as e:
+        result.update(status="invalid_json", error=str(e))
+    return [result]
+
+
+def _scan(directory, want_dirs=False, suffix=None):
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if want_dirs and entry.is_dir(follow_symlinks=False):
+                    yield entry
+                elif not want_dirs and entry.name.endswith(suffix):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def iter_record_work(space_path):
+    """Yield (check, args) work items for every version record, one directory at a time."""
+    for file_hash, dir_entry in iter_metadata_dirs(space_path):
+        for entry in _scan(dir_entry.path, suffix=".json"):
+            yield check_file_version, (space_path, file_hash, entry.path)
+
+
+def iter_store_work(space_path, referenced=None):
+    """Yield (check, args) work items for everything but the version records.
+
+    referenced is the set of object hashes the records point at; see check_object.
+    """
+    for file_hash, entry in iter_hash_dirs(augment_path(space_path, "file_versions")):
+        yield check_blob_dir, (space_path, file_hash, entry.path)
+
+    for content_hash, entry in iter_objects(space_path):
+        yield check_object, (space_path, content_hash, entry.path, referenced)
+
+    for entry in _scan(augment_path(space_path, "metadata"), suffix=".json"):
+        yield check_folder_version, (space_path, entry.path)
+
+    for entry in _scan(augment_path(space_path, "versions"), want_dirs=True):
+        yield check_folder_copy, (space_path, entry.path)
+
+    for entry in _scan(augment_path(space_path, "snapshots"), suffix=".json"):
+        yield check_snapshot, (space_path, entry.path)
+
+
+def iter_incremental_work(space_path, scanner):
+    """Yield work items only for version records that changed since the last scan."""
+    for change in scanner.changes():
+        if change["event"] == "upserted":
+            yield check_file_version, (space_path, change["pathHash"], change["path"], change["record"])
+
+
+def verify_space(space_path, workers=None, max_in_flight=None, incremental=False):
+    """Yield verification results for a space as they complete.
+
+    With incremental=True only new or modified version records are checked (see
+    store_scanner), and the scan state is committed once every result was produced. The
+    state is kept in verify_state.json, apart from the one the scanner CLI uses.
+    """
+    workers = workers or os.cpu_count() or 4
+    max_in_flight = max_in_flight or workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def run(work):
+            for results in bounded_map(executor, lambda item: item[0](*item[1]), work, max_in_flight):
+                yield from results
+
+        if incremental:
+            scanner = IncrementalScanner(space_path, augment_path(space_path, STATE_FILENAME),
+                                         augment_path(space_path, JOURNAL_FILENAME))
+            yield from run(iter_incremental_work(space_path, scanner))
+            scanner.commit()
+            return
+
+        # Every record is checked before objects/ is walked, so unreferenced objects are known.
+        referenced = set()
+        for result in run(iter_record_work(space_path)):
+            if is_object_path(space_path, result.get("blob")):
+                referenced.add(os.path.basename(result["blob"]))
+            yield result
+        yield from run(iter_store_work(space_path, referenced))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify the integrity of an Augment space.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker threads")
+    parser.add_argument("-o", "--output", help="write JSON lines here instead of stdout")
+    parser.add_argument("--problems-only", action="store_true", help="only emit results that are not ok")
+    parser.add_argument("--incremental", action="store_true", help="only check records changed since the last run")
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    counts = {}
+    try:
+        for result in verify_space(args.space, args.workers, incremental=args.incremental):
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            if args.problems_only and result["status"] == "ok":
+                continue
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    problems = sum(count for status, count in counts.items() if status in PROBLEM_STATUSES)
+    print(f"{'✅' if problems == 0 else '❌'} Verified {sum(counts.values())} items: {counts}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
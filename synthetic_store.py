@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Synthetic .augment store generator.
+
+Builds a space that looks like a real one at any scale: files spread over a nested
+directory tree, a long-tailed number of versions per file (most files have a few,
+some have many), log-normally distributed file sizes that drift a little between
+versions, and a configurable share of versions whose content duplicates an
+earlier version (reverts, copied files). Successive versions of a file are small
+edits of the previous one, as they are in practice, so delta packing and diffing
+behave realistically.
+
+Everything is driven by a seeded random.Random. Timestamps count back from `now`
+(the current time unless given), so the same parameters with a fixed `now`
+produce the same store apart from version ids.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from augment_store import add_version, create_space
+
+DAY = 24 * 3600
+WORDS = (
+    "the of and to in is for on that with as by this are be from at or it an was "
+    "file version space history snapshot folder document backup restore change update "
+    "draft final notes report image data config build test release fix merge branch "
+    "alpha beta gamma delta epsilon zeta theta lambda sigma omega"
+).split()
+
+DEFAULTS = {
+    "files": 100,
+    "versions_mean": 5.0,
+    "versions_max": 200,
+    "size_median": 4096,
+    "size_sigma": 1.0,
+    "size_max": 1024 * 1024,
+    "depth": 3,
+    "fanout": 4,
+    "duplicate_ratio": 0.1,
+    "span_days": 90.0,
+    "seed": 0,
+    "now": None,
+}
+
+
+def _text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if len(words) % 12 == 0:
+            words.append("\n")
+    return " ".join(words).encode("utf-8")[:size]
+
+
+def _edit(rng, content, size):
+    """Replace a random slice of content with new text and resize it to about size."""
+    if not content:
+        return _text(rng, size)
+    start = rng.randrange(len(content))
+    length = max(1, min(len(content) - start, size // 20 + 1))
+    edited = content[:start] + _text(rng, length) + content[start + length:]
+    if len(edited) < size:
+        edited += _text(rng, size - len(edited))
+    return edited[:size]
+
+
+def _directory(rng, space_path, depth, fanout):
+    parts = [f"dir{rng.randrange(fanout)}" for _ in range(rng.randint(0, depth))]
+    return os.path.join(space_path, *parts), len(parts)
+
+
+def generate_space(space_path, **params):
+    """Create a synthetic space at space_path; returns a manifest of what was written.
+
+    Parameters (see DEFAULTS): files, versions_mean, versions_max, size_median,
+    size_sigma, size_max, depth, fanout, duplicate_ratio, span_days, seed, now.
+    The manifest records the `now` that was used, so a run can be repeated.
+    """
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise TypeError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    p = {**DEFAULTS, **params}
+    if p["now"] is None:
+        p["now"] = time.time()
+    now = p["now"]
+    rng = random.Random(p["seed"])
+    create_space(space_path)
+
+    manifest = {"space": space_path, "params": p, "files": [], "versions": 0, "duplicates": 0,
+                "bytes": 0, "max_depth": 0}
+    pool = []
+    for i in range(p["files"]):
+        directory, depth = _directory(rng, space_path, p["depth"], p["fanout"])
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, f"file{i}.txt")
+        manifest["max_depth"] = max(manifest["max_depth"], depth)
+
+        # Long tail: 1 + exponential around the mean, capped
+        count = min(p["versions_max"], 1 + int(rng.expovariate(1 / max(p["versions_mean"] - 1, 1e-9))))
+        times = sorted(now - rng.uniform(0, p["span_days"] * DAY) for _ in range(count))
+        base_size = rng.lognormvariate(0, p["size_sigma"]) * p["size_median"]
+        content = b""
+        for n, timestamp in enumerate(times):
+            if pool and rng.random() < p["duplicate_ratio"]:
+                content = rng.choice(pool)
+                manifest["duplicates"] += 1
+            else:
+                size = min(p["size_max"], max(1, int(base_size * rng.uniform(0.9, 1.1))))
+                content = _edit(rng, content, size)
+                if len(pool) < 1000:
+                    pool.append(content)
+                else:
+                    pool[rng.randrange(len(pool))] = content
+            add_version(space_path, file_path, content, timestamp=timestamp, comment=f"v{n}")
+            manifest["bytes"] += len(content)
+        with open(file_path, "wb") as f:
+            f.write(content)
+        manifest["files"].append(file_path)
+        manifest["versions"] += count
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Augment space.")
+    parser.add_argument("space", help="where to create the space")
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float if value is None else type(value), default=value)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = generate_space(args.space, **{key: getattr(args, key) for key in DEFAULTS})
+    manifest["seconds"] = time.perf_counter() - started
+    manifest["files"] = len(manifest["files"])
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
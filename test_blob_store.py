@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import errno
+import os
+import shutil
+import tempfile
+
+import blob_store
+from augment_store import add_version, augment_path, create_space, load_file_versions
+from blob_store import compact, object_path, reference_counts, unreferenced_objects
+from store_verify import verify_space
+from version_index import VersionIndex
+
+
+def test_blob_store_compaction():
+    """Test that compaction deduplicates identical content and can be rerun safely."""
+
+    print("🧪 Testing Content-Addressed Blob Store...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_blob_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        copy = os.path.join(test_space, "copy of notes.md")
+        shared = "# Test Notes\n\n" + "x" * 1000
+        add_version(test_space, notes, shared, timestamp=1_700_000_000)
+        add_version(test_space, notes, "# Test Notes\n\nedited", timestamp=1_700_000_001)
+        add_version(test_space, notes, shared, timestamp=1_700_000_002)
+        add_version(test_space, copy, shared, timestamp=1_700_000_003)
+
+        with VersionIndex(test_space) as index:
+            index.refresh()
+        stats = compact(test_space)
+        print(f"   📊 {stats}")
+        with VersionIndex(test_space) as index:
+            assert index.db.execute("SELECT COUNT(*) FROM versions").fetchone()[0] == 0, "compact must drop stale rows"
+            index.refresh()
+            assert index.latest_versions(notes) == load_file_versions(test_space, notes)
+        assert stats["migrated"] == 4
+        assert stats["objects_created"] == 2
+        assert stats["deduplicated"] == 2
+        assert stats["bytes_reclaimed"] == 2 * len(shared)
+        assert os.listdir(augment_path(test_space, "file_versions")) == []
+
+        for version in load_file_versions(test_space, notes) + load_file_versions(test_space, copy):
+            assert version["storagePath"] == object_path(test_space, version["contentHash"])
+            assert os.path.exists(version["storagePath"])
+
+        counts = reference_counts(test_space)
+        assert sorted(counts.values()) == [1, 3]
+        assert list(unreferenced_objects(test_space, counts)) == []
+        assert {r["status"] for r in verify_space(test_space)} == {"ok"}
+
+        # Rerunning is a no-op
+        stats = compact(test_space)
+        assert stats["migrated"] == 0
+        assert stats["already_compacted"] == 4
+
+        print("🎉 Blob Store Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_compaction_across_devices():
+    """Test that a copied object never leaves a record pointing at a removed blob."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_blob_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    def cross_device(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    def crash(*args):
+        raise KeyboardInterrupt
+
+    saved_link, saved_write = os.link, blob_store.write_json_atomic
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        add_version(test_space, notes, "# Test Notes", timestamp=1_700_000_000)
+        os.link = cross_device
+        # Interrupted after the copy, before the record is rewritten
+        blob_store.write_json_atomic = crash
+        try:
+            compact(test_space)
+            raise AssertionError("compact should have been interrupted")
+        except KeyboardInterrupt:
+            pass
+        version = load_file_versions(test_space, notes)[0]
+        assert "objects" not in version["storagePath"] and os.path.exists(version["storagePath"])
+        assert {r["status"] for r in verify_space(test_space)} == {"ok", "orphan_blob"}
+
+        blob_store.write_json_atomic = saved_write
+        stats = compact(test_space)
+        assert stats["migrated"] == 1 and stats["objects_created"] == 1
+        assert stats["deduplicated"] == 0 and stats["bytes_reclaimed"] == 0, "our own copy is not a duplicate"
+        assert load_file_versions(test_space, notes)[0]["storagePath"] == object_path(test_space, version["contentHash"])
+        assert os.listdir(augment_path(test_space, "file_versions")) == []
+        assert {r["status"] for r in verify_space(test_space)} == {"ok"}
+    finally:
+        os.link, blob_store.write_json_atomic = saved_link, saved_write
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_blob_store_compaction()
+    test_compaction_across_devices()
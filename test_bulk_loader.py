@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, augment_path, calculate_file_path_hash, create_space, load_file_versions
+from bulk_loader import load_versions_async, load_versions_bulk
+
+
+def test_bulk_loader():
+    """Test that the bulk loader returns the same histories as the serial loader."""
+
+    print("🧪 Testing Bulk Loader...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_bulk_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        files = [os.path.join(test_space, f"file{i}.txt") for i in range(10)]
+        for i, path in enumerate(files):
+            for n in range(i):
+                add_version(test_space, path, f"v{n}", timestamp=1_700_000_000 + (n * 37) % 11, comment=f"v{n}")
+        missing = os.path.join(test_space, "never-versioned.txt")
+
+        # A corrupt record is skipped rather than failing the whole batch
+        with open(os.path.join(augment_path(test_space, "file_metadata", calculate_file_path_hash(files[3])), "bad.json"), "w") as f:
+            f.write("{")
+
+        results = load_versions_bulk(test_space, files + [missing, files[0]], concurrency=4)
+        assert list(results) == files + [missing]
+        assert results[missing] == []
+        for path in files:
+            if path == files[3]:
+                assert len(results[path]) == 3
+                continue
+            assert results[path] == load_file_versions(test_space, path)
+            timestamps = [v["timestamp"] for v in results[path]]
+            assert timestamps == sorted(timestamps, reverse=True)
+
+        assert asyncio.run(load_versions_async(test_space, files[5:], concurrency=2)) == {p: results[p] for p in files[5:]}
+
+        print("🎉 Bulk Loader Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_bulk_loader()
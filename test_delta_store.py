@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, calculate_file_path_hash, create_space, load_file_versions
+from blob_store import compact, object_path, unreferenced_objects
+from delta_store import add_delta_version, apply_delta, encode_delta, pack_file, read_version, unpack_file
+from store_verify import verify_space
+
+
+def test_delta_round_trip():
+    """Test that deltas rebuild the target exactly, including binary and empty content."""
+    pairs = [
+        (b"a\nb\nc\n", b"a\nB\nc\nd\n"),
+        (b"", b"new file\n"),
+        (b"no trailing newline", b"no trailing newline\nnow there is\n"),
+        (bytes(range(256)) * 4, bytes(range(255, -1, -1)) * 4),
+    ]
+    for base, target in pairs:
+        assert apply_delta(base, encode_delta(base, target)) == target
+
+
+def test_delta_chains():
+    """Test packing a history into bounded chains and unpacking it again."""
+
+    print("🧪 Testing Delta Chains...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_delta_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        lines = [f"line {i} of the notes file\n" for i in range(200)]
+        contents = []
+        for n in range(10):
+            lines[n * 3] = f"edited in version {n}\n"
+            contents.append("".join(lines).encode())
+            add_version(test_space, notes, contents[-1], timestamp=1_700_000_000 + n)
+
+        file_hash = calculate_file_path_hash(notes)
+        stats = pack_file(test_space, file_hash, max_chain=4)
+        print(f"   📊 {stats}")
+        assert stats["keyframes"] == 2 and stats["deltas"] == 8
+        assert stats["stored_bytes"] < stats["logical_bytes"] / 3
+
+        history = load_file_versions(test_space, notes)
+        assert max(v.get("chainDepth", 0) for v in history) == 4
+        assert [read_version(test_space, v) for v in reversed(history)] == contents
+        assert {r["status"] for r in verify_space(test_space)} == {"ok"}
+
+        # The chain is full, so the next version starts a keyframe and the one after extends it
+        for n in range(2):
+            contents.append(contents[-1] + b"appended\n")
+            version = add_delta_version(test_space, notes, contents[-1], timestamp=1_700_000_100 + n, max_chain=4)
+            assert version.get("chainDepth", 0) == n
+            assert read_version(test_space, version) == contents[-1]
+
+        assert unpack_file(test_space, file_hash) == 9
+        history = load_file_versions(test_space, notes)
+        assert not any("deltaBase" in v for v in history)
+        assert [read_version(test_space, v) for v in reversed(history)] == contents
+
+        print("🎉 Delta Chain Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_pack_skips_missing_and_binary_versions():
+    """Test that packing survives a lost blob, keeps binary copies and releases replaced objects."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_delta_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        twin = os.path.join(test_space, "twin.md")
+        contents = [b"".join(f"line {i} of version {n // 2}\n".encode() for i in range(50)) for n in range(6)]
+        contents[3] = b"\0binary" + contents[2]
+        for n, content in enumerate(contents):
+            add_version(test_space, notes, content + str(n).encode(), timestamp=1_700_000_000 + n)
+        add_version(test_space, twin, contents[1] + b"1")
+        compact(test_space)
+        history = load_file_versions(test_space, notes)[::-1]
+        os.remove(history[4]["storagePath"])
+
+        stats = pack_file(test_space, calculate_file_path_hash(notes))
+        assert stats["missing"] == 1 and stats["binary"] == 1
+        assert stats["deltas"] == 2 and stats["keyframes"] == 3
+        packed = {v["id"]: v for v in load_file_versions(test_space, notes)}
+        assert [packed[v["id"]].get("deltaBase") for v in history] == [None, history[0]["id"], history[1]["id"], None, None, None]
+        # The twin still refers to version 1's object; version 2's object is gone with its last reference
+        assert stats["objects_released"] == 1
+        assert os.path.exists(object_path(test_space, history[1]["contentHash"]))
+        assert not os.path.exists(object_path(test_space, history[2]["contentHash"]))
+        assert list(unreferenced_objects(test_space)) == []
+        assert [read_version(test_space, packed[v["id"]]) for v in history[:3]] == [c + str(n).encode() for n, c in enumerate(contents[:3])]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_delta_round_trip()
+    test_delta_chains()
+    test_pack_skips_missing_and_binary_versions()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import uuid
+
+from augment_store import add_version, augment_path, calculate_file_path_hash, create_space, load_file_versions
+from packed_metadata import RECORD, Segment, encode_segment, pack_space, read_segment, segment_path, unpack_space
+
+
+def test_record_round_trip():
+    """Test that every flavour of metadata record survives packing unchanged."""
+    versions = [
+        {   # written by the app
+            "id": str(uuid.uuid4()).upper(),
+            "filePath": "file:///Users/test/Space/notes.md",
+            "timestamp": "2025-06-01T10:00:00Z",
+            "size": 42,
+            "comment": None,
+            "contentHash": "ab" * 32,
+            "storagePath": "file:///Users/test/Space/.augment/file_versions/x/1.data",
+        },
+        {   # written by the Python test scripts
+            "id": str(uuid.uuid4()),
+            "filePath": "/tmp/TestSpace/test1.txt",
+            "timestamp": "2025-06-01T10:00:01.123456Z",
+            "size": 19,
+            "comment": "Version 1",
+            "contentHash": "hash_1",
+            "storagePath": "/tmp/TestSpace/.augment/file_versions/x/2.data",
+        },
+        {   # delta record with extra keys
+            "id": "not-a-uuid",
+            "filePath": "/tmp/TestSpace/test1.txt",
+            "timestamp": "2025-06-01T12:00:00+02:00",
+            "size": 7,
+            "comment": "ünïcode ✅",
+            "contentHash": "cd" * 32,
+            "storagePath": "relative.delta",
+            "deltaBase": "2",
+            "chainDepth": 3,
+        },
+        {"id": str(uuid.uuid4()).upper(), "timestamp": "2025-06-02T00:00:00Z", "size": 0},
+    ]
+
+    data = encode_segment(versions)
+    temp_dir = tempfile.mkdtemp(prefix="augment_packed_test_")
+    try:
+        path = os.path.join(temp_dir, "test.seg")
+        with open(path, "wb") as f:
+            f.write(data)
+        decoded = read_segment(path)
+        assert sorted(decoded, key=lambda v: v["id"]) == sorted(versions, key=lambda v: v["id"])
+        with Segment(path) as segment:
+            assert [v["id"] for v in segment.newest(2)] == [versions[3]["id"], versions[1]["id"]]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_pack_and_unpack_space():
+    """Test converting a space to segments and back to JSON."""
+
+    print("🧪 Testing Packed Metadata...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_packed_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        for n in range(50):
+            add_version(test_space, notes, f"v{n}", timestamp=1_700_000_000 + n, comment=f"Version {n}")
+        original = load_file_versions(test_space, notes)
+
+        stats = pack_space(test_space)
+        print(f"   📊 {stats}")
+        assert stats["records"] == 50
+        assert stats["segment_bytes"] < stats["json_bytes"] / 2
+        assert load_file_versions(test_space, notes) == original, "packing keeps the JSON records"
+
+        with Segment(segment_path(test_space, calculate_file_path_hash(notes))) as segment:
+            assert len(segment) == 50
+            assert list(segment.newest(3)) == original[:3]
+            # Fixed record plus the interned storage name and comment of each version
+            assert os.path.getsize(segment.path) < 50 * (RECORD.size + 80) + 500
+
+        # Re-packing follows the JSON records: deleted versions leave the segment, and a
+        # record that cannot be parsed keeps the copy the segment already had
+        metadata_dir = os.path.dirname(original[0]["storagePath"]).replace("file_versions", "file_metadata")
+        for version in original[:10]:
+            os.remove(os.path.join(metadata_dir, f"{version['id']}.json"))
+        damaged = os.path.join(metadata_dir, f"{original[10]['id']}.json")
+        with open(damaged, "w") as f:
+            f.write("{")
+        with open(os.path.join(metadata_dir, "broken.json"), "w") as f:
+            f.write("{")
+        latest = add_version(test_space, notes, "v50", timestamp=1_700_000_050, comment="Version 50")
+        stats = pack_space(test_space)
+        assert stats["records"] == 41 and stats["unreadable"] == 2 and stats["dropped"] == 10
+        assert pack_space(test_space)["records"] == 41
+        os.remove(os.path.join(metadata_dir, "broken.json"))
+        expected = [latest] + original[10:]
+
+        # A directory whose records are all gone loses its segment
+        other = os.path.join(test_space, "other.md")
+        add_version(test_space, other, "gone soon")
+        pack_space(test_space)
+        shutil.rmtree(os.path.dirname(damaged).replace(calculate_file_path_hash(notes), calculate_file_path_hash(other)))
+        assert pack_space(test_space)["dropped"] == 1
+        assert not os.path.exists(segment_path(test_space, calculate_file_path_hash(other)))
+
+        assert unpack_space(test_space, remove_segments=True) == 41
+        assert load_file_versions(test_space, notes) == expected, "unpacking repairs the damaged record"
+        assert os.listdir(augment_path(test_space, "packed_metadata")) == []
+
+        print("🎉 Packed Metadata Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_record_round_trip()
+    test_pack_and_unpack_space()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, augment_path, create_space, load_file_versions
+from path_hash import (
+    PathHashDirectory,
+    calculate_file_path_hash,
+    legacy_path_hash,
+    path_hashes,
+    resolve_hash_dir,
+)
+from version_index import VersionIndex
+
+
+def test_path_hash_definition():
+    """Test that the shared hash matches the app's full SHA-256 digest."""
+    path = "/Users/saadmomin/Desktop/auto4 copy 3/app_test_1.txt"
+    assert calculate_file_path_hash(path) == hashlib.sha256(path.encode("utf-8")).hexdigest()
+    assert len(calculate_file_path_hash(path)) == 64
+    assert legacy_path_hash(path) == calculate_file_path_hash(path)[:16]
+    assert path_hashes([path, "/b", path]) == {path: calculate_file_path_hash(path), "/b": calculate_file_path_hash("/b")}
+
+
+def test_legacy_directory_resolution():
+    """Test that histories stored under the truncated name are still found."""
+
+    print("🧪 Testing Path Hash Resolution...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_hash_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        modern = os.path.join(test_space, "modern.txt")
+        legacy = os.path.join(test_space, "legacy.txt")
+        missing = os.path.join(test_space, "missing.txt")
+        add_version(test_space, modern, "modern", timestamp=1_700_000_000)
+        add_version(test_space, legacy, "legacy", timestamp=1_700_000_000)
+        for subdir in ("file_metadata", "file_versions"):
+            os.rename(
+                augment_path(test_space, subdir, calculate_file_path_hash(legacy)),
+                augment_path(test_space, subdir, legacy_path_hash(legacy)),
+            )
+
+        metadata_root = augment_path(test_space, "file_metadata")
+        directory = PathHashDirectory(metadata_root)
+        resolved = directory.resolve_many([modern, legacy, missing])
+        assert resolved[modern] == os.path.join(metadata_root, calculate_file_path_hash(modern))
+        assert resolved[legacy] == os.path.join(metadata_root, legacy_path_hash(legacy))
+        assert resolved[missing] is None
+        assert resolve_hash_dir(metadata_root, legacy) == resolved[legacy]
+
+        assert not directory.stale()
+        add_version(test_space, missing, "now it exists")
+        assert directory.stale()
+        directory.refresh()
+        assert directory.resolve(missing) is not None
+
+        # Cached lookups: an old listing answers a miss without probing candidate names
+        os.utime(metadata_root, ns=(0, 1_000_000_000))
+        directory.refresh()
+        real_isdir = os.path.isdir
+        probes = []
+        os.path.isdir = lambda path: probes.append(path) or real_isdir(path)
+        try:
+            assert directory.lookup(os.path.join(test_space, "never.txt")) is None
+            assert probes == []
+            assert directory.lookup(legacy) == resolved[legacy] and len(probes) == 1
+        finally:
+            os.path.isdir = real_isdir
+        late = os.path.join(test_space, "late.txt")
+        add_version(test_space, late, "created after the listing")
+        assert directory.lookup(late) == os.path.join(metadata_root, calculate_file_path_hash(late))
+
+        # A directory created within the listing's mtime tick is still found
+        directory.refresh()
+        later = os.path.join(test_space, "later.txt")
+        add_version(test_space, later, "same tick")
+        os.utime(metadata_root, ns=(directory.mtime_ns, directory.mtime_ns))
+        assert directory.lookup(later) == os.path.join(metadata_root, calculate_file_path_hash(later))
+
+        assert len(load_file_versions(test_space, legacy)) == 1
+        with VersionIndex(test_space) as index:
+            assert [v["filePath"] for v in index.latest_versions(legacy)] == [legacy]
+
+        print("🎉 Path Hash Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_path_hash_definition()
+    test_legacy_directory_resolution()
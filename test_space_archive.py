@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from augment_store import add_version, augment_path, create_space, load_file_versions
+from blob_store import compact
+from delta_store import add_delta_version, read_version
+from space_archive import export_space, import_space, read_index
+from store_verify import verify_space
+
+
+def _tree(root):
+    digests = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                digests[os.path.relpath(path, root)] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def _make_space(temp_dir):
+    space = os.path.join(temp_dir, "TestSpace")
+    create_space(space)
+    notes = os.path.join(space, "docs", "notes.txt")
+    big = os.path.join(space, "big.bin")
+    for n in range(3):
+        add_version(space, notes, f"notes {n}\n" * 50, timestamp=1_700_000_000 + n)
+    add_version(space, big, os.urandom(10_000), timestamp=1_700_000_000)
+    compact(space)
+    # Not compacted, so the archive has to deduplicate it
+    add_version(space, os.path.join(space, "copy.txt"), "notes 0\n" * 50, timestamp=1_700_000_000)
+    add_delta_version(space, notes, "notes 3\n" * 50, timestamp=1_700_000_003)
+
+    folder_id = "0B6E3F5C-6C59-4E0F-9A59-4E4C3C2F9F10"
+    os.makedirs(augment_path(space, "versions", folder_id, "docs"))
+    with open(augment_path(space, "versions", folder_id, "docs", "notes.txt"), "w") as f:
+        f.write("folder copy")
+    # A user's JSON file inside a folder copy must not be touched on import
+    with open(augment_path(space, "versions", folder_id, "docs", "build.json"), "w") as f:
+        json.dump({"root": os.path.join(space, "build"), "n": 1}, f)
+    with open(augment_path(space, "metadata", f"{folder_id}.json"), "w") as f:
+        json.dump({"id": folder_id, "storagePath": augment_path(space, "versions", folder_id)}, f)
+    with open(augment_path(space, "snapshots", "snap.json"), "w") as f:
+        json.dump({"spacePath": Path(space).as_uri(), "files": [{"filePath": Path(notes).as_uri()}]}, f)
+    with open(augment_path(space, "version_index.db"), "w") as f:
+        f.write("derived")
+    return space, notes
+
+
+def test_space_archive():
+    """Test that export/import round-trips a space, in place and relocated."""
+
+    print("🧪 Testing Space Archive...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_archive_test_")
+    try:
+        space, notes = _make_space(temp_dir)
+        archive = os.path.join(temp_dir, "space.augarc")
+        before = {k: v for k, v in _tree(augment_path(space)).items() if k != "version_index.db"}
+
+        stats = export_space(space, archive, workers=4, chunk_size=1024)
+        print(f"   📊 {stats}")
+        assert stats["unique_chunks"] < stats["chunks"] and stats["deduplicated_bytes"] > 0
+        index = read_index(archive)
+        assert "version_index.db" not in {entry["path"] for entry in index["files"]}
+        assert max(len(entry["chunks"]) for entry in index["files"]) == 10
+
+        # Same location: byte-identical
+        try:
+            import_space(archive, space)
+            assert False, "importing over an existing store must need force"
+        except FileExistsError:
+            pass
+        shutil.rmtree(augment_path(space))
+        result = import_space(archive, space, workers=4)
+        assert not result["relocated"]
+        assert _tree(augment_path(space)) == before
+
+        # Another machine, another path: records follow the move
+        moved = os.path.join(temp_dir, "elsewhere", "Moved")
+        import_space(archive, moved)
+        moved_notes = os.path.join(moved, "docs", "notes.txt")
+        versions = load_file_versions(moved, moved_notes)
+        assert [read_version(moved, v) for v in versions] == [read_version(space, v) for v in load_file_versions(space, notes)]
+        assert all(v["filePath"] == moved_notes for v in versions)
+        with open(augment_path(moved, "snapshots", "snap.json")) as f:
+            snapshot = json.load(f)
+        assert snapshot["spacePath"] == Path(moved).as_uri()
+        assert snapshot["files"][0]["filePath"] == Path(moved_notes).as_uri()
+        assert {r["status"] for r in verify_space(moved)} == {"ok"}
+        user_json = os.path.join("versions", "0B6E3F5C-6C59-4E0F-9A59-4E4C3C2F9F10", "docs", "build.json")
+        assert _tree(augment_path(moved))[user_json] == before[user_json]
+
+        print("🎉 Space Archive Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_truncated_archive():
+    """Test that a truncated archive is rejected instead of half-imported."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_archive_test_")
+    try:
+        space, _ = _make_space(temp_dir)
+        archive = os.path.join(temp_dir, "space.augarc")
+        export_space(space, archive)
+        with open(archive, "r+b") as f:
+            f.truncate(os.path.getsize(archive) - 5)
+        try:
+            import_space(archive, os.path.join(temp_dir, "Target"))
+            assert False, "truncated archive must be rejected"
+        except ValueError:
+            pass
+        assert not os.path.exists(os.path.join(temp_dir, "Target"))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_space_archive()
+    test_truncated_archive()
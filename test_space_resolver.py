@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+
+from augment_store import augment_path, create_space
+from space_resolver import SpaceResolver
+
+
+def test_space_resolver():
+    """Test cached space-root resolution, negative caching and invalidation."""
+
+    print("🧪 Testing Space Resolver...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_resolver_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    outside = os.path.join(temp_dir, "Outside")
+    deep = os.path.join(test_space, "a", "b", "c")
+    os.makedirs(deep)
+    os.makedirs(outside)
+    create_space(test_space)
+
+    try:
+        resolver = SpaceResolver()
+        files = [os.path.join(deep, f"file{i}.txt") for i in range(100)]
+        results = resolver.resolve_many(files + [os.path.join(test_space, "top.txt")])
+        assert set(results.values()) == {test_space}
+        # c, b, a and the space itself are each checked once
+        assert resolver.stat_calls == 4
+        print(f"   ✅ 101 files resolved with {resolver.stat_calls} stat calls")
+
+        outside_file = os.path.join(outside, "loose.txt")
+        assert resolver.resolve(outside_file) is None
+        calls = resolver.stat_calls
+        assert resolver.resolve(outside_file) is None
+        assert resolver.stat_calls == calls
+
+        # A nested space appears: cached answers below it must be dropped
+        nested = os.path.join(test_space, "a", "b")
+        create_space(nested)
+        resolver.augment_dir_changed(augment_path(nested))
+        assert resolver.resolve(files[0]) == nested
+        assert resolver.resolve(os.path.join(test_space, "a", "x.txt")) == test_space
+
+        shutil.rmtree(augment_path(nested))
+        resolver.augment_dir_changed(augment_path(nested))
+        assert resolver.resolve(files[0]) == test_space
+
+        # Overflowing the cache starts over rather than growing without bound
+        small = SpaceResolver(max_entries=2)
+        assert small.resolve(files[0]) == test_space
+        assert len(small.cache) <= 4
+
+        print("🎉 Space Resolver Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_space_resolver()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import errno
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, create_space, load_file_versions
+from blob_store import compact
+from delta_store import add_delta_version
+from space_restore import _restore_one, fast_copy, restore_space
+
+T0 = 1_700_000_000
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_point_in_time_restore():
+    """Test that a restore reproduces the space exactly as it was at T."""
+
+    print("🧪 Testing Point-in-Time Restore...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_restore_test_")
+    space = os.path.join(temp_dir, "TestSpace")
+    create_space(space)
+
+    try:
+        a = os.path.join(space, "a.txt")
+        b = os.path.join(space, "sub", "dir", "b.txt")
+        c = os.path.join(space, "c.txt")
+        for n in range(5):
+            add_version(space, a, f"a{n}", timestamp=T0 + n * 100)
+        b0 = "same line\n" * 200
+        add_version(space, b, b0, timestamp=T0 + 150)
+        compact(space)
+        add_delta_version(space, b, b0 + "b1\n", timestamp=T0 + 250)
+        add_version(space, c, "created later", timestamp=T0 + 1000)
+
+        for use_index in (True, False):
+            target = os.path.join(temp_dir, f"restored-{use_index}")
+            stats = restore_space(space, T0 + 260, target, workers=4, use_index=use_index)
+            print(f"   📊 {stats}")
+            assert stats["files"] == 2 and stats["missing"] == 0
+            assert stats["methods"].get("delta") == 1
+            assert _read(os.path.join(target, "a.txt")) == b"a2"
+            assert _read(os.path.join(target, "sub", "dir", "b.txt")) == (b0 + "b1\n").encode()
+            assert not os.path.exists(os.path.join(target, "c.txt"))
+            assert os.path.getmtime(os.path.join(target, "a.txt")) == T0 + 200
+
+        # ISO timestamps work too, and an existing target is only swapped on request
+        target = os.path.join(temp_dir, "restored-True")
+        try:
+            restore_space(space, "2023-11-14T22:17:00Z", target)
+            assert False, "existing target must need replace=True"
+        except FileExistsError:
+            pass
+        stats = restore_space(space, "2023-11-14T22:17:00Z", target, replace=True)
+        assert stats["files"] == 2
+        assert _read(os.path.join(target, "a.txt")) == b"a2"
+        assert _read(os.path.join(target, "sub", "dir", "b.txt")) == b0.encode()
+        assert sorted(os.listdir(temp_dir)) == ["TestSpace", "restored-False", "restored-True"]
+
+        # A version whose blob is gone is reported, and leaves no empty file behind
+        os.remove(add_version(space, c, "blob lost", timestamp=T0 + 2000)["storagePath"])
+        for use_index in (True, False):
+            target = os.path.join(temp_dir, f"lost-{use_index}")
+            stats = restore_space(space, T0 + 2000, target, use_index=use_index)
+            assert stats["missing"] == 1 and stats["files"] == 2
+            assert not os.path.exists(os.path.join(target, "c.txt"))
+            assert sorted(os.listdir(target)) == ["a.txt", "sub"]
+
+        # An index row that predates a rewrite of its record falls back to the record
+        stale = {**load_file_versions(space, a)[0], "storagePath": os.path.join(temp_dir, "gone.data")}
+        staging = os.path.join(temp_dir, "stale")
+        assert _restore_one(space, staging, stale)[0] != "missing"
+        assert _read(os.path.join(staging, "a.txt")) == b"a4"
+
+        # A crash between the two renames of a swap: the old tree comes back on the next run
+        target = os.path.join(temp_dir, "restored-True")
+        os.rename(target, f"{target}.previous")
+        try:
+            restore_space(space, T0 + 260, target)
+            assert False, "the recovered target must need replace=True"
+        except FileExistsError:
+            pass
+        assert _read(os.path.join(target, "a.txt")) == b"a2" and not os.path.exists(f"{target}.previous")
+
+        print("🎉 Point-in-Time Restore Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_fast_copy():
+    """Test that fast_copy produces identical files whatever method it picks."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_restore_test_")
+    try:
+        source = os.path.join(temp_dir, "source")
+        payload = os.urandom(3 * 1024 * 1024 + 17)
+        with open(source, "wb") as f:
+            f.write(payload)
+        for name in ("one", "two"):
+            method = fast_copy(source, os.path.join(temp_dir, name))
+            assert method in ("reflink", "copy_file_range", "sendfile", "copy")
+            assert _read(os.path.join(temp_dir, name)) == payload
+        open(os.path.join(temp_dir, "empty"), "wb").close()
+        fast_copy(os.path.join(temp_dir, "empty"), os.path.join(temp_dir, "empty2"))
+        assert _read(os.path.join(temp_dir, "empty2")) == b""
+
+        # Kernel copy paths that refuse (macOS sendfile wants a socket) fall back to a plain copy
+        def refuse(*args):
+            raise OSError(errno.ENOTSOCK, "Socket operation on non-socket")
+        saved = {name: getattr(os, name) for name in ("sendfile", "copy_file_range") if hasattr(os, name)}
+        try:
+            for name in saved:
+                setattr(os, name, refuse)
+            assert fast_copy(source, os.path.join(temp_dir, "three")) in ("reflink", "copy")
+        finally:
+            for name, fn in saved.items():
+                setattr(os, name, fn)
+        assert _read(os.path.join(temp_dir, "three")) == payload
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_point_in_time_restore()
+    test_fast_copy()
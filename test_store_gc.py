@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, augment_path, parse_timestamp, calculate_file_path_hash, create_space, load_file_versions
+from blob_store import compact, unreferenced_objects
+from delta_store import pack_file, read_version
+from packed_metadata import pack_space, segment_path
+from store_gc import _apply, _save_progress, execute_plan, pending_plan, plan_gc, write_plan
+from store_verify import verify_space
+from version_history import HistoryCursor
+
+NOW = 1_700_000_000
+DAY = 24 * 3600
+
+
+def _make_space(temp_dir):
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    files = [os.path.join(test_space, f"file{i}.txt") for i in range(3)]
+    for i, path in enumerate(files):
+        for n in range(10):
+            # Version n of every file is (10 - n) days old and 100 bytes
+            add_version(test_space, path, f"{i}:{n}".ljust(100, "."), timestamp=NOW - (10 - n) * DAY)
+    return test_space, files
+
+
+def _run(space, **policies):
+    stats = {}
+    write_plan(space, plan_gc(space, now=NOW, stats=stats, **policies))
+    execute_plan(space, batch_size=4)
+    return stats
+
+
+def test_gc_policies():
+    """Test age, count and size policies and the dry-run byte estimate."""
+
+    print("🧪 Testing Garbage Collection...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_gc_test_")
+    try:
+        space, files = _make_space(temp_dir)
+
+        stats = {}
+        entries = list(plan_gc(space, max_age_days=5.5, now=NOW, stats=stats))
+        assert stats["deleted"] == 15 and stats["bytes_freed"] == 1500
+        assert len(load_file_versions(space, files[0])) == 10, "planning must not delete anything"
+
+        stats = _run(space, max_age_days=5.5, max_versions=3)
+        print(f"   📊 {stats}")
+        assert stats["by_reason"] == {"age": 15, "count": 6}
+        for path in files:
+            assert len(load_file_versions(space, path)) == 3
+            assert parse_timestamp(load_file_versions(space, path)[-1]["timestamp"]) == NOW - 3 * DAY
+
+        # 9 versions of 100 bytes remain; a 500 byte budget drops the 4 oldest overall
+        stats = _run(space, max_size=500)
+        assert stats["by_reason"] == {"size": 4}
+        remaining = [v for path in files for v in load_file_versions(space, path)]
+        assert len(remaining) == 5
+        assert all(parse_timestamp(v["timestamp"]) >= NOW - 2 * DAY for v in remaining)
+        assert {r["status"] for r in verify_space(space)} == {"ok"}
+        assert pending_plan(space) is None
+
+        print("🎉 Garbage Collection Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_gc_keeps_shared_objects_and_delta_chains():
+    """Test that GC never breaks shared objects or delta chains."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_gc_test_")
+    try:
+        space, files = _make_space(temp_dir)
+        twin = os.path.join(space, "twin.txt")
+        add_version(space, twin, "0:0".ljust(100, "."), timestamp=NOW)
+        compact(space)
+        pack_file(space, calculate_file_path_hash(files[1]), max_chain=20)
+        expected = [read_version(space, v) for v in load_file_versions(space, files[1])[:2]]
+
+        _run(space, max_versions=2)
+        assert [read_version(space, v) for v in load_file_versions(space, files[1])] == expected
+        assert len(load_file_versions(space, twin)) == 1
+        assert {r["status"] for r in verify_space(space)} == {"ok"}
+        assert list(unreferenced_objects(space)) == []
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def _blob_bytes(space):
+    total = 0
+    for area in ("file_versions", "objects"):
+        for directory, _, names in os.walk(augment_path(space, area)):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in names)
+    return total
+
+
+def test_gc_size_budget_counts_objects_and_materialized_copies():
+    """Test that shared objects count against max_size and bytes_freed matches the disk."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_gc_test_")
+    try:
+        space, files = _make_space(temp_dir)
+        compact(space)
+        stats = _run(space, max_size=500)
+        assert stats["by_reason"] == {"size": 25}
+        assert sum(len(load_file_versions(space, path)) for path in files) == 5
+
+        # Deleting delta bases rewrites kept dependents as full copies; the estimate says so
+        space, files = _make_space(os.path.join(temp_dir, "deltas"))
+        for path in files:
+            pack_file(space, calculate_file_path_hash(path), max_chain=20)
+        before = _blob_bytes(space)
+        stats = _run(space, max_versions=3)
+        assert stats["bytes_freed"] == before - _blob_bytes(space)
+        assert {r["status"] for r in verify_space(space)} == {"ok"}
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_gc_deletes_whole_chain_prefixes():
+    """Test that a delta deleted along with its base is never materialized, and segments go stale."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_gc_test_")
+    try:
+        for policies in ({"max_age_days": 5.5}, {"max_size": 600}, {"max_age_days": 7.5, "max_size": 600}):
+            space, files = _make_space(os.path.join(temp_dir, str(len(os.listdir(temp_dir)))))
+            for path in files:
+                pack_file(space, calculate_file_path_hash(path), max_chain=20)
+            pack_space(space)
+            plan = [e for e in plan_gc(space, now=NOW, **policies) if e["op"] == "delete"]
+            deleted = {e["id"] for e in plan}
+            assert not [d for e in plan for d in e["dependents"] if d in deleted], "deleted deltas are not materialized"
+            before = _blob_bytes(space)
+            stats = _run(space, **policies)
+            assert stats["deleted"] > 3, policies
+            assert stats["bytes_freed"] == before - _blob_bytes(space), policies
+            assert {r["status"] for r in verify_space(space)} == {"ok"}
+            for path in files:
+                assert not os.path.exists(segment_path(space, calculate_file_path_hash(path)))
+                with HistoryCursor(space, path) as cursor:
+                    assert [v["id"] for v in cursor] == [v["id"] for v in load_file_versions(space, path)]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_gc_resumes_interrupted_plan():
+    """Test that a run killed mid-batch finishes from the saved progress."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_gc_test_")
+    try:
+        space, files = _make_space(temp_dir)
+        assert write_plan(space, plan_gc(space, max_versions=4, now=NOW)) == 18
+
+        # Simulate a crash after the first batch of 4 and part of the second
+        with open(pending_plan(space)) as f:
+            for entry in [json.loads(line) for line in f][:6]:
+                _apply(space, entry)
+        _save_progress(space, 4)
+
+        stats = execute_plan(space, batch_size=4)
+        assert stats["resumed_at"] == 4 and stats["applied"] == 14
+        assert [len(load_file_versions(space, path)) for path in files] == [4, 4, 4]
+        assert {r["status"] for r in verify_space(space)} == {"ok"}
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_gc_policies()
+    test_gc_keeps_shared_objects_and_delta_chains()
+    test_gc_size_budget_counts_objects_and_materialized_copies()
+    test_gc_deletes_whole_chain_prefixes()
+    test_gc_resumes_interrupted_plan()
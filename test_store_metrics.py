@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+import augment_store
+import bulk_loader
+from augment_store import add_version, create_space, load_file_versions
+from space_resolver import SpaceResolver
+from store_metrics import REGISTRY, SamplingProfiler, instrument, uninstrument
+from store_verify import verify_space
+
+
+def test_store_metrics():
+    """Test that instrumentation records the hot paths and can be removed again."""
+
+    print("🧪 Testing Store Metrics...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_metrics_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    originals = (augment_store.load_version_metadata, bulk_loader.load_version_metadata, SpaceResolver.resolve_dir)
+
+    try:
+        REGISTRY.reset()
+        operations = instrument()
+        assert {"json_parse", "space_root", "blob_write", "verify"} <= set(operations)
+        assert bulk_loader.load_version_metadata is not originals[1], "from-imports are wrapped too"
+
+        path = os.path.join(test_space, "notes.txt")
+        for n in range(3):
+            augment_store.add_version(test_space, path, "x" * 100, timestamp=1_700_000_000 + n)
+        assert len(augment_store.load_file_versions(test_space, path)) == 3
+        bulk_loader.load_versions_bulk(test_space, [path])
+        SpaceResolver().resolve(path)
+        results = list(verify_space(test_space))
+
+        metrics = REGISTRY.to_json()
+        print(f"   📊 {sorted(metrics)}")
+        assert metrics["blob_write"]["calls"] == 3 and metrics["blob_write"]["bytes"] == 300
+        assert metrics["history_load"]["calls"] == 1
+        assert metrics["json_parse"]["calls"] >= 6 and metrics["json_parse"]["bytes"] > 0
+        assert metrics["space_root"]["calls"] == 1
+        assert metrics["verify"]["calls"] == 1 and metrics["verify_file_version"]["calls"] == len(
+            [r for r in results if r["kind"] == "file_version"])
+        assert sum(metrics["json_parse"]["buckets"].values()) == metrics["json_parse"]["calls"]
+
+        text = REGISTRY.to_prometheus()
+        assert '# TYPE augment_store_op_duration_seconds histogram' in text
+        assert 'augment_store_op_calls_total{op="blob_write"} 3' in text
+        assert f'augment_store_op_duration_seconds_bucket{{op="blob_write",le="+Inf"}} 3' in text
+
+        # Errors are counted and re-raised
+        try:
+            augment_store.load_version_metadata(os.path.join(temp_dir, "missing.json"))
+        except FileNotFoundError:
+            pass
+        assert REGISTRY.to_json()["json_parse"]["errors"] == 1
+    finally:
+        uninstrument()
+        shutil.rmtree(temp_dir)
+
+    # Disabled means the original functions, so no overhead at all
+    assert (augment_store.load_version_metadata, bulk_loader.load_version_metadata, SpaceResolver.resolve_dir) == originals
+    assert load_file_versions is augment_store.load_file_versions and add_version is augment_store.add_version
+
+    print("🎉 Store Metrics Test: ✅ PASSED")
+
+
+def test_uninstrument_covers_late_imports():
+    """Test that a module imported while instrumented gets the originals back too."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_metrics_test_")
+    with open(os.path.join(temp_dir, "late_probe.py"), "w") as f:
+        f.write("from augment_store import load_version_metadata\n")
+    original = augment_store.load_version_metadata
+    sys.path.insert(0, temp_dir)
+    try:
+        instrument()
+        late_probe = importlib.import_module("late_probe")
+        assert late_probe.load_version_metadata is not original
+    finally:
+        uninstrument()
+        sys.path.remove(temp_dir)
+        sys.modules.pop("late_probe", None)
+        shutil.rmtree(temp_dir)
+    assert late_probe.load_version_metadata is original
+
+
+def _busy_loop_for_profiler():
+    total = 0
+    for i in range(3_000_000):
+        total += i
+    return total
+
+
+def test_sampling_profiler():
+    """Test that the profiler captures folded stacks of the running code."""
+    with SamplingProfiler(interval=0.001) as profiler:
+        _busy_loop_for_profiler()
+    folded = profiler.folded()
+    assert "_busy_loop_for_profiler" in folded
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+
+
+if __name__ == "__main__":
+    test_store_metrics()
+    test_uninstrument_covers_late_imports()
+    test_sampling_profiler()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, augment_path, calculate_file_path_hash, create_space, is_sharded, load_file_versions
+from delta_store import pack_file, read_version
+from path_hash import PathHashDirectory, shard_path
+from store_reshard import reshard_space
+from store_verify import verify_space
+from version_index import VersionIndex
+
+
+def _contents(space, files):
+    return {path: [read_version(space, v) for v in load_file_versions(space, path)] for path in files}
+
+
+def _problems(space):
+    return [r for r in verify_space(space, workers=2) if r["status"] != "ok"]
+
+
+def test_reshard_round_trip():
+    """Test an incremental flat -> sharded migration and back, with deltas and a version index."""
+
+    print("🧪 Testing Online Resharding...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_reshard_test_")
+    space = os.path.join(temp_dir, "TestSpace")
+    create_space(space)
+    try:
+        files = [os.path.join(space, f"file{i}.txt") for i in range(4)]
+        for i, path in enumerate(files):
+            for n in range(3):
+                add_version(space, path, "".join(f"{i} line {k} v{n if k == 5 else 0}\n" for k in range(50)),
+                            timestamp=1_700_000_000 + n)
+        pack_file(space, calculate_file_path_hash(files[0]))
+        expected = _contents(space, files)
+        with VersionIndex(space) as index:
+            index.refresh()
+
+        stats = reshard_space(space, sharded=True, limit=1)
+        print(f"   📊 first pass: {stats}")
+        assert stats["moved"] == 1 and stats["remaining"] == 3
+        assert is_sharded(space)
+        assert _contents(space, files) == expected, "a half-migrated space must read the same"
+        assert _problems(space) == []
+
+        # New files go straight to the sharded layout while old ones are still moving
+        extra = os.path.join(space, "new.txt")
+        add_version(space, extra, "brand new")
+        extra_hash = calculate_file_path_hash(extra)
+        assert os.path.isdir(shard_path(augment_path(space, "file_metadata"), extra_hash))
+        assert os.path.isdir(shard_path(augment_path(space, "file_versions"), extra_hash))
+
+        stats = reshard_space(space, sharded=True)
+        assert stats["moved"] == 3 and stats["remaining"] == 0
+        for kind in ("file_metadata", "file_versions"):
+            assert all(len(name) == 2 for name in os.listdir(augment_path(space, kind))), "no flat dirs left"
+        assert _contents(space, files) == expected
+        assert _problems(space) == []
+
+        names = PathHashDirectory(augment_path(space, "file_metadata"))
+        assert names.resolve(files[1]) == shard_path(augment_path(space, "file_metadata"), calculate_file_path_hash(files[1]))
+
+        with VersionIndex(space) as index:
+            index.refresh()
+            latest = index.latest_versions(files[2], limit=1)[0]
+            assert os.path.exists(latest["storagePath"]), "index rows must follow the move"
+        print("   ✅ sharded: every version readable, index up to date")
+
+        stats = reshard_space(space, sharded=False)
+        assert stats["moved"] == 5 and not is_sharded(space)
+        assert _contents(space, files) == expected
+        assert sorted(os.listdir(augment_path(space, "file_metadata"))) == sorted(
+            calculate_file_path_hash(path) for path in files + [extra]
+        )
+        assert _problems(space) == []
+        print("   ✅ back to flat")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_reshard_round_trip()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import time
+
+from augment_store import add_version, augment_path, calculate_file_path_hash, create_space
+from store_scanner import IncrementalScanner
+from store_verify import verify_space
+
+
+def _age(space_path, seconds):
+    """Pretend everything in file_metadata/ was written `seconds` ago."""
+    past = time.time() - seconds
+    for root, dirs, files in os.walk(augment_path(space_path, "file_metadata")):
+        for name in dirs + files:
+            os.utime(os.path.join(root, name), (past, past))
+
+
+def test_incremental_scanner():
+    """Test that later scans only read directories and records that changed."""
+
+    print("🧪 Testing Incremental Scanner...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_scanner_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        files = [os.path.join(test_space, f"file{i}.txt") for i in range(5)]
+        for path in files:
+            for n in range(4):
+                add_version(test_space, path, f"{path} v{n}", timestamp=1_700_000_000 + n)
+        _age(test_space, 3600)
+
+        scanner = IncrementalScanner(test_space)
+        changes = list(scanner.changes())
+        assert len(changes) == 20 and scanner.stats["read"] == 20
+        scanner.commit()
+
+        # Nothing changed: every directory is skipped
+        scanner = IncrementalScanner(test_space)
+        assert list(scanner.changes()) == []
+        assert scanner.stats["skipped_dirs"] == 5 and scanner.stats["read"] == 0
+        scanner.commit()
+
+        # One new version and one deleted record
+        added = add_version(test_space, files[0], "new content")
+        victim_dir = augment_path(test_space, "file_metadata", calculate_file_path_hash(files[1]))
+        os.remove(os.path.join(victim_dir, sorted(os.listdir(victim_dir))[0]))
+        shutil.rmtree(augment_path(test_space, "file_metadata", calculate_file_path_hash(files[2])))
+
+        scanner = IncrementalScanner(test_space)
+        changes = list(scanner.changes())
+        events = sorted((c["event"], c.get("record", {}).get("id") or c["count"]) for c in changes)
+        print(f"   📊 {scanner.stats}")
+        assert events == [("dir_removed", 4), ("removed", 1), ("upserted", added["id"])]
+        assert scanner.stats["skipped_dirs"] == 2
+        assert scanner.stats["read"] == 1
+        scanner.commit()
+
+        with open(scanner.journal_path) as f:
+            assert len(f.readlines()) == 3
+
+        # The verifier keeps its own state: its first run checks everything, later ones just the churn
+        assert len(list(verify_space(test_space, incremental=True))) == 16
+        _age(test_space, 3600)
+        audited = add_version(test_space, files[3], "audited")
+        results = list(verify_space(test_space, incremental=True))
+        assert [r["status"] for r in results] == ["ok"]
+        assert os.path.exists(augment_path(test_space, "verify_state.json"))
+
+        # ...and did not consume the change the scanner has yet to report
+        scanner = IncrementalScanner(test_space)
+        assert [c["record"]["id"] for c in scanner.changes()] == [audited["id"]]
+
+        print("🎉 Incremental Scanner Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_incremental_scanner()
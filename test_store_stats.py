@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import shutil
+import tempfile
+
+from augment_store import add_version, create_space
+from store_reshard import reshard_space
+from store_stats import HyperLogLog, TopN, collect, collect_many
+
+NOW = 1_700_000_000
+DAY = 24 * 3600
+
+
+def _make_space(path, prefix):
+    create_space(path)
+    big = os.path.join(path, f"{prefix}_big.bin")
+    for n in range(3):
+        add_version(path, big, f"{prefix} big {n}".ljust(1000, "."), timestamp=NOW - n * 10 * DAY)
+    notes = os.path.join(path, f"{prefix}_notes.md")
+    for n in range(6):
+        add_version(path, notes, f"{prefix} note {n % 3}", timestamp=NOW - n * DAY - 60)
+    return big, notes
+
+
+def test_store_stats():
+    """Test the single-pass statistics against a space with known contents."""
+
+    print("🧪 Testing Store Statistics...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_stats_test_")
+    try:
+        space = os.path.join(temp_dir, "SpaceA")
+        big, notes = _make_space(space, "a")
+        note_size = len("a note 0")
+
+        report = collect(space, top=1, now=NOW).to_dict()
+        print(f"   📊 {report['versions']} versions, {report['duplicate_bytes']} deduplicable bytes")
+        assert report["files"] == 2 and report["versions"] == 9
+        assert report["logical_bytes"] == 3000 + 6 * note_size
+        # Notes cycle through three contents, so the second round is all duplicates
+        assert report["duplicate_versions"] == 3 and report["duplicate_bytes"] == 3 * note_size
+        assert report["distinct_contents_estimate"] == 6
+        assert report["versions_per_file"] == {"2-3": 1, "4-7": 1}
+        assert report["age"]["1d"]["versions"] == 2  # the newest big and notes versions
+        assert report["age"]["7d"]["versions"] == 5
+        assert report["age"]["30d"] == {"versions": 2, "bytes": 2000}
+        assert report["largest_histories"][0]["filePath"] == big
+        assert report["most_versions"][0]["filePath"] == notes
+        assert report["disk"]["file_versions"] == {**report["disk"]["file_versions"], "files": 9,
+                                                   "bytes": report["logical_bytes"]}
+        assert report["disk"]["file_metadata"]["files"] == 9
+
+        # The same numbers come out of a sharded layout
+        reshard_space(space, sharded=True)
+        sharded = collect(space, top=1, now=NOW).to_dict()
+        for key in ("files", "versions", "logical_bytes", "duplicate_bytes", "age", "versions_per_file"):
+            assert sharded[key] == report[key], key
+        print("   ✅ flat and sharded layouts agree")
+
+        other = os.path.join(temp_dir, "SpaceB")
+        _make_space(other, "b")
+        results, combined = collect_many([space, other], workers=2, top=3, now=NOW)
+        combined = combined.to_dict()
+        assert [r.spaces for r in results] == [[space], [other]]
+        assert combined["versions"] == 18 and combined["files"] == 4
+        assert combined["distinct_contents_estimate"] == 12
+        assert len(combined["largest_histories"]) == 3
+        print(f"   ✅ two spaces in parallel: {combined['versions']} versions")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_sketches():
+    """Test the cardinality estimate and the bounded top-N heap."""
+    rng = random.Random(7)
+    sketch = HyperLogLog()
+    for _ in range(50_000):
+        sketch.add("%064x" % rng.getrandbits(256))
+    assert abs(sketch.estimate() - 50_000) < 50_000 * 0.03
+
+    top = TopN(3)
+    for value in [5, 1, 9, 7, 3, 9]:
+        top.push(value, value)
+    assert top.items() == [9, 9, 7]
+
+
+if __name__ == "__main__":
+    test_store_stats()
+    test_sketches()
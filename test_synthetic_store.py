@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import shutil
+import tempfile
+
+from augment_store import iter_metadata_files, load_file_versions
+from store_benchmark import run
+from store_verify import verify_space
+from synthetic_store import generate_space
+
+
+def test_synthetic_store():
+    """Test that the generator honours its parameters and produces a valid store."""
+
+    print("🧪 Testing Synthetic Store Generator...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_synthetic_test_")
+    try:
+        space = os.path.join(temp_dir, "TestSpace")
+        manifest = generate_space(space, files=40, versions_mean=4, versions_max=10, size_median=512,
+                                  depth=2, duplicate_ratio=0.3, seed=7)
+        print(f"   📊 {manifest['versions']} versions, {manifest['duplicates']} duplicates, {manifest['bytes']} bytes")
+
+        assert len(manifest["files"]) == 40
+        assert sum(1 for _ in iter_metadata_files(space)) == manifest["versions"]
+        assert 0 < manifest["duplicates"] < manifest["versions"]
+        assert manifest["max_depth"] <= 2
+        for path in manifest["files"]:
+            assert os.path.relpath(path, space).count(os.sep) <= 2
+            versions = load_file_versions(space, path)
+            assert 1 <= len(versions) <= 10
+            with open(path, "rb") as f:
+                assert len(f.read()) == versions[0]["size"]
+        assert {r["status"] for r in verify_space(space)} == {"ok"}
+
+        # Same parameters and the same `now`, same store apart from version ids
+        again = generate_space(os.path.join(temp_dir, "Again"), **manifest["params"])
+        assert (again["versions"], again["bytes"]) == (manifest["versions"], manifest["bytes"])
+
+        def history(manifest):
+            return [[(v["timestamp"], v["contentHash"]) for v in load_file_versions(manifest["space"], path)]
+                    for path in manifest["files"]]
+        assert history(again) == history(manifest)
+
+        print("🎉 Synthetic Store Generator Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_benchmark_report():
+    """Test that the benchmark emits a JSON report for every scale."""
+    report = run(["tiny"], {"files": 5})
+    json.dumps(report)
+    (result,) = report["results"]
+    assert result["scale"] == "tiny" and result["store"]["files"] == 5
+    assert result["counts"]["verify_problems"] == 0
+    assert all(seconds >= 0 for seconds in result["timings"].values())
+
+
+if __name__ == "__main__":
+    test_synthetic_store()
+    test_benchmark_report()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from augment_store import add_version, augment_path, calculate_file_path_hash, create_space
+from text_index import TextIndex, decode_postings, encode_postings, term_stats, tokenize
+
+
+def test_text_index():
+    """Test indexing, ranking, snippets and incremental updates of the text index."""
+
+    print("🧪 Testing Full-Text Index...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_text_index_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.txt")
+        report = os.path.join(test_space, "report.md")
+        image = os.path.join(test_space, "image.png")
+        add_version(test_space, notes, "Meeting notes: the budget was approved.", timestamp=1_700_000_000)
+        v2 = add_version(test_space, notes, "Meeting notes: the budget was approved. Next: hiring plan.", timestamp=1_700_000_100)
+        add_version(test_space, report, "Quarterly report. Budget, budget, budget! Revenue grew.", timestamp=1_700_000_200)
+        add_version(test_space, report, "Quarterly report. Budget, budget, budget! Revenue grew.", timestamp=1_700_000_300)
+        add_version(test_space, image, b"\x89PNG budget", timestamp=1_700_000_400)
+
+        with TextIndex(test_space) as index:
+            stats = index.refresh()
+            print(f"   📊 {stats}")
+            assert stats["added"] == 5
+            assert stats["contents"] == 4, "identical content is indexed once"
+
+            # Blobs are not needed at query time
+            shutil.rmtree(augment_path(test_space, "file_versions"))
+
+            hits = index.search("budget")
+            assert [h["filePath"] for h in hits] == [report, report, notes, notes]
+            assert hits[0]["timestamp"] > hits[1]["timestamp"]
+            assert "Budget" in hits[0]["snippet"]
+            assert image not in {h["filePath"] for h in hits}
+
+            hits = index.search("hiring budget", require_all=True)
+            assert [(h["filePath"], h["id"]) for h in hits] == [(notes, v2["id"])]
+            assert "hiring" in hits[0]["snippet"]
+            assert index.search("hiring", limit=1)[0]["id"] == v2["id"]
+            assert index.search("xyzzy") == [] and index.search("a an") == []
+
+            # Incremental: new versions are picked up, deleted ones disappear
+            create_space(test_space)
+            add_version(test_space, notes, "Hiring plan finalised.", timestamp=1_700_000_500)
+            os.remove(augment_path(test_space, "file_metadata", calculate_file_path_hash(notes), f"{v2['id']}.json"))
+            stats = index.refresh()
+            assert stats["added"] == 1 and stats["removed"] == 1
+            hits = index.search("hiring")
+            assert [h["snippet"] for h in hits] == ["Hiring plan finalised."]
+
+            # Content first seen in a non-text file is still indexed once a text file has it
+            create_space(test_space)
+            shared = "Quarterly forecast"
+            add_version(test_space, os.path.join(test_space, "forecast.bin"), shared, timestamp=1_700_000_600)
+            index.refresh()
+            assert index.search("forecast") == []
+            text_copy = os.path.join(test_space, "forecast.txt")
+            add_version(test_space, text_copy, shared, timestamp=1_700_000_700)
+            stats = index.refresh()
+            assert stats["contents"] == 1
+            assert {h["filePath"] for h in index.search("forecast")} == {text_copy, os.path.join(test_space, "forecast.bin")}
+            assert index.refresh()["contents"] == 0
+
+            stats = index.optimize()
+            assert stats["contents_dropped"] == 1
+            assert index.db.execute("SELECT MAX(run) FROM postings").fetchone()[0] == 0
+            assert len(index.search("budget")) == 3
+
+        print("🎉 Full-Text Index Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_postings_round_trip():
+    """Test the posting list encoding and the SearchEngine-compatible tokenizer."""
+    postings = [(1, 3, 0), (2, 1, 17), (300, 2, 70000)]
+    assert decode_postings(encode_postings(postings)) == postings
+    assert len(encode_postings(postings)) < 3 * 3 * 4
+    assert list(tokenize("Hi, (World)! it's  ok-ish")) == [("world", 4), ("it's", 13), ("ok-ish", 19)]
+    # Offsets point at whole words, not at the token inside a longer word
+    assert term_stats("Concatenate the cat. CAT!") == {"concatenate": [1, 0], "the": [1, 12], "cat": [2, 16]}
+
+
+def test_live_contents_cached_per_change():
+    """Test that queries reuse the live content set until the docs table changes."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_text_index_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.txt")
+        add_version(test_space, notes, "first draft", timestamp=1_700_000_000)
+        with TextIndex(test_space) as index:
+            index.refresh()
+            scans = []
+            index.db.set_trace_callback(lambda sql: scans.append(sql) if "DISTINCT content_id" in sql else None)
+            assert len(index.search("draft")) == 1 and len(index.search("first")) == 1
+            assert len(scans) == 1
+
+            add_version(test_space, notes, "second draft", timestamp=1_700_000_100)
+            index.refresh()
+            assert len(index.search("draft")) == 2 and len(scans) == 2
+
+            # Another connection deleting a version is noticed too
+            other = sqlite3.connect(augment_path(test_space, "text_index.db"))
+            with other:
+                other.execute("DELETE FROM docs WHERE timestamp = (SELECT MIN(timestamp) FROM docs)")
+            other.close()
+            assert [h["snippet"] for h in index.search("draft")] == ["second draft"]
+            assert len(scans) == 3
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_text_index()
+    test_postings_round_trip()
+    test_live_contents_cached_per_change()
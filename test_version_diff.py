@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import difflib
+import os
+import random
+import shutil
+import tempfile
+
+import version_diff
+from augment_store import add_version, create_space, load_file_versions
+from delta_store import add_delta_version
+from version_diff import DiffService, diff_hashes, format_unified
+
+
+def _apply(old_lines, diff):
+    """Rebuild the new text from the old lines and a diff's hunks."""
+    out = []
+    position = 0
+    for hunk in diff["hunks"]:
+        start = hunk["oldStart"] - 1 if hunk["oldLines"] else hunk["oldStart"]
+        out.extend(old_lines[position:start])
+        position = start
+        for line in hunk["lines"]:
+            if line[0] in " -":
+                assert old_lines[position] == line[1:]
+                position += 1
+            if line[0] in " +":
+                out.append(line[1:])
+    return out + old_lines[position:]
+
+
+def test_version_diff():
+    """Test diffs, the LRU cache and batch history diffs."""
+
+    print("🧪 Testing Version Diff Service...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_diff_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        path = os.path.join(test_space, "notes.md")
+        rng = random.Random(3)
+        lines = [f"line {i}" for i in range(300)]
+        texts = []
+        for n in range(6):
+            for _ in range(5):
+                position = rng.randrange(len(lines))
+                choice = rng.random()
+                if choice < 0.4:
+                    lines[position] = f"edited {n} {position}"
+                elif choice < 0.7:
+                    lines.insert(position, f"inserted {n}")
+                else:
+                    del lines[position]
+            texts.append("\n".join(lines) + "\n")
+            add_delta_version(test_space, path, texts[-1], timestamp=1_700_000_000 + n)
+        add_version(test_space, path, texts[-1], timestamp=1_700_000_010)
+
+        service = DiffService(test_space, context=2)
+        diffs = service.diff_history(path)
+        assert len(diffs) == 6
+        assert diffs[0]["hunks"] == [] and diffs[0]["added"] == diffs[0]["removed"] == 0
+        for old_text, new_text, diff in zip(texts, texts[1:], reversed(diffs[1:])):
+            assert _apply(old_text.splitlines(), diff) == new_text.splitlines()
+            assert diff["added"] == sum(1 for h in diff["hunks"] for l in h["lines"] if l[0] == "+")
+
+            # Same hunks and text as difflib for the same opcodes
+            expected = "".join(difflib.unified_diff(old_text.splitlines(), new_text.splitlines(),
+                                                    "old", "new", n=2, lineterm=""))
+            assert format_unified(diff).replace("\n", "") == expected
+        assert service.stats["misses"] == 5 and service.stats["identical"] == 1
+
+        # A second pass is served entirely from the cache
+        assert service.diff_history(path, limit=3) == diffs[:3]
+        assert service.stats["hits"] == 2
+
+        # The cache stays within its byte budget
+        small = DiffService(test_space, max_cache_bytes=5_000)
+        small.diff_history(path)
+        assert small.cache_bytes <= 5_000 and small.stats["evictions"] > 0
+
+        # A delta version's chain is rebuilt once for its line table and once to render the hunks
+        old, new = sorted(load_file_versions(test_space, path), key=lambda v: v["timestamp"])[1:3]
+        calls = []
+        saved = version_diff.read_version
+        version_diff.read_version = lambda *args: calls.append(args) or saved(*args)
+        try:
+            diff = DiffService(test_space, context=0).diff(old, new)
+        finally:
+            version_diff.read_version = saved
+        assert len(diff["hunks"]) > 1 and len(calls) == 4
+
+        print("🎉 Version Diff Service Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def _lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        previous = 0
+        for j, y in enumerate(b):
+            previous, row[j + 1] = row[j + 1], previous + 1 if x == y else max(row[j + 1], row[j])
+    return row[-1]
+
+
+def test_diff_hashes_is_minimal():
+    """Test that the edit script is correct and keeps a longest common subsequence."""
+    rng = random.Random(1)
+    for _ in range(200):
+        a = [rng.randrange(6) for _ in range(rng.randrange(30))]
+        b = [rng.randrange(6) for _ in range(rng.randrange(30))]
+        rebuilt = []
+        position = (0, 0)
+        for tag, i1, i2, j1, j2 in diff_hashes(a, b):
+            assert (i1, j1) == position
+            position = (i2, j2)
+            rebuilt.extend(a[i1:i2] if tag == "equal" else b[j1:j2])
+            if tag == "equal":
+                assert a[i1:i2] == b[j1:j2]
+        assert rebuilt == b and position == (len(a), len(b))
+        assert sum(i2 - i1 for tag, i1, i2, _, _ in diff_hashes(a, b) if tag == "equal") == _lcs_length(a, b)
+
+
+if __name__ == "__main__":
+    test_version_diff()
+    test_diff_hashes_is_minimal()
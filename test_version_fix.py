@@ -93,10 +93,7 @@ def test_version_history_fix():
         print(f"\n📝 Testing version metadata structure:")
         
         import hashlib
-        
-        def calculate_file_path_hash(file_path):
-            """Simulate the file path hash calculation."""
-            return hashlib.sha256(file_path.encode()).hexdigest()[:16]
+        from path_hash import calculate_file_path_hash
         
         file_metadata_dir = os.path.join(augment_dir, "file_metadata")
         
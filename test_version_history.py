@@ -46,10 +46,7 @@ def test_version_history_structure():
         file_metadata_dir = os.path.join(augment_dir, "file_metadata")
         
         # Create file path hashes (simulating the hash function)
-        import hashlib
-        
-        def calculate_file_path_hash(file_path):
-            return hashlib.sha256(file_path.encode()).hexdigest()[:16]
+        from path_hash import calculate_file_path_hash
         
         # Create metadata for test1.txt
         file1_hash = calculate_file_path_hash(test_file1)
@@ -209,5 +206,79 @@ def test_version_history_structure():
         print(f"\n🧹 Cleaning up: {temp_dir}")
         shutil.rmtree(temp_dir)
 
+def test_history_pages():
+    """Test that paged history matches load_file_versions from the directory, index and segment."""
+    from augment_store import add_version, create_space, load_file_versions, parse_timestamp
+    from packed_metadata import pack_space, segment_path
+    from version_history import HistoryCursor, history_page
+    from version_index import VersionIndex
+
+    print("🧪 Testing Paged Version History...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_pages_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        for i in range(23):
+            # Versions come in pairs with the same timestamp, so ties must page consistently
+            add_version(test_space, notes, f"v{i}", timestamp=1_700_000_000 + (i // 2) * 60, comment=f"v{i}")
+        expected_keys = sorted(load_file_versions(test_space, notes),
+                               key=lambda v: (parse_timestamp(v["timestamp"]), v["id"]), reverse=True)
+        expected = [v["id"] for v in expected_keys]
+        window = [v["id"] for v in expected_keys
+                  if 1_700_000_120 <= parse_timestamp(v["timestamp"]) <= 1_700_000_420]
+
+        def check(source, **options):
+            with HistoryCursor(test_space, notes, page_size=5, **options) as cursor:
+                assert type(cursor.source).__name__ == source
+                pages = list(cursor.pages())
+            assert [len(page) for page in pages] == [5] * (len(expected) // 5) + [len(expected) % 5]
+            assert [v["id"] for page in pages for v in page] == expected
+
+            with HistoryCursor(test_space, notes, page_size=4, since=1_700_000_120,
+                               until="2023-11-14T22:20:20Z", **options) as cursor:
+                assert [v["id"] for v in cursor] == window
+
+            # A stateless caller resumes from the token
+            first, token = history_page(test_space, notes, limit=7, **options)
+            second, _ = history_page(test_space, notes, limit=7, token=token, **options)
+            assert [v["id"] for v in first + second] == expected[:14]
+            print(f"   ✅ {source}: {len(expected)} versions, window of {len(window)}")
+
+        check("_DirectorySource", use_index=False)
+        with VersionIndex(test_space) as index:
+            index.refresh()
+        check("_IndexSource")
+        pack_space(test_space)
+        check("_SegmentSource")
+
+        # Versions deleted after packing (by gc or by hand) are gone from the history,
+        # and versions added since are in it: the directory wins over the segment
+        metadata_dir = os.path.dirname(expected_keys[0]["storagePath"]).replace("file_versions", "file_metadata")
+        for version in expected_keys[10:]:
+            os.remove(os.path.join(metadata_dir, f"{version['id']}.json"))
+        latest = add_version(test_space, notes, "v23", timestamp=1_700_000_900, comment="v23")
+        expected[:] = [latest["id"]] + expected[:10]
+        window[:] = [version_id for version_id in window if version_id in expected]
+        check("_DirectorySource", use_index=False)
+        check("_IndexSource")
+        pack_space(test_space)
+        check("_SegmentSource")
+
+        # A record written while the segment was being packed: the segment looks fresh but is short
+        slipped = add_version(test_space, notes, "v24", timestamp=1_700_000_950, comment="v24")
+        later = os.stat(metadata_dir).st_mtime_ns + 1_000_000_000
+        os.utime(segment_path(test_space, os.path.basename(metadata_dir)), ns=(later, later))
+        expected.insert(0, slipped["id"])
+        check("_IndexSource")
+
+        missing, token = history_page(test_space, os.path.join(test_space, "nope.txt"))
+        assert missing == [] and token is None
+    finally:
+        shutil.rmtree(temp_dir)
+
+
 if __name__ == "__main__":
     test_version_history_structure()
+    test_history_pages()
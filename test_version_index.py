@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+
+from augment_store import add_version, create_space, load_file_versions, write_json_atomic
+from version_index import VersionIndex
+
+
+def test_version_index():
+    """Test that the version index matches a full JSON scan and refreshes incrementally."""
+
+    print("🧪 Testing Version Index...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_index_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        data = os.path.join(test_space, "data.json")
+        for i in range(5):
+            add_version(test_space, notes, f"# Notes v{i}", timestamp=1_700_000_000 + i, comment=f"v{i}")
+        add_version(test_space, data, '{"version": 1}', timestamp=1_700_000_000)
+
+        with VersionIndex(test_space) as index:
+            stats = index.refresh()
+            assert stats["added"] == 6
+            assert index.latest_versions(notes) == load_file_versions(test_space, notes)
+
+            latest = index.latest_versions(notes, limit=2)
+            assert [v["comment"] for v in latest] == ["v4", "v3"]
+            print(f"   ✅ notes.md: latest 2 = {[v['comment'] for v in latest]}")
+
+            # A new version is picked up without reparsing the existing ones
+            add_version(test_space, notes, "# Notes v5", timestamp=1_700_000_010, comment="v5")
+            stats = index.refresh()
+            assert stats["added"] == 1
+            assert index.latest_versions(notes, limit=1)[0]["comment"] == "v5"
+
+            # Removed records and directories drop out of the index
+            shutil.rmtree(os.path.join(test_space, ".augment", "file_metadata"))
+            os.makedirs(os.path.join(test_space, ".augment", "file_metadata"))
+            index.refresh()
+            assert index.latest_versions(notes) == []
+            assert index.version_count(data) == 0
+
+        # The index survives reopening
+        with VersionIndex(test_space) as index:
+            assert index.refresh()["added"] == 0
+
+        print("🎉 Version Index Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_index_follows_rewritten_records():
+    """Test that records rewritten in place are re-read on refresh."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_index_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    try:
+        notes = os.path.join(test_space, "notes.md")
+        for i in range(3):
+            add_version(test_space, notes, f"# Notes v{i}", timestamp=1_700_000_000 + i)
+        with VersionIndex(test_space) as index:
+            index.refresh()
+            # What compact, delta packing and gc do to a record's storagePath
+            version = load_file_versions(test_space, notes)[0]
+            moved = os.path.join(os.path.dirname(version["storagePath"]), "moved.data")
+            os.rename(version["storagePath"], moved)
+            metadata_dir = os.path.dirname(version["storagePath"]).replace("file_versions", "file_metadata")
+            write_json_atomic(os.path.join(metadata_dir, f"{version['id']}.json"), {**version, "storagePath": moved})
+            stats = index.refresh()
+            assert stats["updated"] == 1 and stats["added"] == 0
+            assert index.latest_versions(notes) == load_file_versions(test_space, notes)
+            assert all(os.path.exists(v["storagePath"]) for v in index.latest_versions(notes))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_version_index()
+    test_index_follows_rewritten_records()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import errno
+import os
+import shutil
+import tempfile
+
+import version_writer
+from augment_store import augment_path, calculate_file_path_hash, create_space, hash_dir, load_file_versions
+from store_verify import verify_space
+from version_writer import COMMIT, VERSION, BatchWriter, _encode, read_journal
+
+
+def test_batch_writer():
+    """Test group commit: one fsync per batch and records identical to add_version's."""
+
+    print("🧪 Testing Batch Writer...")
+
+    temp_dir = tempfile.mkdtemp(prefix="augment_writer_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+
+    try:
+        files = [os.path.join(test_space, f"file{i}.txt") for i in range(5)]
+        with BatchWriter(test_space, batch_size=8) as writer:
+            for n in range(4):
+                for path in files:
+                    writer.add(path, f"{path} v{n}", timestamp=1_700_000_000 + n, comment=f"v{n}")
+            assert writer.stats["batches"] == 2 and writer.stats["fsyncs"] == 2
+            assert len(writer.pending) == 4
+        print(f"   📊 {writer.stats}")
+        assert writer.stats["versions"] == 20 and writer.stats["fsyncs"] == 3
+        assert os.path.getsize(augment_path(test_space, "write_journal.log")) == 0
+
+        for path in files:
+            versions = load_file_versions(test_space, path)
+            assert [v["comment"] for v in versions] == ["v3", "v2", "v1", "v0"]
+        assert {r["status"] for r in verify_space(test_space)} == {"ok"}
+        assert not [name for _, _, names in os.walk(augment_path(test_space)) for name in names if name.endswith(".tmp")]
+
+        print("🎉 Batch Writer Test: ✅ PASSED")
+
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_journal_replay_after_crash():
+    """Test that committed batches are replayed and a torn batch is discarded."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_writer_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    try:
+        path = os.path.join(test_space, "notes.txt")
+        writer = BatchWriter(test_space)
+        committed = [writer.add(path, f"v{n}", timestamp=1_700_000_000 + n) for n in range(3)]
+        writer.add(os.path.join(test_space, "other.txt"), "other")
+        applied = writer._apply
+        writer._apply = lambda batch, skip_existing=False: 0  # crash right after the journal fsync
+        writer.commit()
+        writer._apply = applied
+
+        # A second batch that was torn mid-write: complete records but no commit marker
+        torn = {**committed[0], "id": "TORN", "filePath": os.path.join(test_space, "torn.txt")}
+        writer.journal.write(_encode(VERSION, torn, b"never committed"))
+        writer.journal.write(_encode(COMMIT, {"versions": 1})[:-3])
+        writer.journal.close()
+        assert len(read_journal(augment_path(test_space, "write_journal.log"))) == 1
+        assert load_file_versions(test_space, path) == []
+
+        with BatchWriter(test_space) as recovered:
+            assert recovered.stats["replayed"] == 4
+        assert [v["id"] for v in load_file_versions(test_space, path)] == [v["id"] for v in reversed(committed)]
+        assert len(load_file_versions(test_space, os.path.join(test_space, "other.txt"))) == 1
+        assert load_file_versions(test_space, os.path.join(test_space, "torn.txt")) == []
+        assert {r["status"] for r in verify_space(test_space)} == {"ok"}
+
+        # Replaying again is a no-op
+        with BatchWriter(test_space) as again:
+            assert again.stats["replayed"] == 0
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_checkpoint_syncs_before_truncating():
+    """Test that a checkpoint fsyncs what it applied, and that a second writer is locked out."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_writer_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    synced = []
+    saved = version_writer._fsync_path
+
+    def record(path, *args):
+        synced.append((path, os.path.getsize(augment_path(test_space, "write_journal.log"))))
+        saved(path, *args)
+
+    version_writer._fsync_path = record
+    try:
+        path = os.path.join(test_space, "notes.txt")
+        with BatchWriter(test_space) as writer:
+            version = writer.add(path, "hello")
+            try:
+                BatchWriter(test_space)
+                raise AssertionError("a second writer must not share the journal")
+            except BlockingIOError:
+                pass
+        metadata_dir = hash_dir(test_space, "file_metadata", calculate_file_path_hash(path))
+        expected = {version["storagePath"], os.path.join(metadata_dir, f"{version['id']}.json"), metadata_dir,
+                    os.path.dirname(version["storagePath"]), augment_path(test_space, "file_metadata")}
+        assert expected <= {p for p, _ in synced}
+        assert all(journal_size > 0 for _, journal_size in synced), "truncated before the files were synced"
+        assert os.path.getsize(augment_path(test_space, "write_journal.log")) == 0
+    finally:
+        version_writer._fsync_path = saved
+        shutil.rmtree(temp_dir)
+
+
+def test_failed_journal_write_keeps_the_batch():
+    """Test that a commit failing on a full disk leaves the journal clean and can be retried."""
+    temp_dir = tempfile.mkdtemp(prefix="augment_writer_test_")
+    test_space = os.path.join(temp_dir, "TestSpace")
+    create_space(test_space)
+    journal_path = augment_path(test_space, "write_journal.log")
+    saved = os.fsync
+
+    def full_disk(fd):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    try:
+        path = os.path.join(test_space, "notes.txt")
+        with BatchWriter(test_space, checkpoint_bytes=1 << 30) as writer:
+            writer.add(path, "first")
+            writer.commit()
+            committed = os.path.getsize(journal_path)
+            writer.add(path, "second")
+            os.fsync = full_disk
+            try:
+                writer.commit()
+                raise AssertionError("the journal error must reach the caller")
+            except OSError as e:
+                assert e.errno == errno.ENOSPC
+            finally:
+                os.fsync = saved
+            assert os.path.getsize(journal_path) == committed
+            assert len(writer.pending) == 1 and writer.pending_bytes == len("second")
+            assert len(load_file_versions(test_space, path)) == 1
+
+            writer.add(path, "third")
+            assert writer.commit() == 2
+            assert len(read_journal(journal_path)) == 2
+        assert sorted(v["size"] for v in load_file_versions(test_space, path)) == [5, 5, 6]
+    finally:
+        os.fsync = saved
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    test_batch_writer()
+    test_journal_replay_after_crash()
+    test_checkpoint_syncs_before_truncating()
+    test_failed_journal_write_keeps_the_batch()
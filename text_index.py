@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Persistent full-text index over version content.
+
+Keeps a SQLite file at .augment/text_index.db with an inverted index of every text
+version in file_versions/ (and the objects/deltas they may have been compacted
+into), keyed by (path hash, version id). Tokenization matches
+SearchEngine.tokenizeContent: whitespace-separated words, lowercased, punctuation
+trimmed, at least three characters.
+
+Content is indexed once per content hash, however many versions share it. Posting
+lists are stored per term as varint-encoded (content id delta, term frequency,
+first offset) runs; each refresh appends one new run per term, and `optimize`
+merges them and drops postings whose versions are gone. The text of each indexed
+content is kept zlib-compressed alongside, so queries rank with BM25 and build
+snippets without touching the blobs.
+
+Refreshes are incremental in the same way as VersionIndex: only file_metadata/<hash>
+directories whose mtime changed are re-listed, and only new records are read.
+"""
+
+import argparse
+import hashlib
+import heapq
+import math
+import os
+import re
+import sqlite3
+import string
+import time
+import zlib
+
+from augment_store import augment_path, iter_metadata_dirs, load_version_metadata, parse_timestamp, to_fs_path
+from delta_store import read_varint, read_version, varint
+from version_index import RACY_WINDOW_NS
+
+INDEX_FILENAME = "text_index.db"
+MIN_TOKEN_LENGTH = 3
+MAX_INDEX_BYTES = 8 * 1024 * 1024
+FLUSH_EVERY = 2000
+SNIPPET_RADIUS = 40
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Same text types SearchEngine.extractTextContent reads.
+TEXT_EXTENSIONS = {
+    "txt", "md", "swift", "java", "c", "cpp", "h", "hpp", "py", "js", "html", "css", "xml", "json",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    content_id INTEGER PRIMARY KEY,
+    content_hash TEXT UNIQUE NOT NULL,
+    length INTEGER NOT NULL,
+    text BLOB
+);
+CREATE TABLE IF NOT EXISTS docs (
+    path_hash TEXT NOT NULL,
+    version_id TEXT NOT NULL,
+    content_id INTEGER NOT NULL,
+    file_path TEXT,
+    timestamp TEXT,
+    epoch REAL NOT NULL,
+    PRIMARY KEY (path_hash, version_id)
+);
+CREATE INDEX IF NOT EXISTS docs_by_content ON docs (content_id, epoch DESC);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (term, run)
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path_hash TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    scanned_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_WORD = re.compile(r"\S+")
+
+
+def tokenize(text):
+    """Yield (token, offset) pairs the way SearchEngine.tokenizeContent splits words."""
+    for match in _WORD.finditer(text):
+        token = match.group().lower().strip(string.punctuation)
+        if len(token) >= MIN_TOKEN_LENGTH:
+            yield token, match.start()
+
+
+def term_stats(text):
+    """Return {token: [term frequency, offset of first occurrence]} for a whole document.
+
+    Same tokens and offsets as tokenize(): the offset is where the first word that
+    yields the token starts, never a match inside a longer word.
+    """
+    stats = {}
+    for token, offset in tokenize(text):
+        entry = stats.get(token)
+        if entry is None:
+            stats[token] = [1, offset]
+        else:
+            entry[0] += 1
+    return stats
+
+
+def is_indexable(file_path):
+    """Return True if the file type is one SearchEngine extracts text from."""
+    return os.path.splitext(file_path or "")[1][1:].lower() in TEXT_EXTENSIONS
+
+
+def encode_postings(postings):
+    """Encode [(content id, tf, first offset)] sorted by content id."""
+    out = bytearray(varint(len(postings)))
+    previous = 0
+    for content_id, tf, offset in postings:
+        out += varint(content_id - previous) + varint(tf) + varint(offset)
+        previous = content_id
+    return bytes(out)
+
+
+def decode_postings(data):
+    """Inverse of encode_postings."""
+    count, pos = read_varint(data, 0)
+    postings = []
+    content_id = 0
+    for _ in range(count):
+        delta, pos = read_varint(data, pos)
+        tf, pos = read_varint(data, pos)
+        offset, pos = read_varint(data, pos)
+        content_id += delta
+        postings.append((content_id, tf, offset))
+    return postings
+
+
+def _snippet(text, offset, radius=SNIPPET_RADIUS):
+    start = max(0, offset - radius)
+    end = min(len(text), offset + radius)
+    while end < len(text) and not text[end].isspace() and end - offset < radius * 2:
+        end += 1
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start else "") + snippet + ("…" if end < len(text) else "")
+
+
+class TextIndex:
+    """SQLite-backed inverted index over the content of every version in one space."""
+
+    def __init__(self, space_path, index_path=None):
+        self.space_path = space_path
+        self.index_path = index_path or augment_path(space_path, INDEX_FILENAME)
+        self.db = sqlite3.connect(self.index_path)
+        self.db.executescript(SCHEMA)
+        self._pending = {}
+        self._pending_contents = 0
+        self._live = None
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self):
+        """Index new versions and forget deleted ones; returns counters."""
+        stats = {"dirs": 0, "rescanned": 0, "added": 0, "removed": 0, "contents": 0, "skipped": 0}
+        seen = set()
+        self._live = None
+        with self.db:
+            for file_hash, entry in iter_metadata_dirs(self.space_path):
+                seen.add(file_hash)
+                stats["dirs"] += 1
+                self._refresh_dir(file_hash, entry.path, entry.stat().st_mtime_ns, stats)
+
+            for (file_hash,) in self.db.execute("SELECT path_hash FROM dirs").fetchall():
+                if file_hash not in seen:
+                    stats["removed"] += self.db.execute(
+                        "DELETE FROM docs WHERE path_hash = ?", (file_hash,)).rowcount
+                    self.db.execute("DELETE FROM dirs WHERE path_hash = ?", (file_hash,))
+            self._flush()
+        return stats
+
+    def _refresh_dir(self, file_hash, dir_path, mtime_ns, stats):
+        row = self.db.execute(
+            "SELECT mtime_ns, scanned_ns FROM dirs WHERE path_hash = ?", (file_hash,)
+        ).fetchone()
+        if row and row[0] == mtime_ns and mtime_ns < row[1] - RACY_WINDOW_NS:
+            return
+
+        stats["rescanned"] += 1
+        scanned_ns = time.time_ns()
+        on_disk = {name[:-5] for name in os.listdir(dir_path) if name.endswith(".json")}
+        indexed = {
+            version_id
+            for (version_id,) in self.db.execute("SELECT version_id FROM docs WHERE path_hash = ?", (file_hash,))
+        }
+
+        removed = indexed - on_disk
+        self.db.executemany(
+            "DELETE FROM docs WHERE path_hash = ? AND version_id = ?",
+            [(file_hash, version_id) for version_id in removed],
+        )
+        stats["removed"] += len(removed)
+
+        for version_id in on_disk - indexed:
+            try:
+                version = load_version_metadata(os.path.join(dir_path, f"{version_id}.json"))
+                content_id = self._content_id(version, stats)
+            except (OSError, ValueError, KeyError):
+                stats["skipped"] += 1
+                continue
+            self.db.execute(
+                "INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?, ?)",
+                (file_hash, version_id, content_id, version.get("filePath"), version.get("timestamp"),
+                 parse_timestamp(version.get("timestamp"))),
+            )
+            stats["added"] += 1
+
+        self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (file_hash, mtime_ns, scanned_ns))
+
+    def _content_row(self, content_hash):
+        return self.db.execute("SELECT content_id, text FROM contents WHERE content_hash = ?",
+                               (content_hash,)).fetchone()
+
+    def _content_id(self, version, stats):
+        # A content row's text is NULL until a version of a text file type has been read for it,
+        # and b"" if that content did not decode, so neither is read again on every refresh.
+        content_hash = version.get("contentHash")
+        indexable = is_indexable(to_fs_path(version.get("filePath"))) and (version.get("size") or 0) <= MAX_INDEX_BYTES
+        row = self._content_row(content_hash) if content_hash else None
+        if row and (row[1] is not None or not indexable):
+            return row[0]
+
+        text = None
+        if indexable:
+            content = read_version(self.space_path, version)
+            if not content_hash:
+                content_hash = hashlib.sha256(content).hexdigest()
+                row = self._content_row(content_hash)
+                if row and row[1] is not None:
+                    return row[0]
+            try:
+                text = content.decode("utf-8")
+            except UnicodeDecodeError:
+                text = None
+        elif not content_hash:
+            raise ValueError("version has no content hash and is not indexable")
+
+        terms = term_stats(text or "")
+        length = sum(tf for tf, _ in terms.values())
+        stored = (zlib.compress(text.encode("utf-8")) if text is not None else b"") if indexable else None
+        if row:
+            # First seen under a non-text file type; a text file with the same content indexes it now.
+            content_id = row[0]
+            self.db.execute("UPDATE contents SET length = ?, text = ? WHERE content_id = ?",
+                            (length, stored, content_id))
+        else:
+            content_id = self.db.execute(
+                "INSERT INTO contents (content_hash, length, text) VALUES (?, ?, ?)", (content_hash, length, stored),
+            ).lastrowid
+        for token, (tf, offset) in terms.items():
+            self._pending.setdefault(token, []).append((content_id, tf, offset))
+        stats["contents"] += 1
+        self._pending_contents += 1
+        if self._pending_contents >= FLUSH_EVERY:
+            self._flush()
+        return content_id
+
+    def _next_run(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'next_run'").fetchone()
+        run = row[0] if row else 0
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('next_run', ?)", (run + 1,))
+        return run
+
+    def _flush(self):
+        if not self._pending:
+            return
+        run = self._next_run()
+        self.db.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?)",
+            [(term, run, encode_postings(postings)) for term, postings in self._pending.items()],
+        )
+        self._pending = {}
+        self._pending_contents = 0
+
+    def _postings(self, term):
+        postings = []
+        for (data,) in self.db.execute("SELECT data FROM postings WHERE term = ? ORDER BY run", (term,)):
+            postings.extend(decode_postings(data))
+        return postings
+
+    def _live_contents(self):
+        # Kept across queries. refresh() drops it after our own writes; data_version changes
+        # when another connection commits.
+        data_version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        if self._live is None or self._live[0] != data_version:
+            live = {content_id for (content_id,) in self.db.execute("SELECT DISTINCT content_id FROM docs")}
+            self._live = (data_version, live)
+        return self._live[1]
+
+    def optimize(self):
+        """Merge each term's runs into one and drop postings and contents with no versions left."""
+        stats = {"terms": 0, "runs_merged": 0, "contents_dropped": 0}
+        with self.db:
+            live = self._live_contents()
+            terms = [term for (term,) in self.db.execute("SELECT DISTINCT term FROM postings")]
+            for term in terms:
+                runs = self.db.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+                postings = [p for p in self._postings(term) if p[0] in live]
+                self.db.execute("DELETE FROM postings WHERE term = ?", (term,))
+                if postings:
+                    self.db.execute("INSERT INTO postings VALUES (?, 0, ?)", (term, encode_postings(postings)))
+                stats["terms"] += 1
+                stats["runs_merged"] += runs
+            stats["contents_dropped"] = self.db.execute(
+                "DELETE FROM contents WHERE content_id NOT IN (SELECT content_id FROM docs)").rowcount
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('next_run', 1)")
+        self.db.execute("VACUUM")
+        return stats
+
+    def search(self, query, limit=20, require_all=False):
+        """Return up to `limit` version hits ranked by BM25, each with a snippet.
+
+        Hits are dicts with pathHash, id, filePath, timestamp, score, term and
+        snippet. Versions with identical content score the same; newer ones come first.
+        """
+        terms = list(dict.fromkeys(token for token, _ in tokenize(query)))
+        if not terms:
+            return []
+        live = self._live_contents()
+        if not live:
+            return []
+        total, average = self.db.execute(
+            "SELECT COUNT(*), AVG(length) FROM contents WHERE content_id IN (SELECT content_id FROM docs)"
+        ).fetchone()
+        average = average or 1
+
+        matches = {}
+        for term in terms:
+            postings = [p for p in self._postings(term) if p[0] in live]
+            if not postings:
+                if require_all:
+                    return []
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for content_id, tf, offset in postings:
+                matches.setdefault(content_id, []).append((idf, tf, offset, term))
+        if require_all:
+            matches = {cid: hits for cid, hits in matches.items() if len(hits) == len(terms)}
+
+        lengths = {}
+        candidates = list(matches)
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            lengths.update(self.db.execute(
+                f"SELECT content_id, length FROM contents WHERE content_id IN ({','.join('?' * len(chunk))})", chunk))
+
+        scores = {}
+        for content_id, hits in matches.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths.get(content_id, 0) / average)
+            scores[content_id] = sum(idf * tf * (BM25_K1 + 1) / (tf + norm) for idf, tf, _, _ in hits)
+
+        results = []
+        for content_id in heapq.nlargest(limit, scores, key=scores.get):
+            _, _, offset, term = max(matches[content_id])
+            (compressed,) = self.db.execute("SELECT text FROM contents WHERE content_id = ?", (content_id,)).fetchone()
+            snippet = _snippet(zlib.decompress(compressed).decode("utf-8"), offset) if compressed else ""
+            for path_hash, version_id, file_path, timestamp in self.db.execute(
+                "SELECT path_hash, version_id, file_path, timestamp FROM docs WHERE content_id = ? "
+                "ORDER BY epoch DESC LIMIT ?", (content_id, limit - len(results)),
+            ):
+                results.append({
+                    "pathHash": path_hash,
+                    "id": version_id,
+                    "filePath": file_path,
+                    "timestamp": timestamp,
+                    "score": scores[content_id],
+                    "term": term,
+                    "snippet": snippet,
+                })
+            if len(results) >= limit:
+                break
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text index over a space's file versions.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    index = subparsers.add_parser("index", help="bring the index up to date")
+    index.add_argument("space", help="path to the Augment space")
+    search = subparsers.add_parser("search", help="search the index")
+    search.add_argument("space", help="path to the Augment space")
+    search.add_argument("query")
+    search.add_argument("-n", "--limit", type=int, default=20)
+    search.add_argument("--all", action="store_true", help="require every query term")
+    search.add_argument("--no-refresh", action="store_true", help="search the index as it is")
+    optimize = subparsers.add_parser("optimize", help="merge posting runs and drop deleted content")
+    optimize.add_argument("space", help="path to the Augment space")
+    args = parser.parse_args()
+
+    with TextIndex(args.space) as text_index:
+        if args.command == "optimize":
+            print(f"🧹 {text_index.optimize()}")
+            return
+        if args.command == "index" or not args.no_refresh:
+            started = time.perf_counter()
+            stats = text_index.refresh()
+            if args.command == "index":
+                print(f"📚 Indexed in {time.perf_counter() - started:.3f}s: {stats}")
+                return
+        started = time.perf_counter()
+        hits = text_index.search(args.query, args.limit, args.all)
+        elapsed = time.perf_counter() - started
+        for hit in hits:
+            print(f"{hit['score']:6.2f}  {os.path.basename(hit['filePath'] or '')}  {hit['timestamp']}  {hit['id']}")
+            print(f"        {hit['snippet']}")
+        print(f"🔍 {len(hits)} hits in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import os
 import json
 from pathlib import Path
 
+from path_hash import calculate_file_path_hash, legacy_path_hash
+
 def calculate_hash_method1(file_path):
     """Simulate the old calculateHash(for: Data(filePath.path.utf8)) method"""
     path_data = file_path.encode('utf-8')
@@ -16,9 +18,7 @@ def calculate_hash_method1(file_path):
 
 def calculate_hash_method2(file_path):
     """Simulate the new calculateFilePathHash(filePath:) method"""
-    path_data = file_path.encode('utf-8')
-    hash_obj = hashlib.sha256(path_data)
-    return hash_obj.hexdigest()
+    return calculate_file_path_hash(file_path)
 
 def main():
     print("🔍 HASH CALCULATION VERIFICATION")
@@ -54,6 +54,7 @@ def main():
                 print(f"   Full Hash: {item}")
                 print(f"   Matches Method 1: {item == hash1}")
                 print(f"   Matches Method 2: {item == hash2}")
+                print(f"   Matches Legacy (truncated): {item == legacy_path_hash(test_file_path)}")
                 
                 # List metadata files in this directory
                 metadata_files = os.listdir(item_path)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Line-level diffs between file versions, with a cache.
+
+Each side is streamed once to compute a 64-bit hash and the byte offset of every
+line (the tables only live in this process, so Python's keyed hash() is enough).
+The diff then runs on the hash arrays: the common prefix and suffix are stripped
+first (typical edits touch a small region), lines that only one side has are set
+aside (they can never match), and the rest goes through Myers' O((N+M)D) diff in
+its linear-space, middle-snake form. Hunk lines are read back by offset from one open handle per
+side, so only the changed lines and their context are ever decoded, and a delta
+version's chain is rebuilt once per diff rather than once per hunk range.
+
+DiffService keeps finished diffs in an LRU bounded by their approximate size,
+keyed by (old contentHash, new contentHash, context). Identical content and
+repeated comparisons never touch the blobs. `diff_history` diffs every consecutive
+pair of a file's versions, reusing each version's line hashes for both pairs it
+belongs to.
+"""
+
+import argparse
+import io
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from augment_store import load_file_versions, to_fs_path
+from delta_store import BINARY_SNIFF_BYTES, is_delta, read_version
+
+DEFAULT_CONTEXT = 3
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _Lines:
+    """Line hashes and offsets of one version, with random access to the lines themselves."""
+
+    def __init__(self, space_path, version):
+        self.space_path = space_path
+        self.version = version
+        self.hashes = array("q")
+        self.offsets = array("Q")
+        self.binary = False
+        with self._open() as f:
+            self.binary = b"\0" in f.read(BINARY_SNIFF_BYTES)
+            if self.binary:
+                return
+            f.seek(0)
+            position = 0
+            for line in f:
+                self.offsets.append(position)
+                self.hashes.append(hash(line))
+                position += len(line)
+
+    def _open(self):
+        if is_delta(self.version):
+            return io.BytesIO(read_version(self.space_path, self.version))
+        return open(to_fs_path(self.version["storagePath"]), "rb")
+
+    def read(self, f, start, stop):
+        """Return lines [start, stop) from f, a handle from _open(), decoded and without line endings."""
+        if start >= stop:
+            return []
+        f.seek(self.offsets[start])
+        return [f.readline().rstrip(b"\r\n").decode("utf-8", errors="replace") for _ in range(start, stop)]
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+def _middle_snake(a, b, a0, a1, b0, b1):
+    """Return (x0, y0, x1, y1), a snake on an optimal edit path between a[a0:a1] and b[b0:b1].
+
+    Runs the forward and the reverse search at once until they overlap, keeping one
+    furthest-reaching x per diagonal in each direction (Myers 1986, section 4b).
+    """
+    n, m = a1 - a0, b1 - b0
+    delta = n - m
+    odd = delta & 1
+    offset = (n + m + 1) // 2 + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(offset):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            start = x
+            while x < n and x - k < m and a[a0 + x] == b[b0 + x - k]:
+                x += 1
+            forward[offset + k] = x
+            if odd and -d < delta - k < d and x + backward[offset + delta - k] >= n:
+                return a0 + start, b0 + start - k, a0 + x, b0 + x - k
+        # The reverse search runs on both sequences read backwards; its diagonal k is delta - k forwards.
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            start = x
+            while x < n and x - k < m and a[a1 - 1 - x] == b[b1 - 1 - x + k]:
+                x += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return a1 - x, b1 - x + k, a1 - start, b1 - start + k
+    raise AssertionError("the searches always meet")
+
+
+def _common_lines(a, b):
+    """Return the (i, j) pairs of a longest common subsequence of a and b, in order, in linear space."""
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            matches.append((a0, b0))
+            a0, b0 = a0 + 1, b0 + 1
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1, b1 = a1 - 1, b1 - 1
+            matches.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+        # With both ends differing the edit distance is at least 2, so both halves are smaller.
+        x0, y0, x1, y1 = _middle_snake(a, b, a0, a1, b0, b1)
+        matches.extend((x0 + i, y0 + i) for i in range(x1 - x0))
+        stack.append((a0, x0, b0, y0))
+        stack.append((x1, a1, y1, b1))
+    matches.sort()
+    return matches
+
+
+def diff_hashes(a, b):
+    """Return difflib-style opcodes (tag, i1, i2, j1, j2) for two sequences of line hashes."""
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]:
+        suffix += 1
+
+    a_middle, b_middle = a[prefix:len(a) - suffix], b[prefix:len(b) - suffix]
+    shared = set(a_middle).intersection(b_middle)
+    a_kept = [i for i, line in enumerate(a_middle) if line in shared]
+    b_kept = [j for j, line in enumerate(b_middle) if line in shared]
+    matches = _common_lines([a_middle[i] for i in a_kept], [b_middle[j] for j in b_kept])
+
+    opcodes = [("equal", 0, prefix, 0, prefix)] if prefix else []
+    i = j = prefix
+    for p, q in matches + [(None, None)]:
+        i2, j2 = (len(a) - suffix, len(b) - suffix) if p is None else (a_kept[p] + prefix, b_kept[q] + prefix)
+        if i2 > i or j2 > j:
+            tag = "replace" if i2 > i and j2 > j else "delete" if i2 > i else "insert"
+            opcodes.append((tag, i, i2, j, j2))
+        elif p is not None and opcodes and opcodes[-1][0] == "equal" and opcodes[-1][2] == i:
+            opcodes[-1] = ("equal", opcodes[-1][1], i2 + 1, opcodes[-1][3], j2 + 1)
+            i, j = i2 + 1, j2 + 1
+            continue
+        if p is not None:
+            opcodes.append(("equal", i2, i2 + 1, j2, j2 + 1))
+            i, j = i2 + 1, j2 + 1
+    if suffix:
+        opcodes.append(("equal", len(a) - suffix, len(a), len(b) - suffix, len(b)))
+    return opcodes
+
+
+def _group(opcodes, context):
+    """Split opcodes into hunks with `context` lines of equal text around each change (as difflib does)."""
+    codes = list(opcodes) or [("equal", 0, 0, 0, 0)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    hunks = []
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            hunks.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group:
+        hunks.append(group)
+    return [hunk for hunk in hunks if any(op[0] != "equal" for op in hunk)]
+
+
+def _render(old, new, hunks):
+    if not hunks:
+        return []
+    rendered = []
+    with old._open() as old_file, new._open() as new_file:
+        for hunk in hunks:
+            lines = []
+            for tag, i1, i2, j1, j2 in hunk:
+                if tag == "equal":
+                    lines.extend(" " + line for line in old.read(old_file, i1, i2))
+                    continue
+                lines.extend("-" + line for line in old.read(old_file, i1, i2))
+                lines.extend("+" + line for line in new.read(new_file, j1, j2))
+            rendered.append({
+                "oldStart": hunk[0][1] + 1,
+                "oldLines": hunk[-1][2] - hunk[0][1],
+                "newStart": hunk[0][3] + 1,
+                "newLines": hunk[-1][4] - hunk[0][3],
+                "lines": lines,
+            })
+    return rendered
+
+
+def _diff_size(diff):
+    return 200 + sum(64 + sum(len(line) + 50 for line in hunk["lines"]) for hunk in diff["hunks"])
+
+
+def _range(start, length):
+    if length == 1:
+        return str(start)
+    return f"{start - 1 if length == 0 else start},{length}"
+
+
+def format_unified(diff, old_label="old", new_label="new"):
+    """Render a diff as unified diff text."""
+    if diff.get("binary"):
+        return f"Binary versions {old_label} and {new_label} differ\n"
+    out = [f"--- {old_label}\n", f"+++ {new_label}\n"]
+    for hunk in diff["hunks"]:
+        out.append(f"@@ -{_range(hunk['oldStart'], hunk['oldLines'])} "
+                   f"+{_range(hunk['newStart'], hunk['newLines'])} @@\n")
+        out.extend(line + "\n" for line in hunk["lines"])
+    return "".join(out)
+
+
+class DiffService:
+    """Computes and caches diffs between versions of files in one space."""
+
+    def __init__(self, space_path, max_cache_bytes=DEFAULT_CACHE_BYTES, context=DEFAULT_CONTEXT, max_line_tables=8):
+        self.space_path = space_path
+        self.max_cache_bytes = max_cache_bytes
+        self.context = context
+        self.max_line_tables = max_line_tables
+        self.cache = OrderedDict()
+        self.cache_bytes = 0
+        self.lines = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "identical": 0}
+
+    def _cached(self, key):
+        with self.lock:
+            diff = self.cache.get(key)
+            if diff is not None:
+                self.cache.move_to_end(key)
+                self.stats["hits"] += 1
+            return diff
+
+    def _store(self, key, diff):
+        size = _diff_size(diff)
+        if size > self.max_cache_bytes:
+            return
+        with self.lock:
+            if key in self.cache:
+                return
+            self.cache[key] = diff
+            self.cache_bytes += size
+            while self.cache_bytes > self.max_cache_bytes:
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= _diff_size(evicted)
+                self.stats["evictions"] += 1
+
+    def _lines(self, version):
+        key = version.get("contentHash") or version["id"]
+        with self.lock:
+            table = self.lines.get(key)
+            if table is not None:
+                self.lines.move_to_end(key)
+                return table
+        table = _Lines(self.space_path, version)
+        with self.lock:
+            self.lines[key] = table
+            while len(self.lines) > self.max_line_tables:
+                self.lines.popitem(last=False)
+        return table
+
+    def diff(self, old_version, new_version, context=None):
+        """Diff two version records; returns a dict with hunks and added/removed line counts."""
+        context = self.context if context is None else context
+        old_hash, new_hash = old_version.get("contentHash"), new_version.get("contentHash")
+        header = {"old": old_version["id"], "new": new_version["id"], "oldHash": old_hash, "newHash": new_hash}
+        if old_hash and old_hash == new_hash:
+            with self.lock:
+                self.stats["identical"] += 1
+            return {**header, "binary": False, "added": 0, "removed": 0, "hunks": []}
+
+        key = (old_hash, new_hash, context) if old_hash and new_hash else None
+        cached = self._cached(key) if key else None
+        if cached is not None:
+            return {**header, **cached}
+        with self.lock:
+            self.stats["misses"] += 1
+
+        old, new = self._lines(old_version), self._lines(new_version)
+        if old.binary or new.binary:
+            body = {"binary": True, "added": 0, "removed": 0, "hunks": []}
+        else:
+            opcodes = diff_hashes(old.hashes, new.hashes)
+            body = {
+                "binary": False,
+                "added": sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal"),
+                "removed": sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal"),
+                "hunks": _render(old, new, _group(opcodes, context)),
+            }
+        if key:
+            self._store(key, body)
+        return {**header, **body}
+
+    def _versions(self, file_path):
+        return {version["id"]: version for version in load_file_versions(self.space_path, file_path)}
+
+    def diff_ids(self, file_path, old_id, new_id, context=None):
+        """Diff two versions of file_path by version id."""
+        versions = self._versions(file_path)
+        return self.diff(versions[old_id], versions[new_id], context)
+
+    def diff_history(self, file_path, limit=None, context=None):
+        """Diff every consecutive pair of file_path's versions, newest pair first.
+
+        With limit, only the newest `limit` pairs are diffed.
+        """
+        versions = load_file_versions(self.space_path, file_path)
+        pairs = list(zip(versions[1:], versions))
+        if limit is not None:
+            pairs = pairs[:limit]
+        return [self.diff(old, new, context) for old, new in pairs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff versions of a file in an Augment space.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("file", help="absolute path of the file")
+    parser.add_argument("old", nargs="?", help="old version id (default: diff every consecutive pair)")
+    parser.add_argument("new", nargs="?", help="new version id")
+    parser.add_argument("-U", "--context", type=int, default=DEFAULT_CONTEXT)
+    parser.add_argument("-n", "--limit", type=int, default=None, help="only the newest N pairs")
+    args = parser.parse_args()
+
+    service = DiffService(args.space, context=args.context)
+    if args.old and args.new:
+        diffs = [service.diff_ids(args.file, args.old, args.new)]
+    else:
+        diffs = service.diff_history(args.file, args.limit)
+    name = os.path.basename(args.file)
+    for diff in diffs:
+        sys.stdout.write(format_unified(diff, f"{name}@{diff['old']}", f"{name}@{diff['new']}"))
+    print(f"📊 {len(diffs)} diffs, cache {service.stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
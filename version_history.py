@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Lazy, paginated version history.
+
+load_file_versions parses every JSON record of a file and sorts them all before
+the caller sees the first one. HistoryCursor returns the same records newest
+first, one page at a time, and only parses the records on the pages it returns.
+The order comes from the cheapest source available:
+
+- a packed segment (packed_metadata), which is already sorted: binary search on
+  the timestamps, then decode records from the newest end. The JSON records are
+  authoritative, so the segment is only used while the directory has not changed
+  since it was packed, and only its records that still have a JSON file are
+  returned; otherwise one of the sources below is used
+- the version index, if the space has one: a keyset query per page
+- otherwise the file_metadata/<hash> directory: the timestamp is picked out of the
+  head of each record without a full JSON parse, and the sorted keys are kept for
+  the following pages
+
+Versions are ordered by (timestamp, id), newest first. `since` and `until` limit
+the time range (inclusive). `token` is a string that resumes after the last
+version returned, so a stateless caller can fetch the next page later.
+"""
+
+import argparse
+import bisect
+import os
+import re
+import time
+
+from augment_store import augment_path, load_version_metadata, parse_timestamp, to_fs_path
+from packed_metadata import Segment, segment_path
+from path_hash import lookup_hash_dir
+from version_index import INDEX_FILENAME, VersionIndex
+
+DEFAULT_PAGE_SIZE = 50
+HEAD_BYTES = 4096
+TIMESTAMP_FIELD = re.compile(rb'"timestamp"\s*:\s*"([^"]*)"')
+
+
+def _micros(epoch):
+    return round(epoch * 1_000_000)
+
+
+def _bound(value):
+    """Turn a since/until argument (epoch seconds, ISO-8601 or None) into epoch microseconds."""
+    return None if value is None else _micros(parse_timestamp(value))
+
+
+def _record_timestamp(path):
+    """Read a record's timestamp from the head of the file, parsing the whole record only if needed."""
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+    match = TIMESTAMP_FIELD.search(head)
+    if match:
+        return match.group(1).decode("utf-8")
+    return load_version_metadata(path).get("timestamp")
+
+
+def parse_token(token):
+    """Split a resume token into its (epoch microseconds, version id) key."""
+    micros, version_id = token.split(":", 1)
+    return int(micros), version_id
+
+
+class _SegmentSource:
+    def __init__(self, path, live_ids):
+        self.segment = Segment(path)
+        self.live_ids = live_ids
+
+    def _upper(self, micros):
+        """Number of records with a timestamp at or before micros."""
+        low, high = 0, len(self.segment)
+        while low < high:
+            middle = (low + high) // 2
+            if self.segment.timestamp_micros(middle) <= micros:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def page(self, after, since, until, limit):
+        limits = [bound for bound in (until, after[0] if after else None) if bound is not None]
+        position = self._upper(min(limits)) if limits else len(self.segment)
+        versions = []
+        while position > 0 and len(versions) < limit:
+            # Decode one group of equal timestamps at a time so ties can be ordered by id.
+            micros = self.segment.timestamp_micros(position - 1)
+            if since is not None and micros < since:
+                break
+            group = []
+            while position > 0 and self.segment.timestamp_micros(position - 1) == micros:
+                position -= 1
+                group.append(self.segment[position])
+            group.sort(key=lambda version: version["id"], reverse=True)
+            versions.extend(v for v in group
+                            if v["id"] in self.live_ids and (after is None or (micros, v["id"]) < after))
+        return [((_micros(parse_timestamp(v["timestamp"])), v["id"]), v) for v in versions[:limit]]
+
+    def close(self):
+        self.segment.close()
+
+
+class _IndexSource:
+    def __init__(self, space_path, file_hash, dir_path):
+        self.dir_path = dir_path
+        self.file_hash = file_hash
+        self.index = VersionIndex(space_path)
+        self.index.refresh_hash(file_hash)
+
+    def page(self, after, since, until, limit):
+        query = "SELECT version_id, epoch FROM versions WHERE path_hash = ?"
+        params = [self.file_hash]
+        # Epochs are REAL in the index: widen the bounds by a microsecond and compare exactly below.
+        for bound, clause in ((after[0] if after else None, "epoch <= ?"), (until, "epoch <= ?")):
+            if bound is not None:
+                query += f" AND {clause}"
+                params.append(bound / 1_000_000 + 1e-6)
+        if since is not None:
+            query += " AND epoch >= ?"
+            params.append(since / 1_000_000 - 1e-6)
+        query += " ORDER BY epoch DESC, version_id DESC"
+
+        versions = []
+        for version_id, epoch in self.index.db.execute(query, params):
+            key = (_micros(epoch), version_id)
+            if (after and key >= after) or (until is not None and key[0] > until) or (since is not None and key[0] < since):
+                continue
+            try:
+                version = load_version_metadata(os.path.join(self.dir_path, f"{version_id}.json"))
+            except (OSError, ValueError):
+                continue  # Removed since the index was refreshed.
+            versions.append((key, version))
+            if len(versions) == limit:
+                break
+        return versions
+
+    def close(self):
+        self.index.close()
+
+
+class _DirectorySource:
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self.keys = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    self.keys.append((_micros(parse_timestamp(_record_timestamp(entry.path))), entry.name[:-5]))
+                except (OSError, ValueError):
+                    continue
+        self.keys.sort()
+
+    def page(self, after, since, until, limit):
+        stop = len(self.keys)
+        if until is not None:
+            stop = bisect.bisect_right(self.keys, until, key=lambda key: key[0])
+        if after is not None:
+            stop = min(stop, bisect.bisect_left(self.keys, after))
+        versions = []
+        while stop > 0 and len(versions) < limit:
+            stop -= 1
+            key = self.keys[stop]
+            if since is not None and key[0] < since:
+                break
+            try:
+                versions.append((key, load_version_metadata(os.path.join(self.dir_path, f"{key[1]}.json"))))
+            except (OSError, ValueError):
+                continue
+        return versions
+
+    def close(self):
+        pass
+
+
+class HistoryCursor:
+    """Newest-first pages of one file's versions; see the module docstring."""
+
+    def __init__(self, space_path, file_path, page_size=DEFAULT_PAGE_SIZE, since=None, until=None, token=None,
+                 use_index=True):
+        self.page_size = page_size
+        self.since = _bound(since)
+        self.until = _bound(until)
+        self.after = parse_token(token) if token else None
+        self.exhausted = False
+        self.source = self._open(space_path, to_fs_path(file_path), use_index)
+
+    def _open(self, space_path, file_path, use_index):
+        dir_path = lookup_hash_dir(augment_path(space_path, "file_metadata"), file_path)
+        if dir_path is None:
+            return None  # The JSON records are authoritative; a segment without them is stale.
+        file_hash = os.path.basename(dir_path)
+        try:
+            fresh = os.stat(dir_path).st_mtime_ns <= os.stat(segment_path(space_path, file_hash)).st_mtime_ns
+        except FileNotFoundError:
+            fresh = False
+        if fresh:
+            # Nothing was added, removed or rewritten since packing; the listing guards against a
+            # record that slipped in while the segment was being written.
+            live_ids = {name[:-5] for name in os.listdir(dir_path) if name.endswith(".json")}
+            source = _SegmentSource(segment_path(space_path, file_hash), live_ids)
+            if len(source.segment) == len(live_ids):
+                return source
+            source.close()
+        if use_index and os.path.exists(augment_path(space_path, INDEX_FILENAME)):
+            return _IndexSource(space_path, file_hash, dir_path)
+        return _DirectorySource(dir_path)
+
+    @property
+    def token(self):
+        """Resume token for the position after the last version returned, or None at the start."""
+        return None if self.after is None else f"{self.after[0]}:{self.after[1]}"
+
+    def next_page(self):
+        """Return the next page of versions (newest first); an empty list once the history is exhausted."""
+        if self.exhausted or self.source is None:
+            return []
+        page = self.source.page(self.after, self.since, self.until, self.page_size)
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if page:
+            self.after = page[-1][0]
+        return [version for _, version in page]
+
+    def pages(self):
+        """Yield pages until the history is exhausted."""
+        while True:
+            page = self.next_page()
+            if not page:
+                return
+            yield page
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def history_page(space_path, file_path, limit=DEFAULT_PAGE_SIZE, token=None, since=None, until=None, use_index=True):
+    """Return (versions, next token) for one page; the token is None when there is nothing more."""
+    with HistoryCursor(space_path, file_path, limit, since, until, token, use_index) as cursor:
+        versions = cursor.next_page()
+        return versions, (None if cursor.exhausted else cursor.token)
+
+
+def _time_arg(value):
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page through a file's version history, newest first.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("file", help="absolute path of the file")
+    parser.add_argument("-n", "--limit", type=int, default=DEFAULT_PAGE_SIZE, help="versions per page")
+    parser.add_argument("--token", default=None, help="resume after this token")
+    parser.add_argument("--since", default=None, help="ISO-8601 timestamp or epoch seconds")
+    parser.add_argument("--until", default=None, help="ISO-8601 timestamp or epoch seconds")
+    parser.add_argument("--no-index", action="store_true", help="ignore the version index")
+    args = parser.parse_args()
+
+    since, until = _time_arg(args.since), _time_arg(args.until)
+    started = time.perf_counter()
+    versions, token = history_page(args.space, os.path.abspath(args.file), args.limit, args.token,
+                                   since, until, not args.no_index)
+    elapsed = time.perf_counter() - started
+    print(f"📜 {len(versions)} versions of {os.path.basename(args.file)} in {elapsed * 1000:.2f}ms")
+    for version in versions:
+        print(f"   {version['timestamp']}  {version['id']}  {version.get('comment') or ''}")
+    if token:
+        print(f"➡️  next page: --token {token}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Persistent per-space version index.
+
+Keeps a SQLite file at .augment/version_index.db that maps each path hash to its
+version records ordered by timestamp, so history queries no longer open and parse
+every <version id>.json. The index is refreshed incrementally: a file_metadata/<hash>
+directory is only re-listed when its mtime changed, and only JSON records that are
+new or whose mtime or size differs from the indexed one are parsed, so records
+rewritten in place (compact, delta pack/unpack, gc) are picked up too.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from augment_store import (
+    augment_path,
+    hash_dir,
+    iter_metadata_dirs,
+    load_version_metadata,
+    parse_timestamp,
+)
+from path_hash import candidate_names
+
+INDEX_FILENAME = "version_index.db"
+
+# Directories modified this close to the last scan may have changed again within
+# the same mtime tick, so they are re-listed on the next refresh.
+RACY_WINDOW_NS = 2_000_000_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    path_hash TEXT NOT NULL,
+    version_id TEXT NOT NULL,
+    epoch REAL NOT NULL,
+    timestamp TEXT,
+    size INTEGER,
+    comment TEXT,
+    content_hash TEXT,
+    file_path TEXT,
+    storage_path TEXT,
+    record_mtime_ns INTEGER NOT NULL DEFAULT 0,
+    record_size INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (path_hash, version_id)
+);
+CREATE INDEX IF NOT EXISTS versions_by_time ON versions (path_hash, epoch DESC);
+CREATE TABLE IF NOT EXISTS dirs (
+    path_hash TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    scanned_ns INTEGER NOT NULL
+);
+"""
+
+COLUMNS = "version_id, file_path, timestamp, size, comment, content_hash, storage_path"
+
+
+def _row_to_version(row):
+    return {
+        "id": row[0],
+        "filePath": row[1],
+        "timestamp": row[2],
+        "size": row[3],
+        "comment": row[4],
+        "contentHash": row[5],
+        "storagePath": row[6],
+    }
+
+
+class VersionIndex:
+    """SQLite-backed index of every file version in one space."""
+
+    def __init__(self, space_path, index_path=None):
+        self.space_path = space_path
+        self.index_path = index_path or augment_path(space_path, INDEX_FILENAME)
+        self.db = sqlite3.connect(self.index_path)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(versions)")}
+        if columns and "record_mtime_ns" not in columns:
+            # Built before record stats were kept; it cannot tell rewritten records apart, so rebuild it.
+            self.db.executescript("DROP TABLE versions; DROP TABLE dirs;")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self):
+        """Bring the whole index up to date with file_metadata/ and return counters."""
+        stats = {"dirs": 0, "rescanned": 0, "added": 0, "updated": 0, "removed": 0}
+        seen = set()
+        with self.db:
+            for file_hash, entry in iter_metadata_dirs(self.space_path):
+                seen.add(file_hash)
+                stats["dirs"] += 1
+                changes = self._refresh_dir(file_hash, entry.path, entry.stat().st_mtime_ns)
+                if changes is not None:
+                    stats["rescanned"] += 1
+                    for key, count in changes.items():
+                        stats[key] += count
+
+            for (file_hash,) in self.db.execute("SELECT path_hash FROM dirs").fetchall():
+                if file_hash not in seen:
+                    stats["removed"] += self._drop_dir(file_hash)
+        return stats
+
+    def refresh_hash(self, file_hash):
+        """Bring the records of a single path hash up to date."""
+        dir_path = hash_dir(self.space_path, "file_metadata", file_hash)
+        with self.db:
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except FileNotFoundError:
+                self._drop_dir(file_hash)
+                return
+            self._refresh_dir(file_hash, dir_path, mtime_ns)
+
+    def forget(self, file_hash):
+        """Drop every row of a path hash so the next refresh re-reads its records from scratch."""
+        with self.db:
+            return self._drop_dir(file_hash)
+
+    def _refresh_dir(self, file_hash, dir_path, mtime_ns):
+        row = self.db.execute(
+            "SELECT mtime_ns, scanned_ns FROM dirs WHERE path_hash = ?", (file_hash,)
+        ).fetchone()
+        if row and row[0] == mtime_ns and mtime_ns < row[1] - RACY_WINDOW_NS:
+            return None
+
+        scanned_ns = time.time_ns()
+        on_disk = {}
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    on_disk[entry.name[:-5]] = (info.st_mtime_ns, info.st_size)
+        indexed = {
+            version_id: (mtime_ns, size)
+            for version_id, mtime_ns, size in self.db.execute(
+                "SELECT version_id, record_mtime_ns, record_size FROM versions WHERE path_hash = ?", (file_hash,)
+            )
+        }
+
+        removed = indexed.keys() - on_disk.keys()
+        self.db.executemany(
+            "DELETE FROM versions WHERE path_hash = ? AND version_id = ?",
+            [(file_hash, version_id) for version_id in removed],
+        )
+
+        changes = {"added": 0, "updated": 0, "removed": len(removed)}
+        for version_id, record_stat in on_disk.items():
+            if indexed.get(version_id) == record_stat:
+                continue
+            try:
+                version = load_version_metadata(os.path.join(dir_path, f"{version_id}.json"))
+            except (OSError, ValueError):
+                continue
+            self.db.execute(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_hash,
+                    version_id,
+                    parse_timestamp(version.get("timestamp")),
+                    version.get("timestamp"),
+                    version.get("size"),
+                    version.get("comment"),
+                    version.get("contentHash"),
+                    version.get("filePath"),
+                    version.get("storagePath"),
+                    *record_stat,
+                ),
+            )
+            changes["updated" if version_id in indexed else "added"] += 1
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (file_hash, mtime_ns, scanned_ns)
+        )
+        return changes
+
+    def _drop_dir(self, file_hash):
+        removed = self.db.execute("DELETE FROM versions WHERE path_hash = ?", (file_hash,)).rowcount
+        self.db.execute("DELETE FROM dirs WHERE path_hash = ?", (file_hash,))
+        return removed
+
+    def versions_for_hash(self, file_hash, limit=None, refresh=True):
+        """Return version records for a path hash, newest first."""
+        if refresh:
+            self.refresh_hash(file_hash)
+        query = f"SELECT {COLUMNS} FROM versions WHERE path_hash = ? ORDER BY epoch DESC"
+        params = [file_hash]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [_row_to_version(row) for row in self.db.execute(query, params)]
+
+    def _hash_for(self, file_path, refresh):
+        full, legacy = candidate_names(file_path)
+        if refresh:
+            self.refresh_hash(full)
+        if self.db.execute("SELECT 1 FROM dirs WHERE path_hash = ?", (full,)).fetchone():
+            return full
+        if refresh:
+            self.refresh_hash(legacy)
+        if self.db.execute("SELECT 1 FROM dirs WHERE path_hash = ?", (legacy,)).fetchone():
+            return legacy
+        return full
+
+    def latest_versions(self, file_path, limit=None, refresh=True):
+        """Return the newest `limit` versions of file_path (all of them if limit is None)."""
+        return self.versions_for_hash(self._hash_for(file_path, refresh), limit, refresh=False)
+
+    def version_count(self, file_path):
+        """Return how many versions of file_path are indexed."""
+        row = self.db.execute(
+            "SELECT COUNT(*) FROM versions WHERE path_hash = ?",
+            (self._hash_for(file_path, refresh=False),),
+        ).fetchone()
+        return row[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a space's version index.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("file", nargs="?", help="file whose history to print")
+    parser.add_argument("-n", "--limit", type=int, default=10, help="number of versions to print")
+    args = parser.parse_args()
+
+    with VersionIndex(args.space) as index:
+        started = time.perf_counter()
+        stats = index.refresh()
+        elapsed = time.perf_counter() - started
+        print(f"🔄 Refreshed index in {elapsed:.3f}s: {stats}")
+
+        if args.file:
+            versions = index.latest_versions(os.path.abspath(args.file), args.limit, refresh=False)
+            print(f"📊 {os.path.basename(args.file)}: {len(versions)} versions")
+            for version in versions:
+                print(f"   {version['timestamp']}  {version['id']}  {version.get('comment') or ''}")
+
+
+if __name__ == "__main__":
+    main()
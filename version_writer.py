@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Crash-safe group-commit writer for new file versions.
+
+add_version() in augment_store makes directories, writes the blob and then a
+separate JSON record for every version, and a crash in between leaves orphans.
+BatchWriter buffers new versions and commits them in groups:
+
+1. Every version in the batch (metadata and content) is appended to the
+   write-ahead journal .augment/write_journal.log, followed by a commit marker,
+   and the journal is fsynced. This is the only fsync of the batch; once it
+   returns the batch is durable. If the append or fsync fails (a full disk),
+   the journal is truncated back to where the batch started and the batch stays
+   queued, so commit() can simply be retried.
+2. Blobs and then JSON records are written through temp files and renamed into
+   place, creating each per-file directory once.
+3. Every `checkpoint_bytes` of journal (and on close) the blobs and records
+   written since the last checkpoint, and the directories they were renamed
+   into, are fsynced; only then is the journal truncated.
+
+On startup, committed batches still in the journal are re-applied (idempotently:
+versions whose record already exists are skipped) and a torn tail, from a batch
+whose commit marker never reached the disk, is discarded. The journal is locked
+with flock for the writer's lifetime, so a second writer on the same space fails
+instead of replaying or truncating a journal that is still in use.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+from augment_store import augment_path, format_timestamp, hash_dir
+from path_hash import calculate_file_path_hash
+
+JOURNAL_FILENAME = "write_journal.log"
+RECORD = struct.Struct("<cIQI")  # kind, metadata length, content length, crc32
+VERSION = b"V"
+COMMIT = b"C"
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BATCH_BYTES = 64 * 1024 * 1024
+DEFAULT_CHECKPOINT_BYTES = 256 * 1024 * 1024
+
+
+def _write_atomic(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _fsync_path(path, flags=os.O_RDONLY):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _encode(kind, metadata, content=b""):
+    payload = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    crc = zlib.crc32(content, zlib.crc32(payload))
+    return RECORD.pack(kind, len(payload), len(content), crc) + payload + content
+
+
+def read_journal(journal_path):
+    """Return the committed batches in a journal as lists of (metadata, content)."""
+    batches = []
+    pending = []
+    try:
+        f = open(journal_path, "rb")
+    except FileNotFoundError:
+        return batches
+    with f:
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            kind, payload_length, content_length, crc = RECORD.unpack(header)
+            payload = f.read(payload_length)
+            content = f.read(content_length)
+            if len(payload) < payload_length or len(content) < content_length:
+                break
+            if zlib.crc32(content, zlib.crc32(payload)) != crc:
+                break
+            if kind == COMMIT:
+                batches.append(pending)
+                pending = []
+            elif kind == VERSION:
+                pending.append((json.loads(payload), content))
+            else:
+                break
+    return batches
+
+
+class BatchWriter:
+    """Buffers new versions of files in one space and commits them in durable groups."""
+
+    def __init__(self, space_path, batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES,
+                 checkpoint_bytes=DEFAULT_CHECKPOINT_BYTES):
+        self.space_path = space_path
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.checkpoint_bytes = checkpoint_bytes
+        self.journal_path = augment_path(space_path, JOURNAL_FILENAME)
+        self.lock = threading.RLock()
+        self.pending = []
+        self.pending_bytes = 0
+        self.known_dirs = set()
+        self.unsynced_files = []
+        self.unsynced_dirs = set()
+        self.stats = {"batches": 0, "versions": 0, "bytes": 0, "fsyncs": 0, "checkpoints": 0, "replayed": 0}
+        # Unbuffered, so a failed append leaves nothing behind to be flushed later.
+        self.journal = open(self.journal_path, "ab", buffering=0)
+        try:
+            fcntl.flock(self.journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            self.journal.close()
+            raise BlockingIOError(e.errno, "another writer holds the journal", self.journal_path) from None
+        self.stats["replayed"] = self.recover()
+
+    def recover(self):
+        """Re-apply committed batches left in the journal by a crash; returns the versions restored."""
+        restored = 0
+        batches = read_journal(self.journal_path)
+        for batch in batches:
+            restored += self._apply(batch, skip_existing=True)
+        if batches or self.journal.tell():
+            self.checkpoint()
+        return restored
+
+    def add(self, file_path, content, timestamp=None, comment=None):
+        """Queue a new version of file_path; returns its metadata. Durable after the next commit()."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        file_hash = calculate_file_path_hash(file_path)
+        version_id = str(uuid.uuid4()).upper()
+        metadata = {
+            "id": version_id,
+            "filePath": file_path,
+            "timestamp": format_timestamp(timestamp if timestamp is not None else time.time()),
+            "size": len(content),
+            "comment": comment,
+            "contentHash": hashlib.sha256(content).hexdigest(),
+            "storagePath": os.path.join(hash_dir(self.space_path, "file_versions", file_hash), f"{version_id}.data"),
+        }
+        with self.lock:
+            self.pending.append((metadata, content))
+            self.pending_bytes += len(content)
+            if len(self.pending) >= self.batch_size or self.pending_bytes >= self.batch_bytes:
+                self.commit()
+        return metadata
+
+    def commit(self):
+        """Make every queued version durable and visible; returns how many were committed."""
+        with self.lock:
+            batch, self.pending, self.pending_bytes = self.pending, [], 0
+            if not batch:
+                return 0
+            data = b"".join(_encode(VERSION, metadata, content) for metadata, content in batch)
+            data += _encode(COMMIT, {"versions": len(batch)})
+            start = self.journal.seek(0, os.SEEK_END)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[self.journal.write(view):]
+                os.fsync(self.journal.fileno())
+            except OSError:
+                # E.g. ENOSPC: cut the journal back so a torn record cannot hide later batches from
+                # replay, and keep the batch queued for the next commit.
+                self.journal.truncate(start)
+                self.pending = batch + self.pending
+                self.pending_bytes += sum(len(content) for _, content in batch)
+                raise
+            self.stats["fsyncs"] += 1
+
+            self._apply(batch)
+            self.stats["batches"] += 1
+            self.stats["versions"] += len(batch)
+            self.stats["bytes"] += sum(len(content) for _, content in batch)
+            if self.journal.tell() >= self.checkpoint_bytes:
+                self.checkpoint()
+            return len(batch)
+
+    def _apply(self, batch, skip_existing=False):
+        applied = 0
+        for metadata, content in batch:
+            file_hash = os.path.basename(os.path.dirname(metadata["storagePath"]))
+            metadata_dir = hash_dir(self.space_path, "file_metadata", file_hash)
+            metadata_path = os.path.join(metadata_dir, f"{metadata['id']}.json")
+            blob_dir = os.path.dirname(metadata["storagePath"])
+            if skip_existing and os.path.exists(metadata_path):
+                continue
+            for directory in (blob_dir, metadata_dir):
+                if directory not in self.known_dirs:
+                    self._make_dirs(directory)
+                    self.known_dirs.add(directory)
+            # Blob first: a record must never point at a blob that is not there yet.
+            _write_atomic(metadata["storagePath"], content)
+            _write_atomic(metadata_path, json.dumps(metadata, indent=2).encode("utf-8"))
+            self.unsynced_files += [metadata["storagePath"], metadata_path]
+            self.unsynced_dirs.update((blob_dir, metadata_dir))
+            applied += 1
+        return applied
+
+    def _make_dirs(self, directory):
+        """Create directory; every directory that gained an entry is synced at the next checkpoint."""
+        if os.path.isdir(directory):
+            return
+        self._make_dirs(os.path.dirname(directory))
+        os.makedirs(directory, exist_ok=True)
+        self.unsynced_dirs.add(os.path.dirname(directory))
+
+    def checkpoint(self):
+        """Fsync the files applied since the last checkpoint and their directories, then empty the journal."""
+        with self.lock:
+            for path in self.unsynced_files:
+                _fsync_path(path)
+            for directory in self.unsynced_dirs:
+                _fsync_path(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+            self.unsynced_files = []
+            self.unsynced_dirs = set()
+            self.journal.truncate(0)
+            self.journal.seek(0)
+            os.fsync(self.journal.fileno())
+            self.stats["checkpoints"] += 1
+
+    def close(self):
+        """Commit what is queued, checkpoint and close the journal."""
+        with self.lock:
+            self.commit()
+            self.checkpoint()
+            self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest files as new versions with group commit.")
+    parser.add_argument("space", help="path to the Augment space")
+    parser.add_argument("files", nargs="*", help="files to store a new version of")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--comment", default=None)
+    parser.add_argument("--recover", action="store_true", help="only replay the journal")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with BatchWriter(args.space, batch_size=args.batch_size) as writer:
+        if writer.stats["replayed"]:
+            print(f"♻️  Replayed {writer.stats['replayed']} versions from the journal")
+        if not args.recover:
+            for path in args.files:
+                with open(path, "rb") as f:
+                    writer.add(os.path.abspath(path), f.read(), comment=args.comment)
+    elapsed = time.perf_counter() - started
+    print(f"💾 Stored {writer.stats['versions']} versions in {writer.stats['batches']} batches "
+          f"({writer.stats['fsyncs']} fsyncs) in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()